@@ -0,0 +1,175 @@
+﻿"""Streamed ZIP output for batch renders (``POST /generate-batch``).
+
+Renders run concurrently on the render pool, at most ``window`` at a time,
+and every PDF is written to the archive and sent to the client as soon as
+it finishes (completion order). Only the in-flight PDFs and one compressed
+member are held in memory, whatever the batch size.
+
+A failing item does not abort the batch: it is recorded in
+``manifest.json``, the last member of the archive, next to the successful
+ones.
+
+Configuration (environment variables):
+- BATCH_MAX_ITEMS : profiles accepted per batch (default: 500). Further
+                    items are skipped and the manifest is marked truncated.
+- BATCH_MAX_LINE_MB : size of one NDJSON line (default: 8); longer -> 413
+- BATCH_MAX_BODY_MB : size of a whole NDJSON body (default: 32); larger -> 413.
+                      The body is parsed before the first render, so this
+                      bounds the request side's memory.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import zipfile
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger("resume.batch")
+
+# (pdf bytes, cache status)
+RenderFn = Callable[[], Awaitable[Tuple[bytes, str]]]
+# (index, member name, render function or None, error or None)
+BatchJob = Tuple[int, str, Optional[RenderFn], Optional[str]]
+
+
+def max_items() -> int:
+    try:
+        return max(1, int(os.getenv("BATCH_MAX_ITEMS", "") or 500))
+    except ValueError:
+        return 500
+
+
+def _mb_env(name: str, default: float) -> int:
+    try:
+        mb = float(os.getenv(name, "") or default)
+    except ValueError:
+        mb = default
+    return max(1, int(mb * 1024 * 1024))
+
+
+def max_line_bytes() -> int:
+    """Largest NDJSON line (one profile) accepted."""
+    return _mb_env("BATCH_MAX_LINE_MB", 8)
+
+
+def max_body_bytes() -> int:
+    """Largest NDJSON request body accepted."""
+    return _mb_env("BATCH_MAX_BODY_MB", 32)
+
+
+_SLUG_RE = re.compile(r"[^\w\-]+", flags=re.UNICODE)
+
+
+def member_name(index: int, label: Any) -> str:
+    """Archive name of item ``index``: ``0007-jane-doe.pdf``."""
+    slug = _SLUG_RE.sub("-", str(label or "").strip()).strip("-").lower()[:60]
+    return f"{index:04d}-{slug}.pdf" if slug else f"{index:04d}.pdf"
+
+
+class _ZipSink:
+    """Write-only file object collecting what ZipFile writes until drained.
+
+    It has no ``seek``/``tell``, so ZipFile writes data descriptors after
+    each member and never goes back: the bytes can be sent immediately.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+
+    def write(self, b: bytes) -> int:
+        self._buf += b
+        return len(b)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out, self._buf = bytes(self._buf), bytearray()
+        return out
+
+
+async def stream_zip(
+    jobs: AsyncIterator[BatchJob],
+    *,
+    window: int,
+    meta: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[bytes]:
+    """Run ``jobs`` and yield the ZIP archive in chunks as renders complete.
+
+    Args:
+        jobs: Batch items in input order. Items with an error (and no render
+            function) go straight to the manifest.
+        window: Renders in flight at once (normally the pool's slot count).
+        meta: Extra top-level fields for ``manifest.json``.
+
+    Yields:
+        bytes: Consecutive chunks of the archive.
+    """
+    sink = _ZipSink()
+    zf = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    entries: List[Dict[str, Any]] = []
+    pending: Dict[asyncio.Task, Tuple[int, str, float]] = {}
+    t0 = time.perf_counter()
+
+    def record(index: int, name: str, started: float, task: asyncio.Task) -> None:
+        entry: Dict[str, Any] = {"index": index, "file": None, "status": "error"}
+        try:
+            pdf, cache_status = task.result()
+        except Exception as exc:
+            entry["error"] = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+        else:
+            zf.writestr(name, pdf)
+            entry.update(file=name, status="ok", bytes=len(pdf), cache=cache_status)
+        entry["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        entries.append(entry)
+
+    async def collect(block_until: int) -> None:
+        while len(pending) > block_until:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                record(*pending.pop(task), task)
+
+    try:
+        async for index, name, render, error in jobs:
+            if render is None:
+                entries.append({"index": index, "file": None, "status": "error", "error": error})
+                continue
+            task = asyncio.ensure_future(render())
+            pending[task] = (index, name, time.perf_counter())
+            await collect(max(1, window) - 1)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        while pending:
+            await collect(len(pending) - 1)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+        entries.sort(key=lambda e: e["index"])
+        ok = sum(1 for e in entries if e["status"] == "ok")
+        manifest = {
+            **(meta or {}),
+            "count": len(entries),
+            "ok": ok,
+            "failed": len(entries) - ok,
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+            "items": entries,
+        }
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        zf.close()
+        log.info("Batch done: %s ok, %s failed", ok, len(entries) - ok)
+        yield sink.drain()
+    finally:
+        # Client went away (or a bug): do not leave renders running for nobody.
+        for task in pending:
+            task.cancel()
+
+
+__all__ = ["BatchJob", "RenderFn", "max_items", "member_name", "stream_zip"]
@@ -0,0 +1,90 @@
+﻿"""Content-addressed blob store for profile photos (and other large binaries).
+
+Each blob is written once under its SHA-256, fanned out by the first two hex
+digits (``<root>/ab/abcdef...``), so identical photos saved by many profiles
+share one file and profile JSON keeps only the hex id (``photo_id``, the same
+id ``POST /photos`` returns). Writes are atomic (temp file + rename); blobs
+are immutable, so readers never see a partial file.
+
+Configuration (environment variables):
+- BLOBS_DIR : blob root (default: ``.blobs`` inside PROFILES_DIR)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+log = logging.getLogger("resume.blobs")
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    """Immutable blobs on disk, addressed by the hex SHA-256 of their bytes."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        if not _DIGEST_RE.match(digest or ""):
+            raise ValueError(f"Invalid blob id: {digest!r}")
+        return self.root / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        try:
+            return self.path(digest).is_file()
+        except ValueError:
+            return False
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            return self.path(digest).read_bytes()
+        except (OSError, ValueError):
+            return None
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` (no-op if already present) and return its id."""
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.path(digest)
+        if target.is_file():
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(delete=False, dir=str(target.parent), suffix=".tmp") as tmp:
+            tmp.write(data)
+            tmp_path = Path(tmp.name)
+        tmp_path.replace(target)
+        log.info("Blob stored: %s (%d bytes)", digest, len(data))
+        return digest
+
+    def __iter__(self) -> Iterator[str]:
+        """Ids of all stored blobs."""
+        for p in self.root.glob("??/*"):
+            if _DIGEST_RE.match(p.name):
+                yield p.name
+
+
+def blobs_dir() -> Path:
+    explicit = os.getenv("BLOBS_DIR")
+    if explicit:
+        return Path(explicit).resolve()
+    return Path(os.getenv("PROFILES_DIR", "profiles")).resolve() / ".blobs"
+
+
+_STORE: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Return the process-wide blob store, configured from the environment."""
+    global _STORE
+    if _STORE is None:
+        _STORE = BlobStore(blobs_dir())
+    return _STORE
+
+
+__all__ = ["BlobStore", "blobs_dir", "get_blob_store"]
@@ -0,0 +1,62 @@
+﻿"""Strong ETags and conditional requests (``If-None-Match`` -> ``304``).
+
+The client fetches the same profile and regenerates the same PDF many times
+per session. Responses carry a strong ETag; a request repeating it in
+``If-None-Match`` gets ``304 Not Modified`` without the body.
+
+- JSON bodies (profiles) are deterministic: their ETag is the SHA-256 of
+  the body bytes (``strong_etag``).
+- PDFs are not: ReportLab embeds the creation date and a random document
+  ID, so two renders of the same input differ byte for byte. Their ETag is
+  the result-cache key (``key_etag``), which covers every input of the
+  render including the theme/layout file versions. It is known before the
+  render, so a matching request costs neither a cache lookup nor a render.
+
+``/generate-form-simple`` is a POST, but it is a pure function of its body,
+so it honours ``If-None-Match`` the same way a GET does.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+
+
+def strong_etag(data: bytes) -> str:
+    """Quoted strong ETag of a response body."""
+    return '"' + hashlib.sha256(data).hexdigest() + '"'
+
+
+def key_etag(key: Any) -> str:
+    """Quoted strong ETag of a render, from its ``ResultCache`` key."""
+    return '"' + key.digest + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header value matches ``etag``.
+
+    Uses the weak comparison RFC 9110 prescribes for ``If-None-Match``: a
+    ``W/`` prefix on either side is ignored, and ``*`` matches anything.
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """``304`` carrying the ETag and the caching headers of the full response."""
+    return Response(status_code=304, headers={**(headers or {}), "ETag": etag})
+
+
+__all__ = ["etag_matches", "key_etag", "not_modified", "strong_etag"]
@@ -0,0 +1,413 @@
+﻿"""Persistent render jobs (``/jobs`` endpoints).
+
+Long renders and batches outlive reverse-proxy timeouts, so clients can
+submit them as jobs and poll instead of holding a socket open. Jobs live
+in a SQLite database; results are written next to it as files. A dispatcher
+task inside the API process claims queued jobs and runs them on the render
+pool (the same ``build_resume_pdf`` pipeline as the synchronous routes).
+
+Job states: ``queued`` -> ``running`` -> ``done`` | ``failed``; a queued or
+running job can be ``cancelled``. Claiming is a single atomic UPDATE, so
+several API processes can share one database. A claimed job carries its
+owner (one id per process) and a lease that the owner's dispatcher renews
+while the job runs; a ``running`` job whose lease expired (its process died
+mid-render) is queued again by whichever dispatcher notices it first, or
+marked ``failed`` once it has been claimed ``JOBS_MAX_ATTEMPTS`` times, so a
+payload that kills its process is not retried forever.
+
+The dispatcher does its database work in a thread. Errors are logged and
+retried with backoff, and ``JobQueue.health()`` reports them on ``/healthz``.
+
+Configuration (environment variables):
+- JOBS_DIR           : database + results directory (default: outputs/jobs).
+- JOBS_TTL_HOURS     : finished jobs (and their files) kept for this long
+                       (default: 24).
+- JOBS_LEASE_SECONDS : lease of a running job (default: 60); renewed every
+                       third of it, requeued once expired.
+- JOBS_MAX_ATTEMPTS  : claims of one job before an expired lease fails it
+                       instead of requeueing it (default: 3).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+log = logging.getLogger("resume.jobs")
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# payload -> (result bytes, media type, file extension)
+JobRunner = Callable[[Dict[str, Any]], Awaitable[Tuple[bytes, str, str]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    created     REAL NOT NULL,
+    started     REAL,
+    finished    REAL,
+    error       TEXT,
+    result_file TEXT,
+    media_type  TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    owner       TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+"""
+
+# Columns added after the first release: (name, declaration).
+_MIGRATIONS = (("owner", "TEXT"), ("lease_until", "REAL"))
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str
+    created: float
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    result_file: Optional[str] = None
+    media_type: Optional[str] = None
+    attempts: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d.pop("result_file")
+        return d
+
+
+_COLUMNS = "id, kind, status, created, started, finished, error, result_file, media_type, attempts"
+
+
+class JobStore:
+    """SQLite-backed job table; result files are stored in the same directory."""
+
+    def __init__(self, directory: Path, *, lease_seconds: float = 60.0, max_attempts: int = 3) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.lease = max(1.0, float(lease_seconds))
+        self.max_attempts = max(1, int(max_attempts))
+        self.owner = uuid.uuid4().hex  # this process's claims
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.directory / "jobs.sqlite3"), check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        have = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for name, decl in _MIGRATIONS:
+            if name not in have:
+                self._db.execute(f"ALTER TABLE jobs ADD COLUMN {name} {decl}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ---------- queries ----------
+    def _one(self, sql: str, args: tuple = ()) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(f"SELECT {_COLUMNS} FROM jobs {sql}", args).fetchone()
+        return Job(*row) if row else None
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._one("WHERE id = ?", (job_id,))
+
+    def payload(self, job_id: str) -> Dict[str, Any]:
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def result_path(self, job: Job) -> Optional[Path]:
+        return self.directory / job.result_file if job.result_file else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+    # ---------- transitions ----------
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        job = Job(id=uuid.uuid4().hex, kind=kind, status=QUEUED, created=time.time())
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, payload, created) VALUES (?, ?, ?, ?, ?)",
+                (job.id, kind, QUEUED, json.dumps(payload, ensure_ascii=False), job.created),
+            )
+        return job
+
+    def claim(self) -> Optional[Job]:
+        """Mark the oldest queued job as running under this store's lease and return it."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "UPDATE jobs SET status = ?, started = ?, attempts = attempts + 1, owner = ?, lease_until = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1) "
+                "RETURNING id",
+                (RUNNING, now, self.owner, now + self.lease, QUEUED),
+            ).fetchone()
+        return self.get(row[0]) if row else None
+
+    def renew(self) -> int:
+        """Extend the lease of every job this store is running."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                (time.time() + self.lease, self.owner, RUNNING),
+            )
+        return cur.rowcount
+
+    def complete(self, job: Job, data: bytes, media_type: str, ext: str) -> bool:
+        name = f"{job.id}{ext}"
+        tmp = self.directory / f".{name}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.directory / name)
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result_file = ?, media_type = ? "
+                "WHERE id = ? AND status = ? AND owner = ?",
+                (DONE, time.time(), name, media_type, job.id, RUNNING, self.owner),
+            )
+        if cur.rowcount == 0:  # cancelled meanwhile, or lease lost
+            (self.directory / name).unlink(missing_ok=True)
+            return False
+        return True
+
+    def fail(self, job: Job, error: str) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = ? WHERE id = ? AND status = ? AND owner = ?",
+                (FAILED, time.time(), error, job.id, RUNNING, self.owner),
+            )
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, finished = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+        return self.get(job_id)
+
+    def requeue_expired(self) -> int:
+        """Queue again the running jobs whose lease expired (their process died).
+
+        A job already claimed ``max_attempts`` times is marked failed instead.
+        Rows from before leases existed have none and count as expired.
+
+        Returns:
+            int: Jobs requeued (failed ones are not counted).
+        """
+        now = time.time()
+        expired = "status = ? AND (lease_until IS NULL OR lease_until < ?)"
+        with self._lock:
+            failed = self._db.execute(
+                f"UPDATE jobs SET status = ?, finished = ?, owner = NULL, lease_until = NULL, "
+                f"error = 'worker lost ' || attempts || ' time(s); not retried' "
+                f"WHERE {expired} AND attempts >= ? RETURNING id",
+                (FAILED, now, RUNNING, now, self.max_attempts),
+            ).fetchall()
+            cur = self._db.execute(
+                f"UPDATE jobs SET status = ?, started = NULL, owner = NULL, lease_until = NULL WHERE {expired}",
+                (QUEUED, RUNNING, now),
+            )
+        for (job_id,) in failed:
+            log.warning("Job %s failed: lease expired on its last attempt.", job_id)
+        return cur.rowcount
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs (and result files) finished before ``older_than``."""
+        marks = ",".join("?" * len(FINISHED))
+        with self._lock:
+            rows = self._db.execute(
+                f"DELETE FROM jobs WHERE status IN ({marks}) AND finished < ? RETURNING result_file",
+                (*FINISHED, older_than),
+            ).fetchall()
+        for (name,) in rows:
+            if name:
+                (self.directory / name).unlink(missing_ok=True)
+        return len(rows)
+
+
+class JobQueue:
+    """Runs queued jobs with at most ``concurrency`` in flight."""
+
+    # Consecutive dispatcher errors before /healthz reports the queue unhealthy.
+    UNHEALTHY_AFTER = 3
+
+    def __init__(self, store: JobStore, *, ttl_hours: float = 24.0) -> None:
+        self.store = store
+        self.ttl = ttl_hours * 3600
+        self._runner: Optional[JobRunner] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Dict[str, asyncio.Task] = {}
+        self._failures = 0
+        self._last_error: Optional[str] = None
+        self._last_error_at: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        directory = Path(os.getenv("JOBS_DIR") or APP_ROOT / "outputs" / "jobs")
+        try:
+            ttl = float(os.getenv("JOBS_TTL_HOURS", "") or 24)
+        except ValueError:
+            ttl = 24.0
+        try:
+            lease = float(os.getenv("JOBS_LEASE_SECONDS", "") or 60)
+        except ValueError:
+            lease = 60.0
+        try:
+            attempts = int(os.getenv("JOBS_MAX_ATTEMPTS", "") or 3)
+        except ValueError:
+            attempts = 3
+        return cls(JobStore(directory, lease_seconds=lease, max_attempts=attempts), ttl_hours=ttl)
+
+    # ---------- lifecycle ----------
+    def start(self, runner: JobRunner, *, concurrency: int = 1) -> None:
+        """Start the dispatcher on the running event loop (idempotent)."""
+        if self._dispatcher is not None:
+            return
+        self._runner = runner
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.ensure_future(self._dispatch(max(1, concurrency)))
+
+    async def stop(self) -> None:
+        tasks = [t for t in (self._dispatcher, *self._running.values()) if t is not None]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._running.clear()
+        # Jobs interrupted here stay "running" until their lease expires;
+        # then any dispatcher (this one after a restart) requeues them.
+
+    # ---------- API ----------
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Job:
+        job = self.store.submit(kind, payload)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.store.cancel(job_id)
+        task = self._running.get(job_id)
+        if task is not None and job is not None and job.status == CANCELLED:
+            task.cancel()
+        return job
+
+    def health(self) -> Dict[str, Any]:
+        """Dispatcher state for ``/healthz``."""
+        alive = self._dispatcher is not None and not self._dispatcher.done()
+        return {
+            "ok": alive and self._failures < self.UNHEALTHY_AFTER,
+            "dispatcher": alive,
+            "running": len(self._running),
+            "consecutive_errors": self._failures,
+            "last_error": self._last_error,
+            "last_error_at": self._last_error_at,
+        }
+
+    # ---------- worker ----------
+    async def _dispatch(self, concurrency: int) -> None:
+        next_purge = 0.0
+        next_renew = 0.0
+        while True:
+            try:
+                next_renew, next_purge = await self._dispatch_once(concurrency, next_renew, next_purge)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._failures += 1
+                self._last_error = f"{type(exc).__name__}: {exc}"
+                self._last_error_at = time.time()
+                delay = min(60.0, 2.0 ** self._failures)
+                log.exception("Job dispatcher error (#%s), retrying in %.0fs.", self._failures, delay)
+                await asyncio.sleep(delay)
+                continue
+            self._failures = 0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=min(5.0, self.store.lease / 3))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch_once(self, concurrency: int, next_renew: float, next_purge: float) -> Tuple[float, float]:
+        """One round: renew leases, recover expired jobs, claim, purge (database work in a thread)."""
+        now = time.time()
+        if now >= next_renew:
+            await asyncio.to_thread(self.store.renew)
+            requeued = await asyncio.to_thread(self.store.requeue_expired)
+            if requeued:
+                log.info("Requeued %s job(s) whose lease expired.", requeued)
+            next_renew = now + self.store.lease / 3
+        while len(self._running) < concurrency:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                break
+            task = asyncio.ensure_future(self._run(job))
+            self._running[job.id] = task
+            task.add_done_callback(lambda _t, jid=job.id: self._finished(jid))
+        if now >= next_purge:
+            await asyncio.to_thread(self.store.purge, now - self.ttl)
+            next_purge = now + 3600
+        return next_renew, next_purge
+
+    def _finished(self, job_id: str) -> None:
+        self._running.pop(job_id, None)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            data, media_type, ext = await self._runner(self.store.payload(job.id))
+        except asyncio.CancelledError:
+            log.info("Job %s cancelled.", job.id)
+            raise
+        except Exception as exc:
+            detail = getattr(exc, "detail", None) or str(exc) or type(exc).__name__
+            log.warning("Job %s failed: %s", job.id, detail)
+            await asyncio.to_thread(self.store.fail, job, str(detail))
+            return
+        await asyncio.to_thread(self.store.complete, job, data, media_type, ext)
+
+
+_QUEUE: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, configured from the environment."""
+    global _QUEUE
+    if _QUEUE is None:
+        _QUEUE = JobQueue.from_env()
+    return _QUEUE
+
+
+__all__ = [
+    "CANCELLED",
+    "FINISHED",
+    "DONE",
+    "FAILED",
+    "QUEUED",
+    "RUNNING",
+    "Job",
+    "JobQueue",
+    "JobStore",
+    "get_job_queue",
+]
@@ -3,25 +3,42 @@
 Exposes:
 - GET  /healthz
 - POST /generate-form-simple      : build PDF from profile + (optional) layout/theme
+                                    (JSON, or multipart: JSON part + raw photo part)
+- POST /photos                    : upload a photo once, reference it by ``photo_id``
+- GET  /photos/{photo_id}         : the photo bytes (uploaded, or of a saved profile)
+- POST /generate-batch            : many profiles, one theme/layout -> streamed ZIP
+- /jobs/*                         : submit / poll / download / cancel render jobs
 - /api/profiles/*                 : save/load JSON profiles (via profiles router)
 """
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import functools
 import json
 import logging
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Response
+from fastapi import FastAPI, File, HTTPException, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field, ValidationError, field_validator
 
-# 1) Register fonts (side-effect)
+from api import batch
+from api.http_cache import etag_matches, key_etag, not_modified
+from api.jobs import DONE, FINISHED, Job, get_job_queue
+# 1) Font index + lazy registration hook (side-effect)
 from api.pdf_utils import fonts  # noqa: F401
-from api.pdf_utils.builder import build_resume_pdf
+from api.pdf_utils import metrics, timing
+from api.pdf_utils.compiled_layout import load_layout_file
+from api.pdf_utils.frozen import thaw
 from api.pdf_utils.mapper import profile_to_overrides
+from api.photos import get_photo_store, is_photo_id, max_upload_bytes, sniff_image
+from api.render_executor import RenderQueueFull, get_render_executor, render_pdf_timed
+from api.result_cache import CacheKey, get_result_cache
 from api.routes import profiles as profiles_routes  # /api/profiles/*
 
 log = logging.getLogger("resume.api")
@@ -47,8 +64,101 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["Server-Timing", "X-Render-Pages", "X-Cache", "X-Photo-Id", "ETag"],
 )
 
+
+# ─────────────────────────────────────────────────────────────
+# Metrics (Prometheus text format at /metrics)
+# ─────────────────────────────────────────────────────────────
+class _MetricsMiddleware:
+    """Observe request latency per route template, status, theme and layout.
+
+    Routes name the theme/layout they rendered with ``_metric_labels``; the
+    duration runs until the last body chunk is sent (streamed batches too).
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        t0 = time.perf_counter()
+        status = [500]
+
+        async def send_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            route = scope.get("route")
+            labels = (scope.get("state") or {}).get("metric_labels") or {}
+            metrics.REQUEST_SECONDS.observe(
+                time.perf_counter() - t0,
+                endpoint=getattr(route, "path", None) or "unmatched",
+                method=scope.get("method", ""),
+                status=status[0],
+                theme=labels.get("theme", ""),
+                layout=labels.get("layout", ""),
+            )
+
+
+app.add_middleware(_MetricsMiddleware)
+
+
+def _metric_labels(request: Request, args: GeneratePayload) -> None:
+    """Tag the request's latency sample with its theme and layout (bounded values)."""
+    theme = args.effective_theme_name()
+    if not (THEMES_DIR / f"{theme}.theme.json").is_file():
+        theme = "other"
+    if args.layout_inline:
+        layout = "inline"
+    elif isinstance(args.layout_name, str) and args.layout_name.strip():
+        layout = args.layout_name.strip()  # validated by _resolve_layout
+    else:
+        layout = "none"
+    request.state.metric_labels = {"theme": theme, "layout": layout}
+
+
+def _render_pool_metrics() -> List[metrics.Family]:
+    st = get_render_executor().stats()
+    return [
+        ("resume_render_queue_depth", "gauge", "Renders waiting for a free slot.", [({}, st["waiting"])]),
+        ("resume_render_running", "gauge", "Renders in progress.", [({}, st["running"])]),
+        ("resume_render_slots", "gauge", "Concurrent render slots.", [({}, st["slots"])]),
+    ]
+
+
+def _result_cache_metrics() -> List[metrics.Family]:
+    st = get_result_cache().stats()
+    return [
+        (
+            "resume_result_cache_hits_total",
+            "counter",
+            "Result cache hits by tier.",
+            [({"tier": "memory"}, st["memory_hits"]), ({"tier": "disk"}, st["disk_hits"])],
+        ),
+        ("resume_result_cache_misses_total", "counter", "Result cache misses.", [({}, st["misses"])]),
+        ("resume_result_cache_hit_ratio", "gauge", "Hits / lookups since start.", [({}, st["hit_rate"])]),
+        ("resume_result_cache_bytes", "gauge", "PDF bytes held in memory.", [({}, st["bytes"])]),
+    ]
+
+
+def _job_metrics() -> List[metrics.Family]:
+    counts = get_job_queue().store.counts()
+    return [("resume_jobs", "gauge", "Render jobs by status.", [({"status": k}, v) for k, v in counts.items()])]
+
+
+metrics.install_block_hook()  # in-process renders (RENDER_WORKERS=0)
+metrics.register_collector(_render_pool_metrics)
+metrics.register_collector(_result_cache_metrics)
+metrics.register_collector(_job_metrics)
+
 # Routes for profiles CRUD
 app.include_router(profiles_routes.router, prefix="/api")
 
@@ -76,17 +186,39 @@ def coerce_summary(profile: Dict[str, Any]) -> None:
                 pass  # best-effort
 
 
+def _decode_headshot(d: Dict[str, Any]) -> None:
+    """Fill ``photo_bytes`` of one avatar_circle data dict from photo_id or photo_b64."""
+    if d.get("photo_bytes"):
+        return
+    pid = d.get("photo_id")
+    if pid:
+        photo = get_photo_store().get(pid) if is_photo_id(pid) else None
+        if photo is None:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown photo_id: {pid} (upload it again via POST /photos)."
+            )
+        d["photo_bytes"] = photo
+        return
+    b64 = d.get("photo_b64")
+    if b64:
+        try:
+            d["photo_bytes"] = base64.b64decode(b64.encode("ascii"))
+        except Exception:
+            d["photo_bytes"] = None
+
+
 def _decode_headshots(node: Any) -> None:
-    """Recursively convert avatar_circle.data.photo_b64 -> photo_bytes."""
+    """Recursively resolve avatar_circle photos (photo_id / photo_b64 -> photo_bytes).
+
+    Covers both flow blocks (``block_id == "avatar_circle"``) and the
+    ``overrides["avatar_circle"]`` entry.
+    """
     if isinstance(node, dict):
         if (node.get("block_id") == "avatar_circle") and isinstance(node.get("data"), dict):
-            d = node["data"]
-            b64 = d.get("photo_b64")
-            if b64 and not d.get("photo_bytes"):
-                try:
-                    d["photo_bytes"] = base64.b64decode(b64.encode("ascii"))
-                except Exception:
-                    d["photo_bytes"] = None
+            _decode_headshot(node["data"])
+        avatar = node.get("avatar_circle")
+        if isinstance(avatar, dict) and isinstance(avatar.get("data"), dict):
+            _decode_headshot(avatar["data"])
         for v in list(node.values()):
             _decode_headshots(v)
     elif isinstance(node, list):
@@ -117,7 +249,8 @@ def _safe_read_layout_by_name(layout_name: str) -> Dict[str, Any]:
     if not str(candidate).startswith(str(LAYOUTS_DIR.resolve())):
         raise HTTPException(status_code=400, detail="Invalid layout path.")
     try:
-        return json.loads(candidate.read_text(encoding="utf-8"))
+        # Parsed once per file version; the caller merges overrides into a copy.
+        return thaw(load_layout_file(candidate).data)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Layout not found: {layout_name}")
     except Exception as exc:
@@ -135,6 +268,7 @@ class GeneratePayload(BaseModel):
     profile: Dict[str, Any] = Field(default_factory=dict)
     layout_inline: Optional[Dict[str, Any]] = None
     layout_name: Optional[str] = None
+    photo_id: Optional[str] = Field(default=None, description="Avatar photo id from POST /photos")
 
     @field_validator("ui_lang")
     @classmethod
@@ -145,75 +279,543 @@ class GeneratePayload(BaseModel):
         return normalize_theme_name(self.theme_name or self.theme)
 
 
+class BatchPayload(GeneratePayload):
+    """Shared options + one entry per resume (a profile, or {"id", "profile"})."""
+
+    profiles: List[Any] = Field(default_factory=list)
+
+
 @app.on_event("startup")
 def _startup() -> None:
-    # Register fonts once at startup
+    # Index fonts at startup; each family is parsed on first use
+    try:
+        log.info("Fonts available: %d families.", len(fonts.font_index()))
+    except Exception as exc:
+        log.warning("Font indexing failed: %s", exc)
+
+    # Build the profile index once (kept current by save/delete)
     try:
-        fonts.register_all_fonts()
-        log.info("Fonts registered.")
+        profiles_routes.rebuild_index()
     except Exception as exc:
-        log.warning("Font registration failed: %s", exc)
+        log.warning("Profile indexing failed: %s", exc)
+
+    # Start render workers (they preload fonts/themes/blocks themselves)
+    get_render_executor().start()
+
+    # Resume persisted render jobs
+    get_job_queue().start(_run_job, concurrency=get_render_executor().slots)
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    await get_job_queue().stop()
+    get_render_executor().shutdown()
 
 
 @app.get("/healthz")
-def healthz() -> Dict[str, bool]:
-    return {"ok": True}
+def healthz() -> JSONResponse:
+    """Liveness plus the job dispatcher's state; ``503`` if the dispatcher keeps failing."""
+    jobs = get_job_queue().health()
+    return JSONResponse({"ok": jobs["ok"], "jobs": jobs}, status_code=200 if jobs["ok"] else 503)
 
 
-@app.post("/generate-form-simple")
-def generate_form_simple(payload: Dict[str, Any]) -> Response:
-    """Generate a resume PDF from the provided payload."""
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint() -> PlainTextResponse:
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def _store_photo(data: bytes) -> Tuple[str, str]:
+    """Validate an uploaded photo and write it to the photo store.
+
+    Returns:
+        Tuple[str, str]: Its ``photo_id`` and MIME type.
+
+    Raises:
+        HTTPException: 413 if too large, 415 if not a PNG/JPEG/GIF/WebP image,
+            500 if it could not be stored.
+    """
+    limit = max_upload_bytes()
+    if len(data) > limit:
+        raise HTTPException(status_code=413, detail=f"Photo too large (max {limit} bytes).")
+    mime = sniff_image(data)
+    if mime is None:
+        raise HTTPException(status_code=415, detail="Photo must be a PNG, JPEG, GIF or WebP image.")
     try:
-        args = GeneratePayload.model_validate(payload)
-    except ValidationError as ve:
-        raise HTTPException(status_code=422, detail=json.loads(ve.json()))
+        pid = await asyncio.to_thread(get_photo_store().put, data)
+    except OSError as exc:
+        log.error("Photo could not be stored: %s", exc)
+        raise HTTPException(status_code=500, detail="Photo could not be stored.")
+    return pid, mime
 
-    # Build data for builder
-    data: Dict[str, Any] = {
-        "theme_name": args.effective_theme_name(),
-        "ui_lang": args.ui_lang,
-        "rtl_mode": bool(args.rtl_mode),
-        "profile": args.profile or {},
-    }
 
-    # Resolve layout_inline (prefer inline, else by name)
+_MAX_PAYLOAD_PART = 8 * 1024 * 1024  # a JSON ``payload`` sent as a form field
+
+
+async def _read_multipart(request: Request) -> Tuple[Any, Optional[bytes]]:
+    """Split a multipart generate request into its JSON payload and photo bytes.
+
+    Parts: ``payload`` (the JSON body, as a field or a file) and an optional
+    ``photo`` file with the raw image.
+    """
+    limit = max_upload_bytes()
+    form = await request.form(max_files=2, max_fields=4, max_part_size=_MAX_PAYLOAD_PART)
+    try:
+        raw = form.get("payload")
+        if raw is None:
+            raise HTTPException(status_code=400, detail="Missing 'payload' part.")
+        if not isinstance(raw, str):
+            raw = await raw.read()
+        try:
+            payload = json.loads(raw)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON in 'payload': {exc}")
+
+        photo = form.get("photo")
+        if photo is None:
+            return payload, None
+        if isinstance(photo, str):
+            raise HTTPException(status_code=400, detail="'photo' must be a file part.")
+        return payload, await photo.read(limit + 1)
+    finally:
+        await form.close()
+
+
+@app.post("/photos")
+async def upload_photo(photo: UploadFile = File(...)) -> Dict[str, Any]:
+    """Store a photo once; renders then pass ``photo_id`` instead of the bytes."""
+    data = await photo.read(max_upload_bytes() + 1)
+    pid, mime = await _store_photo(data)
+    return {"photo_id": pid, "size": len(data), "content_type": mime}
+
+
+@app.get("/photos/{photo_id}")
+def get_photo(photo_id: str, request: Request) -> Response:
+    """Photo bytes by id; ids are content hashes, so responses never change."""
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{photo_id}"'}
+    if is_photo_id(photo_id) and etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return not_modified(headers["ETag"], headers)
+    data = get_photo_store().get(photo_id) if is_photo_id(photo_id) else None
+    if data is None:
+        raise HTTPException(status_code=404, detail="Photo not found.")
+    return Response(
+        content=data,
+        media_type=sniff_image(data) or "application/octet-stream",
+        headers=headers,
+    )
+
+
+@app.post("/generate-form-simple")
+async def generate_form_simple(request: Request) -> Response:
+    """Generate a resume PDF from the provided payload.
+
+    Body: either JSON (``GeneratePayload``) or ``multipart/form-data`` with a
+    ``payload`` JSON part and a raw ``photo`` part; the photo is stored like
+    ``POST /photos`` and its id returned in ``X-Photo-Id`` for later renders.
+
+    The response carries per-stage timings in ``Server-Timing``, the page
+    count in ``X-Render-Pages`` and a strong ``ETag`` (the result-cache key);
+    a request sending that ETag back in ``If-None-Match`` gets ``304 Not
+    Modified`` before any cache lookup or render.
+    """
+    response: Optional[Response] = None
+    with timing.collect() as timer:
+        photo: Optional[bytes] = None
+        try:
+            with timing.stage("validate"):
+                if (request.headers.get("content-type") or "").startswith("multipart/form-data"):
+                    payload, photo = await _read_multipart(request)
+                else:
+                    payload = await request.json()
+                args = GeneratePayload.model_validate(payload)
+                if photo is not None:
+                    args.photo_id, _ = await _store_photo(photo)
+        except ValidationError as ve:
+            raise HTTPException(status_code=422, detail=json.loads(ve.json()))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {exc}")
+
+        with timing.stage("layout"):
+            layout_inline, deps = _resolve_layout(args)
+        _metric_labels(request, args)
+        data, cache_key = _prepare_render(args, args.profile or {}, layout_inline, deps)
+        etag = key_etag(cache_key)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            response = not_modified(etag, {"Cache-Control": "no-cache"})
+        else:
+            pdf_bytes, cache_status = await _render_prepared(data, cache_key)
+    if response is None:
+        response = _pdf_response(pdf_bytes, etag=etag, cache_status=cache_status, timer=timer)
+    if photo is not None:
+        response.headers["X-Photo-Id"] = args.photo_id
+    return response
+
+
+def _resolve_layout(args: GeneratePayload) -> Tuple[Dict[str, Any], list]:
+    """Layout to render with (prefer inline, else by name) and its source files."""
     layout_inline = args.layout_inline
+    deps = [THEMES_DIR / f"{args.effective_theme_name()}.theme.json"]
     if not layout_inline and isinstance(args.layout_name, str) and args.layout_name.strip():
         layout_inline = _safe_read_layout_by_name(args.layout_name.strip())
+        deps.append((LAYOUTS_DIR / args.layout_name.strip()).resolve())
 
     if not layout_inline:
         layout_inline = {"flow": []}
+    return layout_inline, deps
 
-    # Derive overrides from profile & merge (fill-only-missing semantics)
-    ov_from_profile = profile_to_overrides(data["profile"])
-    layout_inline.setdefault("overrides", {})
-    layout_inline["overrides"] = _deep_merge_fill_missing(layout_inline["overrides"], ov_from_profile)
 
-    # Decode headshots (photo_b64 -> photo_bytes)
-    _decode_headshots(layout_inline)
+async def _render_profile(
+    args: GeneratePayload,
+    profile: Dict[str, Any],
+    layout_inline: Dict[str, Any],
+    deps: list,
+) -> Tuple[bytes, str]:
+    """Render one profile with the builder engine (result cache first).
+
+    ``layout_inline`` is updated in place (overrides, decoded photos).
+
+    Returns:
+        Tuple[bytes, str]: The PDF and its cache status (``HIT``/``MISS``).
 
-    # Coerce summary if it's a stringified list
-    if isinstance(data["profile"], dict):
-        coerce_summary(data["profile"])
+    Raises:
+        HTTPException: 503 when the render queue is full, 500 on build errors.
+    """
+    data, cache_key = _prepare_render(args, profile, layout_inline, deps)
+    return await _render_prepared(data, cache_key)
+
+
+def _prepare_render(
+    args: GeneratePayload,
+    profile: Dict[str, Any],
+    layout_inline: Dict[str, Any],
+    deps: list,
+) -> Tuple[Dict[str, Any], CacheKey]:
+    """Builder input of one render and its result-cache key (also its ETag).
+
+    ``layout_inline`` gets the profile's overrides merged in place.
+    """
+    # Build data for builder
+    data: Dict[str, Any] = {
+        "theme_name": args.effective_theme_name(),
+        "ui_lang": args.ui_lang,
+        "rtl_mode": bool(args.rtl_mode),
+        "profile": profile,
+    }
 
-    # Attach layout to data
+    # Derive overrides from profile & merge (fill-only-missing semantics)
+    with timing.stage("overrides"):
+        ov_from_profile = profile_to_overrides(data["profile"])
+        layout_inline.setdefault("overrides", {})
+        layout_inline["overrides"] = _deep_merge_fill_missing(layout_inline["overrides"], ov_from_profile)
+        # A saved profile references its photo by id (see api.blob_store).
+        pid = args.photo_id or (profile.get("photo_id") if is_photo_id(profile.get("photo_id")) else None)
+        if pid:
+            # The id (a content hash) stands in for the photo in the cache key.
+            avatar = layout_inline["overrides"].setdefault("avatar_circle", {})
+            avatar["data"] = {**(avatar.get("data") or {}), "photo_id": pid}
+
+    # Keyed before photo decoding: the photo id stands in for the bytes.
+    with timing.stage("cache"):
+        cache_key = get_result_cache().make_key(
+            engine="builder",
+            theme_name=data["theme_name"],
+            layout_inline=layout_inline,
+            profile=data["profile"],
+            ui_lang=data["ui_lang"],
+            rtl_mode=data["rtl_mode"],
+            deps=deps,
+        )
     data["layout_inline"] = layout_inline
+    return data, cache_key
+
+
+async def _render_prepared(data: Dict[str, Any], cache_key: CacheKey) -> Tuple[bytes, str]:
+    """The PDF of a prepared render: from the result cache, else rendered and cached."""
+    cache = get_result_cache()
+    with timing.stage("cache"):
+        pdf_bytes = await cache.aget(cache_key)
+    if pdf_bytes is not None:
+        return pdf_bytes, "HIT"
+    layout_inline = data["layout_inline"]
+
+    with timing.stage("decode"):
+        # Decode headshots (photo_id / photo_b64 -> photo_bytes)
+        _decode_headshots(layout_inline)
+
+        # Coerce summary if it's a stringified list
+        if isinstance(data["profile"], dict):
+            coerce_summary(data["profile"])
 
     # Basic request log
     flow = layout_inline.get("flow", [])
     blocks_count = sum(len(x.get("blocks", [])) for x in flow) if isinstance(flow, list) else 0
     log.info("PDF request: theme=%s blocks=%s", data["theme_name"], blocks_count)
 
-    # Build PDF
+    # Build PDF (off the event loop, on the render pool). Stages timed in the
+    # worker are merged here; the rest of the wall time is queueing and IPC.
+    t0 = time.perf_counter()
     try:
-        pdf_bytes = build_resume_pdf(data=data)
+        pdf_bytes, stages = await get_render_executor().run(render_pdf_timed, data, engine="builder")
+    except RenderQueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
     except Exception as exc:
         log.exception("PDF build failed")
         raise HTTPException(status_code=500, detail=f"PDF build failed: {exc}")
+    wall_ms = (time.perf_counter() - t0) * 1000
+    timing.record({"queue": max(0.0, wall_ms - sum(stages.values())), **stages})
+    metrics.record_pdf(pdf_bytes, engine="builder")
 
-    # Name the download nicely
+    await cache.aput(cache_key, pdf_bytes)
+    return pdf_bytes, "MISS"
+
+
+# ─────────────────────────────────────────────────────────────
+# Batch
+# ─────────────────────────────────────────────────────────────
+def _batch_item(raw: Any) -> Tuple[Dict[str, Any], Any]:
+    """Split a batch entry into (profile, label for the file name)."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected a JSON object, got {type(raw).__name__}")
+    if isinstance(raw.get("profile"), dict):
+        profile, label = raw["profile"], raw.get("id")
+    else:
+        profile, label = raw, None
+    header = profile.get("header") if isinstance(profile.get("header"), dict) else {}
+    return profile, label or header.get("name") or profile.get("name")
+
+
+async def _batch_items(items: List[Tuple[Any, Optional[str]]]) -> AsyncIterator[Tuple[Any, Optional[str]]]:
+    for item in items:
+        yield item
+
+
+async def _read_ndjson(request: Request, limit: int) -> List[Tuple[Any, Optional[str]]]:
+    """Parse one profile per line while the body streams in.
+
+    The body is consumed before the response starts: once a streaming
+    response is running, Starlette reads ``receive`` itself to watch for
+    client disconnects. Each chunk is split once and only the unfinished
+    line is carried over, so a line longer than ``batch.max_line_bytes()``
+    or a body larger than ``batch.max_body_bytes()`` is rejected early.
+
+    Raises:
+        HTTPException: 413 if a line or the body is too large.
+    """
+    max_line, max_body = batch.max_line_bytes(), batch.max_body_bytes()
+    items: List[Tuple[Any, Optional[str]]] = []
+    buf = bytearray()
+    total = 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if total > max_body:
+            raise HTTPException(status_code=413, detail=f"Request body too large (max {max_body} bytes).")
+        first, *rest = chunk.split(b"\n")
+        buf += first
+        for part in rest:
+            _check_line(buf, max_line)
+            if buf.strip():
+                items.append(_parse_ndjson_line(bytes(buf)))
+            buf = bytearray(part)
+        _check_line(buf, max_line)
+        if len(items) > limit:
+            break
+    if buf.strip() and len(items) <= limit:
+        items.append(_parse_ndjson_line(bytes(buf)))
+    return items
+
+
+def _check_line(line: bytearray, max_line: int) -> None:
+    if len(line) > max_line:
+        raise HTTPException(status_code=413, detail=f"NDJSON line too long (max {max_line} bytes).")
+
+
+def _parse_ndjson_line(line: bytes) -> Tuple[Any, Optional[str]]:
+    try:
+        return json.loads(line), None
+    except ValueError as exc:
+        return None, f"invalid JSON line: {exc}"
+
+
+async def _batch_jobs(
+    args: GeneratePayload,
+    items: AsyncIterator[Tuple[Any, Optional[str]]],
+    layout: Dict[str, Any],
+    deps: list,
+    meta: Dict[str, Any],
+) -> AsyncIterator[batch.BatchJob]:
+    limit = batch.max_items()
+    index = 0
+    async for raw, error in items:
+        if index >= limit:
+            meta["truncated"] = True
+            break
+        index += 1
+        if error:
+            yield index, "", None, error
+            continue
+        try:
+            profile, label = _batch_item(raw)
+        except ValueError as exc:
+            yield index, "", None, str(exc)
+            continue
+        # Each item merges its own overrides into a private copy of the layout.
+        render = functools.partial(_render_profile, args, profile, thaw(layout), deps)
+        yield index, batch.member_name(index, label), render, None
+
+
+@app.post("/generate-batch")
+async def generate_batch(request: Request) -> StreamingResponse:
+    """Render many profiles with one theme/layout; stream a ZIP of PDFs.
+
+    Body: either JSON (``GeneratePayload`` fields + ``profiles: [...]``) or
+    NDJSON (``application/x-ndjson``, one profile per line) with the shared
+    options as query parameters. Per-item failures are listed in the
+    archive's ``manifest.json``.
+
+    The whole NDJSON body is read and parsed before the first render (the
+    ZIP output is streamed, the input is not), so it is capped: a line over
+    ``BATCH_MAX_LINE_MB`` or a body over ``BATCH_MAX_BODY_MB`` gets ``413``.
+    """
+    ndjson = "ndjson" in (request.headers.get("content-type") or "")
+    try:
+        if ndjson:
+            args = BatchPayload.model_validate(dict(request.query_params))
+        else:
+            args = BatchPayload.model_validate(await request.json())
+    except ValidationError as ve:
+        raise HTTPException(status_code=422, detail=json.loads(ve.json()))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {exc}")
+
+    limit = batch.max_items()
+    if not ndjson and len(args.profiles) > limit:
+        raise HTTPException(status_code=413, detail=f"Too many profiles (max {limit}).")
+
+    # Theme and layout are resolved once for the whole batch.
+    layout, deps = _resolve_layout(args)
+    _metric_labels(request, args)
+    if ndjson:
+        items = await _read_ndjson(request, limit)
+    else:
+        items = [(raw, None) for raw in args.profiles]
+    meta: Dict[str, Any] = {
+        "theme_name": args.effective_theme_name(),
+        "layout_name": args.layout_name,
+    }
+    body = batch.stream_zip(
+        _batch_jobs(args, _batch_items(items), layout, deps, meta),
+        window=get_render_executor().slots,
+        meta=meta,
+    )
     headers = {
-        "Content-Disposition": 'inline; filename="resume.pdf"',
+        "Content-Disposition": 'attachment; filename="resumes.zip"',
         "Cache-Control": "no-store",
     }
+    return StreamingResponse(body, media_type="application/zip", headers=headers)
+
+
+# ─────────────────────────────────────────────────────────────
+# Jobs
+# ─────────────────────────────────────────────────────────────
+def _job_args(payload: Dict[str, Any]) -> Tuple[str, GeneratePayload]:
+    """Job kind (``batch`` if the payload has ``profiles``) and its options."""
+    if "profiles" in payload:
+        return "batch", BatchPayload.model_validate(payload)
+    return "single", GeneratePayload.model_validate(payload)
+
+
+async def _run_job(payload: Dict[str, Any]) -> Tuple[bytes, str, str]:
+    """Job runner: same pipeline as the synchronous routes."""
+    kind, args = _job_args(payload)
+    layout, deps = _resolve_layout(args)
+    if kind == "batch":
+        meta: Dict[str, Any] = {
+            "theme_name": args.effective_theme_name(),
+            "layout_name": args.layout_name,
+        }
+        items = [(raw, None) for raw in args.profiles]
+        body = batch.stream_zip(
+            _batch_jobs(args, _batch_items(items), layout, deps, meta),
+            window=get_render_executor().slots,
+            meta=meta,
+        )
+        return b"".join([chunk async for chunk in body]), "application/zip", ".zip"
+    pdf_bytes, _ = await _render_profile(args, args.profile or {}, layout, deps)
+    return pdf_bytes, "application/pdf", ".pdf"
+
+
+def _job_view(job: Job) -> Dict[str, Any]:
+    view = job.to_dict()
+    view["status_url"] = f"/jobs/{job.id}"
+    if job.status == DONE:
+        view["result_url"] = f"/jobs/{job.id}/result"
+    return view
+
+
+def _get_job_or_404(job_id: str) -> Job:
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue a render; the payload is that of /generate-form-simple or /generate-batch."""
+    try:
+        kind, args = _job_args(payload)
+    except ValidationError as ve:
+        raise HTTPException(status_code=422, detail=json.loads(ve.json()))
+    if kind == "batch" and len(args.profiles) > batch.max_items():
+        raise HTTPException(status_code=413, detail=f"Too many profiles (max {batch.max_items()}).")
+    _resolve_layout(args)  # unknown layout names fail now, not in the queue
+    return _job_view(get_job_queue().submit(kind, payload))
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str) -> Dict[str, Any]:
+    return _job_view(_get_job_or_404(job_id))
+
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str) -> FileResponse:
+    job = _get_job_or_404(job_id)
+    path = get_job_queue().store.result_path(job) if job.status == DONE else None
+    if path is None or not path.is_file():
+        raise HTTPException(
+            status_code=409,
+            detail={"status": job.status, "error": job.error, "message": "Result not available."},
+        )
+    return FileResponse(
+        path,
+        media_type=job.media_type,
+        filename=f"resume-{job.id}{path.suffix}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str) -> Dict[str, Any]:
+    job = _get_job_or_404(job_id)
+    if job.status in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}.")
+    return _job_view(get_job_queue().cancel(job_id))
+
+
+def _pdf_response(
+    pdf_bytes: bytes,
+    *,
+    etag: str,
+    cache_status: str,
+    timer: Optional[timing.StageTimer] = None,
+) -> Response:
+    # Clients may keep the PDF but must revalidate it (If-None-Match -> 304).
+    headers = {"Cache-Control": "no-cache", "ETag": etag, "X-Cache": cache_status}
+    if timer is not None:
+        headers["Server-Timing"] = timer.server_timing()
+    # Name the download nicely
+    headers["Content-Disposition"] = 'inline; filename="resume.pdf"'
+    pages = timing.count_pages(pdf_bytes)
+    if pages is not None:
+        headers["X-Render-Pages"] = str(pages)
     return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
@@ -1,5 +1,10 @@
 ﻿from . import blocks  # Important: side-effect import to register all blocks
+from . import fonts  # noqa: F401  (installs the lazy font lookup hook)
 from .resume import build_resume_pdf
 
-__all__ = ["build_resume_pdf"]
+# Bump whenever rendering output changes for identical inputs
+# (invalidates cached PDFs, see api.result_cache).
+ENGINE_VERSION = "1.4.0"
+
+__all__ = ["build_resume_pdf", "ENGINE_VERSION"]
 
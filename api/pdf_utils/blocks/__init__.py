@@ -17,5 +17,6 @@ from . import (
     decor_curve,
     header_bar,
     links_inline,
+    skills_grid,
 )  # noqa: F401
 
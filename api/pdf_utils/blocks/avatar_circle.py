@@ -1,14 +1,19 @@
 ﻿from __future__ import annotations
-from io import BytesIO
 from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-from ..config import LEFT_BORDER, CARD_PAD
-from .base import Frame, RenderContext
+from ..image_cache import image_reader
+from .base import Frame, RenderContext, style_from_ctx
 from .registry import register
 
 class AvatarCircleBlock:
     BLOCK_ID = "avatar_circle"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        # Same geometry as render(), without decoding the photo.
+        if not data.get("photo_bytes"):
+            return 0.0
+        d = min(frame.w, float(data.get("max_d_mm", 42)) * mm)
+        return d + 6 * mm
+
     def render(self, c, frame: Frame, data: dict, ctx: RenderContext) -> float:
         # data: { "photo_bytes": bytes, "max_d_mm"?: float (ط§ظپطھط±ط§ط¶ظٹ 42) }
         photo_bytes = data.get("photo_bytes")
@@ -24,14 +29,14 @@ class AvatarCircleBlock:
         iy = cy - r
 
         try:
-            img = ImageReader(BytesIO(photo_bytes))
+            img = image_reader(photo_bytes)
             c.saveState()
             p = c.beginPath()
             p.circle(cx, cy, r)
             c.clipPath(p, stroke=0, fill=0)
             c.drawImage(img, ix, iy, width=d, height=d, preserveAspectRatio=True, mask="auto")
             c.restoreState()
-            c.setStrokeColor(LEFT_BORDER)
+            c.setStrokeColor(style_from_ctx(ctx).LEFT_BORDER)
             c.setLineWidth(1)
             c.circle(cx, cy, r)
             new_y = iy - 6 * mm
@@ -1,6 +1,11 @@
 ﻿from __future__ import annotations
 from dataclasses import dataclass
-from typing import Protocol, TypedDict, Any
+from io import BytesIO
+from typing import Protocol, TypedDict, Any, Tuple
+
+from reportlab.pdfgen.canvas import Canvas
+
+from ..stylesheet import StyleSheet, style_from_ctx
 
 @dataclass
 class Frame:
@@ -11,6 +16,7 @@ class Frame:
 class RenderContext(TypedDict, total=False):
     rtl_mode: bool
     ui_lang: str
+    style: StyleSheet
 
 class Block(Protocol):
     BLOCK_ID: str
@@ -18,3 +24,57 @@ class Block(Protocol):
         """ط§ط±ط³ظ… ط¯ط§ط®ظ„ ط§ظ„ط¥ط·ط§ط± ط§ظ„ظ…ظڈط¹ط·ظ‰ ظˆط£ط¹ط¯ y ط§ظ„ط¬ط¯ظٹط¯ط© ط¨ط¹ط¯ ط§ظ„ط±ط³ظ…."""
         ...
 
+    # Optional:
+    # def measure(self, frame: Frame, data: dict[str, Any], ctx: RenderContext) -> float:
+    #     """Height (points) ``render`` would use in ``frame``, without drawing."""
+    #
+    # def render_split(self, c, frame: Frame, data: dict[str, Any], ctx: RenderContext,
+    #                  bottom: float, token: Any = None) -> tuple[float, Any]:
+    #     """Draw what fits above ``bottom``, starting at ``token`` (None: the
+    #     beginning). Return (new y, token to continue from, or None when done).
+    #     At the top of a page (``at_page_top``) draw at least one unit."""
+
+
+def at_page_top(frame: Frame, ctx: RenderContext) -> bool:
+    """True when ``frame`` starts at the top margin (nothing above it on the page)."""
+    return frame.y >= ctx.get("page_top_y", frame.y)
+
+
+class ScratchCanvas(Canvas):
+    """Throwaway canvas for measuring: images, links and outlines are skipped."""
+
+    def __init__(self, pagesize: Tuple[float, float]) -> None:
+        super().__init__(BytesIO(), pagesize=pagesize)
+
+    def drawImage(self, image, x, y, width=None, height=None, *args, **kwargs):
+        return (width, height)
+
+    def drawInlineImage(self, image, x, y, width=None, height=None, *args, **kwargs):
+        return (width, height)
+
+    def linkURL(self, *args, **kwargs) -> None:
+        pass
+
+    def linkAbsolute(self, *args, **kwargs) -> None:
+        pass
+
+    def linkRect(self, *args, **kwargs) -> None:
+        pass
+
+    def bookmarkPage(self, *args, **kwargs) -> None:
+        pass
+
+    def addOutlineEntry(self, *args, **kwargs) -> None:
+        pass
+
+
+def measure_block(block: Block, frame: Frame, data: dict[str, Any], ctx: RenderContext,
+                  pagesize: Tuple[float, float]) -> float:
+    """
+    Height ``block`` needs in ``frame``: its own ``measure`` when it has one,
+    otherwise the y it reaches when rendered into a ``ScratchCanvas``.
+    """
+    measure = getattr(block, "measure", None)
+    if measure is not None:
+        return float(measure(frame, data, ctx))
+    return frame.y - block.render(ScratchCanvas(pagesize), frame, data, ctx)
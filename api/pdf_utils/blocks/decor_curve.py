@@ -21,6 +21,10 @@ class DecorCurveBlock:
 
     BLOCK_ID = "decor_curve"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        """Height used by ``render``: the curve plus a 2 mm gap."""
+        return float(data.get("height_mm", 15)) * mm + 2 * mm
+
     def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
         """
         Render a decorative curved rectangle.
@@ -1,53 +1,102 @@
 ﻿from __future__ import annotations
 from reportlab.pdfbase import pdfmetrics
 from reportlab.lib import colors
-from ..config import *
 from ..labels import t
-from ..icons import get_section_icon, draw_heading_with_icon
-from ..text import draw_par
-from .base import Frame, RenderContext
+from ..icons import get_section_icon, draw_heading_with_icon, heading_height
+from ..text import draw_par, paragraph_height
+from .base import Frame, RenderContext, at_page_top, style_from_ctx
 from .registry import register
 
 class EducationBlock:
     BLOCK_ID = "education"
 
-    def render(self, c, frame: Frame, data: dict, ctx: RenderContext) -> float:
+    @staticmethod
+    def _entries(data: dict) -> list:
+        """Non-empty entries, each as its list of non-empty lines."""
         items = [str(b).strip() for b in (data.get("items") or []) if str(b).strip()]
-        if not items: return frame.y
-
-        title = (data.get("title") or t("professional_training", ctx.get("ui_lang") or UI_LANG))
-        y = draw_heading_with_icon(
-            c=c, x=frame.x, y=frame.y, title=title, icon=get_section_icon("professional_training"),
-            font="Helvetica-Bold", size=HEADING_SIZE, color=HEADING_COLOR,
-            underline_w=frame.w, rule_color=RIGHT_SEC_RULE_COLOR, rule_width=RIGHT_SEC_RULE_WIDTH,
-            gap_below=GAP_AFTER_HEADING / 2,
-        )
-        y -= RIGHT_SEC_RULE_TO_TEXT_GAP
-
-        for block in items:
-            parts = [ln.strip() for ln in block.splitlines() if ln.strip()]
-            if not parts: continue
-
-            c.setFont("Helvetica-Bold", TEXT_SIZE); c.setFillColor(EDU_TITLE_COLOR)
-            c.drawString(frame.x, y, parts[0])
-            y -= EDU_BLOCK_TITLE_GAP_BELOW
-
-            for ln in parts[1:]:
-                if ln.startswith(("http://", "https://")):
-                    font_name = "Helvetica-Oblique"
-                    c.setFont(font_name, PROJECT_LINK_TEXT_SIZE); c.setFillColor(HEADING_COLOR)
-                    c.drawString(frame.x, y, ln)
-                    tw  = pdfmetrics.stringWidth(ln, font_name, PROJECT_LINK_TEXT_SIZE)
-                    asc = pdfmetrics.getAscent(font_name)/1000.0*PROJECT_LINK_TEXT_SIZE
-                    dsc = abs(pdfmetrics.getDescent(font_name))/1000.0*PROJECT_LINK_TEXT_SIZE
-                    c.linkURL(ln, (frame.x, y - dsc, frame.x + tw, y + asc*0.2), relative=0, thickness=0)
-                    y -= EDU_TEXT_LEADING
-                else:
-                    c.setFont("Helvetica", RIGHT_SEC_TEXT_SIZE); c.setFillColor(colors.black)
-                    y = draw_par(c, frame.x, y, [ln], "Helvetica", RIGHT_SEC_TEXT_SIZE,
-                                 frame.w, "left", False, EDU_TEXT_LEADING)
-            y -= RIGHT_SEC_SECTION_GAP
-        return y
+        entries = ([ln.strip() for ln in b.splitlines() if ln.strip()] for b in items)
+        return [parts for parts in entries if parts]
+
+    @staticmethod
+    def _heading_height(frame: Frame, st) -> float:
+        return heading_height(st.HEADING_SIZE, underline_w=frame.w,
+                              gap_below=st.GAP_AFTER_HEADING / 2) + st.RIGHT_SEC_RULE_TO_TEXT_GAP
+
+    @staticmethod
+    def _entry_height(frame: Frame, parts: list, st) -> float:
+        h = st.EDU_BLOCK_TITLE_GAP_BELOW + st.RIGHT_SEC_SECTION_GAP
+        for ln in parts[1:]:
+            if ln.startswith(("http://", "https://")):
+                h += st.EDU_TEXT_LEADING
+            else:
+                h += paragraph_height(ln, frame.w, st.EDU_TEXT_LEADING, "Helvetica", st.RIGHT_SEC_TEXT_SIZE)
+        return h
+
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        st = style_from_ctx(ctx)
+        entries = self._entries(data)
+        if not entries: return 0.0
+        return self._heading_height(frame, st) + sum(self._entry_height(frame, p, st) for p in entries)
+
+    def render(self, c, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        return self.render_split(c, frame, data, ctx, float("-inf"))[0]
+
+    def render_split(self, c, frame: Frame, data: dict, ctx: RenderContext, bottom: float, token=None):
+        """Draw whole entries while they fit above ``bottom``.
+
+        ``token`` is the index of the next entry (None/-1: heading first, kept
+        with the first entry). Returns (new y, next token or None when done).
+        """
+        st = style_from_ctx(ctx)
+        entries = self._entries(data)
+        if not entries: return frame.y, None
+        y = frame.y
+        force = at_page_top(frame, ctx)
+        start = -1 if token is None else token
+
+        if start < 0:
+            need = self._heading_height(frame, st) + self._entry_height(frame, entries[0], st)
+            if y - need < bottom and not force:
+                return y, -1
+            title = (data.get("title") or t("professional_training", ctx.get("ui_lang") or st.UI_LANG))
+            y = draw_heading_with_icon(
+                c=c, x=frame.x, y=y, title=title, icon=get_section_icon("professional_training"),
+                font="Helvetica-Bold", size=st.HEADING_SIZE, color=st.HEADING_COLOR,
+                underline_w=frame.w, rule_color=st.RIGHT_SEC_RULE_COLOR, rule_width=st.RIGHT_SEC_RULE_WIDTH,
+                gap_below=st.GAP_AFTER_HEADING / 2,
+            )
+            y -= st.RIGHT_SEC_RULE_TO_TEXT_GAP
+            start = 0
+
+        for i in range(start, len(entries)):
+            parts = entries[i]
+            if y - self._entry_height(frame, parts, st) < bottom and not force:
+                return y, i
+            force = False
+            y = self._draw_entry(c, frame, y, parts, st)
+        return y, None
+
+    @staticmethod
+    def _draw_entry(c, frame: Frame, y: float, parts: list, st) -> float:
+        c.setFont("Helvetica-Bold", st.TEXT_SIZE); c.setFillColor(st.EDU_TITLE_COLOR)
+        c.drawString(frame.x, y, parts[0])
+        y -= st.EDU_BLOCK_TITLE_GAP_BELOW
+
+        for ln in parts[1:]:
+            if ln.startswith(("http://", "https://")):
+                font_name = "Helvetica-Oblique"
+                c.setFont(font_name, st.PROJECT_LINK_TEXT_SIZE); c.setFillColor(st.HEADING_COLOR)
+                c.drawString(frame.x, y, ln)
+                tw  = pdfmetrics.stringWidth(ln, font_name, st.PROJECT_LINK_TEXT_SIZE)
+                asc = pdfmetrics.getAscent(font_name)/1000.0*st.PROJECT_LINK_TEXT_SIZE
+                dsc = abs(pdfmetrics.getDescent(font_name))/1000.0*st.PROJECT_LINK_TEXT_SIZE
+                c.linkURL(ln, (frame.x, y - dsc, frame.x + tw, y + asc*0.2), relative=0, thickness=0)
+                y -= st.EDU_TEXT_LEADING
+            else:
+                c.setFont("Helvetica", st.RIGHT_SEC_TEXT_SIZE); c.setFillColor(colors.black)
+                y = draw_par(c, frame.x, y, frame.w, ln, st.EDU_TEXT_LEADING,
+                             "Helvetica", st.RIGHT_SEC_TEXT_SIZE)
+        return y - st.RIGHT_SEC_SECTION_GAP
 
 register(EducationBlock())
 
@@ -24,6 +24,10 @@ class HeaderBarBlock:
 
     BLOCK_ID = "header_bar"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        """Height used by ``render``: the 12 mm bar plus its padding."""
+        return 12 * mm + float(data.get("pad_mm", 4)) * mm
+
     def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
         """
         Render the header bar with centered text.
@@ -1,6 +1,5 @@
 ﻿from reportlab.pdfgen.canvas import Canvas
-from ..config import HEADING_COLOR
-from .base import Frame, RenderContext
+from .base import Frame, RenderContext, style_from_ctx
 from .registry import register
 
 
@@ -13,6 +12,12 @@ class HeaderNameBlock:
     """
     BLOCK_ID = "header_name"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        """Height used by ``render`` (20pt for the name, 15pt for the title)."""
+        name = (data.get("name") or "").strip()
+        title = (data.get("title") or "").strip()
+        return (20 if name else 0) + (15 if title else 0)
+
     def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
         """
         Render the name and title in the provided PDF canvas.
@@ -21,13 +26,14 @@ class HeaderNameBlock:
             c (Canvas): The ReportLab canvas to draw on.
             frame (Frame): The layout frame with position data.
             data (dict): Dictionary containing "name" and "title" keys.
-            ctx (RenderContext): Context for rendering (unused in this method).
+            ctx (RenderContext): Context for rendering (provides the style sheet).
 
         Returns:
             float: The updated y-coordinate after rendering the content.
         """
         name = (data.get("name") or "").strip()
         title = (data.get("title") or "").strip()
+        st = style_from_ctx(ctx)
         y = frame.y
 
         if name:
@@ -37,7 +43,7 @@ class HeaderNameBlock:
 
         if title:
             c.setFont("Helvetica", 12)
-            c.setFillColor(HEADING_COLOR)
+            c.setFillColor(st.HEADING_COLOR)
             c.drawString(frame.x, y, title)
             y -= 15
 
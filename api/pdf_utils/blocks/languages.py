@@ -1,41 +1,46 @@
 ﻿from __future__ import annotations
 from reportlab.lib import colors
-from ..config import (
-    LEFT_SEC_TITLE_TOP_GAP, LEFT_SEC_HEADING_SIZE, HEADING_COLOR,
-    LEFT_SEC_RULE_COLOR, LEFT_SEC_RULE_WIDTH, LEFT_SEC_TITLE_BOTTOM_GAP,
-    LEFT_SEC_RULE_TO_LIST_GAP, LEFT_SEC_TEXT_SIZE, LEFT_SEC_TEXT_X_OFFSET,
-    LEFT_SEC_BULLET_X_OFFSET, LEFT_SEC_BULLET_RADIUS, LEFT_SEC_LINE_GAP,
-)
 from ..labels import t
-from ..config import UI_LANG
-from ..icons import get_section_icon, draw_heading_with_icon
+from ..icons import get_section_icon, draw_heading_with_icon, heading_height
 from ..text import wrap_text
-from .base import Frame, RenderContext
+from .base import Frame, RenderContext, style_from_ctx
 from .registry import register
 
 class LanguagesBlock:
     BLOCK_ID = "languages"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        st = style_from_ctx(ctx)
+        langs = [str(s).strip() for s in (data.get("languages") or data.get("items") or []) if str(s).strip()]
+        if not langs: return 0.0
+        h = st.LEFT_SEC_TITLE_TOP_GAP + st.LEFT_SEC_RULE_TO_LIST_GAP + heading_height(
+            st.LEFT_SEC_HEADING_SIZE, underline_w=frame.w, gap_below=st.LEFT_SEC_TITLE_BOTTOM_GAP / 2)
+        max_w = frame.w - (st.LEFT_SEC_TEXT_X_OFFSET + 2)
+        for s in langs:
+            h += len(wrap_text(None, s, max_w, "Helvetica", st.LEFT_SEC_TEXT_SIZE)) * st.LEFT_SEC_LINE_GAP
+        return h
+
     def render(self, c, frame: Frame, data: dict, ctx: RenderContext) -> float:
-        title = (data.get("title") or t("languages", ctx.get("ui_lang") or UI_LANG))
-        langs = [str(s).strip() for s in (data.get("languages") or []) if str(s).strip()]
+        st = style_from_ctx(ctx)
+        title = (data.get("title") or t("languages", ctx.get("ui_lang") or st.UI_LANG))
+        langs = [str(s).strip() for s in (data.get("languages") or data.get("items") or []) if str(s).strip()]
         if not langs: return frame.y
-        y = frame.y - LEFT_SEC_TITLE_TOP_GAP
+        y = frame.y - st.LEFT_SEC_TITLE_TOP_GAP
         y = draw_heading_with_icon(
             c=c, x=frame.x, y=y, title=title, icon=get_section_icon("languages"),
-            font="Helvetica-Bold", size=LEFT_SEC_HEADING_SIZE, color=HEADING_COLOR,
-            underline_w=frame.w, rule_color=LEFT_SEC_RULE_COLOR, rule_width=LEFT_SEC_RULE_WIDTH,
-            gap_below=LEFT_SEC_TITLE_BOTTOM_GAP / 2,
+            font="Helvetica-Bold", size=st.LEFT_SEC_HEADING_SIZE, color=st.HEADING_COLOR,
+            underline_w=frame.w, rule_color=st.LEFT_SEC_RULE_COLOR, rule_width=st.LEFT_SEC_RULE_WIDTH,
+            gap_below=st.LEFT_SEC_TITLE_BOTTOM_GAP / 2,
         )
-        y -= LEFT_SEC_RULE_TO_LIST_GAP
-        c.setFont("Helvetica", LEFT_SEC_TEXT_SIZE); c.setFillColor(colors.black)
-        max_w = frame.w - (LEFT_SEC_TEXT_X_OFFSET + 2)
+        y -= st.LEFT_SEC_RULE_TO_LIST_GAP
+        c.setFont("Helvetica", st.LEFT_SEC_TEXT_SIZE); c.setFillColor(colors.black)
+        max_w = frame.w - (st.LEFT_SEC_TEXT_X_OFFSET + 2)
         for lang in langs:
-            for i, ln in enumerate(wrap_text(lang, "Helvetica", LEFT_SEC_TEXT_SIZE, max_w)):
+            for i, ln in enumerate(wrap_text(c, lang, max_w, "Helvetica", st.LEFT_SEC_TEXT_SIZE)):
                 if i == 0:
-                    c.circle(frame.x + LEFT_SEC_BULLET_X_OFFSET, y + 3, LEFT_SEC_BULLET_RADIUS, stroke=1, fill=1)
-                c.drawString(frame.x + LEFT_SEC_TEXT_X_OFFSET, y, ln)
-                y -= LEFT_SEC_LINE_GAP
+                    c.circle(frame.x + st.LEFT_SEC_BULLET_X_OFFSET, y + 3, st.LEFT_SEC_BULLET_RADIUS, stroke=1, fill=1)
+                c.drawString(frame.x + st.LEFT_SEC_TEXT_X_OFFSET, y, ln)
+                y -= st.LEFT_SEC_LINE_GAP
         return y
 
 register(LanguagesBlock())
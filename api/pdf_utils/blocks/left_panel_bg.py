@@ -4,9 +4,8 @@ from reportlab.lib import colors
 from reportlab.lib.units import mm
 from reportlab.pdfgen.canvas import Canvas
 
-from .base import Frame, RenderContext
+from .base import Frame, RenderContext, style_from_ctx
 from .registry import register
-from ..config import LEFT_BG, LEFT_BORDER
 
 class LeftPanelBG:
     """
@@ -18,12 +17,17 @@ class LeftPanelBG:
     """
     BLOCK_ID = "left_panel_bg"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        # Background only: render() leaves y unchanged.
+        return 0.0
+
     def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
         # ط§ظ„ط¥ط¹ط¯ط§ط¯ط§طھ
+        st      = style_from_ctx(ctx)
         pad_mm  = float((data or {}).get("pad_mm") or 4.0)
         pad     = pad_mm * mm
-        bg_hex  = (data or {}).get("bg") or LEFT_BG or "#F7F8FA"
-        br_hex  = (data or {}).get("border") or LEFT_BORDER  # ظ‚ط¯ ظٹظƒظˆظ† None
+        bg_hex  = (data or {}).get("bg") or st.LEFT_BG or "#F7F8FA"
+        br_hex  = (data or {}).get("border") or st.LEFT_BORDER  # ظ‚ط¯ ظٹظƒظˆظ† None
 
         # ط£ط¨ط¹ط§ط¯ ط§ظ„ط±ط³ظ…
         x      = frame.x
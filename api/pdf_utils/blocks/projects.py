@@ -1,5 +1,5 @@
 ﻿from reportlab.pdfgen.canvas import Canvas
-from .base import Frame, RenderContext
+from .base import Frame, RenderContext, at_page_top
 from .registry import register
 
 
@@ -12,6 +12,10 @@ class ProjectsBlock:
     """
     BLOCK_ID = "projects"
 
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        """Height used by ``render``: the heading plus 22pt per project."""
+        return 12 + 22 * len(data.get("items") or [])
+
     def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
         """
         Render a list of projects in the provided PDF canvas.
@@ -25,15 +29,39 @@ class ProjectsBlock:
         Returns:
             float: The updated y-coordinate after rendering the content.
         """
+        return self.render_split(c, frame, data, ctx, float("-inf"))[0]
+
+    def render_split(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext,
+                     bottom: float, token=None):
+        """
+        Render the projects that fit above ``bottom``.
+
+        Args:
+            bottom (float): Lowest y the content may reach.
+            token: Index of the first project to draw; None or -1 starts
+                with the heading, which is kept with the first project.
+
+        Returns:
+            tuple: (new y, index of the next project or None when done).
+        """
         items = data.get("items") or []
         y = frame.y
+        force = at_page_top(frame, ctx)
+        start = -1 if token is None else token
 
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(frame.x, y, "Projects")
-        y -= 12
+        if start < 0:
+            if y - 12 - (22 if items else 0) < bottom and not force:
+                return y, -1
+            c.setFont("Helvetica-Bold", 12)
+            c.drawString(frame.x, y, "Projects")
+            y -= 12
+            start = 0
 
-        for proj in items:
-            title, desc, link = (proj + ["", "", ""])[:3]
+        for i in range(start, len(items)):
+            if y - 22 < bottom and not force:
+                return y, i
+            force = False
+            title, desc, link = (items[i] + ["", "", ""])[:3]
             c.setFont("Helvetica-Bold", 10)
             c.drawString(frame.x, y, title)
             y -= 10
@@ -42,7 +70,7 @@ class ProjectsBlock:
             c.drawString(frame.x, y, desc)
             y -= 12
 
-        return y
+        return y, None
 
 
 # Register the block in the system registry
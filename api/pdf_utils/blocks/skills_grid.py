@@ -3,7 +3,6 @@ from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 
-from ..config import UI_LANG
 from .base import Frame, RenderContext
 from .registry import register
 
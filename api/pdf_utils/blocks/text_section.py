@@ -4,10 +4,9 @@ from reportlab.lib import colors
 from reportlab.pdfgen.canvas import Canvas
 from reportlab.lib.units import mm
 
-from ..config import *
-from ..text import draw_par
-from ..icons import draw_heading_with_icon
-from .base import Frame, RenderContext
+from ..text import paragraph_height, wrap_text
+from ..icons import draw_heading_with_icon, heading_height
+from .base import Frame, RenderContext, at_page_top, style_from_ctx
 from .registry import register
 
 
@@ -25,7 +24,8 @@ class TextSectionBlock:
 
     BLOCK_ID = "text_section"
 
-    def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
+    def _content(self, data: dict):
+        """(title, paragraphs) of the section."""
         section = (data.get("section") or data.get("key") or "summary").strip()
 
         # ًںڈ·ï¸ڈ طھط­ط¯ظٹط¯ ط§ظ„ط¹ظ†ظˆط§ظ† ط§ظ„ط§ظپطھط±ط§ط¶ظٹ ط­ط³ط¨ ظ†ظˆط¹ ط§ظ„ظ‚ط³ظ…
@@ -40,45 +40,86 @@ class TextSectionBlock:
         lines = data.get(section) or data.get("lines") or data.get("text") or []
         if isinstance(lines, str):
             lines = [lines]
+        return title, lines
+
+    def measure(self, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        st = style_from_ctx(ctx)
+        _, lines = self._content(data)
         if not lines:
-            return frame.y
-
-        # ًںژ¨ ط±ط³ظ… ط§ظ„ط¹ظ†ظˆط§ظ† ظ…ط¹ ط®ط· طھط­طھ ط§ظ„ط¹ظ†ظˆط§ظ† (ظ†ظپط³ ظ†ط¸ط§ظ… Projects)
-        y = draw_heading_with_icon(
-            c=c,
-            x=frame.x,
-            y=frame.y,
-            title=title,
-            icon=None,
-            font="Helvetica-Bold",
-            size=RIGHT_SEC_HEADING_SIZE,
-            color=HEADING_COLOR,
-            underline_w=frame.w,
-            rule_color=RIGHT_SEC_RULE_COLOR,
-            rule_width=RIGHT_SEC_RULE_WIDTH,
-            gap_below=GAP_AFTER_HEADING / 2,
-        )
-        y -= RIGHT_SEC_RULE_TO_TEXT_GAP
+            return 0.0
+        h = heading_height(st.RIGHT_SEC_HEADING_SIZE, underline_w=frame.w,
+                           gap_below=st.GAP_AFTER_HEADING / 2)
+        h += st.RIGHT_SEC_RULE_TO_TEXT_GAP
+        for para in lines:
+            h += paragraph_height(para, frame.w, st.BODY_LEADING, "Helvetica", st.RIGHT_SEC_TEXT_SIZE)
+            h += st.RIGHT_SEC_PARA_GAP
+        return h + st.RIGHT_SEC_SECTION_GAP
 
-        # âœچï¸ڈ ط±ط³ظ… ط§ظ„ظ†طµظˆطµ ظپظ‚ط±ط© ظپظ‚ط±ط©
-        c.setFont("Helvetica", RIGHT_SEC_TEXT_SIZE)
+    def render(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext) -> float:
+        return self.render_split(c, frame, data, ctx, float("-inf"))[0]
+
+    def render_split(self, c: Canvas, frame: Frame, data: dict, ctx: RenderContext,
+                     bottom: float, token=None):
+        """
+        Draw the lines that fit above ``bottom``.
+
+        ``token`` is (paragraph, line) to continue from; None or (-1, 0)
+        starts with the heading, which is kept with the first line.
+        Returns (new y, next token or None when done).
+        """
+        st = style_from_ctx(ctx)
+        title, lines = self._content(data)
+        if not lines:
+            return frame.y, None
+
+        size, leading = st.RIGHT_SEC_TEXT_SIZE, st.BODY_LEADING
+        wrapped = [wrap_text(c, str(para), frame.w, "Helvetica", size) if para else [] for para in lines]
+        y = frame.y
+        force = at_page_top(frame, ctx)
+        p0, l0 = (-1, 0) if token is None else token
+
+        if p0 < 0:
+            need = heading_height(st.RIGHT_SEC_HEADING_SIZE, underline_w=frame.w,
+                                  gap_below=st.GAP_AFTER_HEADING / 2)
+            need += st.RIGHT_SEC_RULE_TO_TEXT_GAP + (leading if any(wrapped) else 0)
+            if y - need < bottom and not force:
+                return y, (-1, 0)
+
+            # ًںژ¨ ط±ط³ظ… ط§ظ„ط¹ظ†ظˆط§ظ† ظ…ط¹ ط®ط· طھط­طھ ط§ظ„ط¹ظ†ظˆط§ظ† (ظ†ظپط³ ظ†ط¸ط§ظ… Projects)
+            y = draw_heading_with_icon(
+                c=c,
+                x=frame.x,
+                y=y,
+                title=title,
+                icon=None,
+                font="Helvetica-Bold",
+                size=st.RIGHT_SEC_HEADING_SIZE,
+                color=st.HEADING_COLOR,
+                underline_w=frame.w,
+                rule_color=st.RIGHT_SEC_RULE_COLOR,
+                rule_width=st.RIGHT_SEC_RULE_WIDTH,
+                gap_below=st.GAP_AFTER_HEADING / 2,
+            )
+            y -= st.RIGHT_SEC_RULE_TO_TEXT_GAP
+            c.setFont("Helvetica", size)
+            p0, l0 = 0, 0
         c.setFillColor(colors.black)
-        y = draw_par(
-            c,
-            frame.x,
-            y,
-            lines,
-            "Helvetica",
-            RIGHT_SEC_TEXT_SIZE,
-            frame.w,
-            "left",
-            False,
-            BODY_LEADING,
-            RIGHT_SEC_PARA_GAP,
-        )
-
-        y -= RIGHT_SEC_SECTION_GAP
-        return y
+
+        # âœچï¸ڈ ط±ط³ظ… ط§ظ„ظ†طµظˆطµ ظپظ‚ط±ط© ظپظ‚ط±ط©
+        # line by line, so a page break can fall inside a paragraph
+        for i in range(p0, len(lines)):
+            if wrapped[i]:
+                c.setFont("Helvetica", size)
+                for j in range(l0 if i == p0 else 0, len(wrapped[i])):
+                    if y - leading < bottom and not force:
+                        return y, (i, j)
+                    force = False
+                    c.drawString(frame.x, y, wrapped[i][j])
+                    y -= leading
+            y -= st.RIGHT_SEC_PARA_GAP
+
+        y -= st.RIGHT_SEC_SECTION_GAP
+        return y, None
 
 
 # âœ… ط§ظ„طھط³ط¬ظٹظ„ ط§ظ„ظٹط¯ظˆظٹ (ظ†ظپط³ ط£ط³ظ„ظˆط¨ ProjectsBlock ظˆ SkillsGridBlock)
@@ -6,9 +6,9 @@ Adds dynamic font availability checks & safe fallbacks to avoid KeyError.
 
 from __future__ import annotations
 
-import json
+import time
+from functools import lru_cache
 from io import BytesIO
-from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from reportlab.lib.colors import HexColor, black
@@ -17,6 +17,14 @@ from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 from reportlab.pdfbase import pdfmetrics  
 
+from .coverage import FontStack, font_stack
+from .fonts import ensure_font
+from .measure import word_width, wrap_words
+from .frozen import thaw
+from .theme_loader import get_theme_repository
+from .metrics import BLOCK_SECONDS
+from .timing import stage
+
 import re
 
 _AR_RE = re.compile(r"[\u0600-\u06FF]")
@@ -26,28 +34,18 @@ def _is_arabic(s: str) -> bool:
 
 from reportlab.pdfbase import pdfmetrics
 
-def _pick_line_font(st, prefer_ar="NotoNaskhArabic", prefer_lat="DejaVuSans"):
-    regs = set(pdfmetrics.getRegisteredFontNames())
-    ar = prefer_ar if prefer_ar in regs else (st["font"] if st["font"] in regs else "Helvetica")
-    la = prefer_lat if prefer_lat in regs else (st["font"] if st["font"] in regs else "Helvetica")
-    return ar, la
+@lru_cache(maxsize=64)
+def _line_stacks(font: str, prefer_ar="NotoNaskhArabic", prefer_lat="DejaVuSans") -> Tuple[FontStack, FontStack]:
+    """Font stacks for Arabic and for other lines (per-run glyph fallback)."""
+    base = font if ensure_font(font) else "Helvetica"
+    ar = prefer_ar if ensure_font(prefer_ar) else base
+    la = prefer_lat if ensure_font(prefer_lat) else base
+    return font_stack(ar, la, base), font_stack(la, ar, base)
 
 
 # ========== RTL / Arabic Support ==========
-try:
-    import arabic_reshaper  # type: ignore
-    from bidi.algorithm import get_display  # type: ignore
-
-    def _rtl_process(s: str) -> str:
-        if not s:
-            return ""
-        reshaped = arabic_reshaper.reshape(s)
-        return get_display(reshaped)
-
-except Exception:
-
-    def _rtl_process(s: str) -> str:
-        return s or ""
+# Whole-line reshape + bidi, memoized per line (see rtl.shape).
+from .rtl import shape as _rtl_process
 
 
 # ========== Font helpers (safety) ==========
@@ -55,25 +53,24 @@ except Exception:
 def _safe_set_font(c: canvas.Canvas, name: str, size: int) -> None:
     """Try setFont; fallback gracefully to DejaVuSans or Helvetica."""
     try:
+        ensure_font(name)
         c.setFont(name, size)
         return
     except Exception:
         pass
-    regs = set(pdfmetrics.getRegisteredFontNames())
-    fb = "DejaVuSans" if "DejaVuSans" in regs else "Helvetica"
+    fb = "DejaVuSans" if ensure_font("DejaVuSans") else "Helvetica"
     c.setFont(fb, size)
 
 
 def _resolve_font_name(name: str) -> str:
     """Return an available font name or a safe fallback."""
-    regs = set(pdfmetrics.getRegisteredFontNames())
-    if name in regs:
+    if ensure_font(name):
         return name
-    if name and name + "-Bold" in regs:
+    if name and ensure_font(name + "-Bold"):
         return name  
-    if "NotoNaskhArabic" in regs:
+    if ensure_font("NotoNaskhArabic"):
         return "NotoNaskhArabic"
-    if "DejaVuSans" in regs:
+    if ensure_font("DejaVuSans"):
         return "DejaVuSans"
     return "Helvetica"
 
@@ -114,21 +111,7 @@ def _wrap_text(
     font: str = "Helvetica",
     size: int = 10,
 ) -> List[str]:
-    _safe_set_font(c, font, size)
-    words = str(text).split()
-    lines: List[str] = []
-    cur = ""
-    for w in words:
-        test = (cur + " " + w).strip()
-        if c.stringWidth(test, font, size) <= max_w:
-            cur = test
-        else:
-            if cur:
-                lines.append(cur)
-            cur = w
-    if cur:
-        lines.append(cur)
-    return lines or [""]
+    return wrap_words(text, max_w, font, size)
 
 
 def _draw_paragraph(
@@ -145,19 +128,24 @@ def _draw_paragraph(
     if not text:
         return y
 
-    ar_font, la_font = _pick_line_font(st={"font": font})
+    ar_stack, la_stack = _line_stacks(font)
 
     for raw in str(text).splitlines():
         is_ar = _is_arabic(raw)
 
         render = _rtl_process(raw) if (rtl and is_ar) else raw
 
-        line_font = ar_font if is_ar else la_font
+        stack = ar_stack if is_ar else la_stack
+        line_font = stack.primary
+
+        if not stack.covers(render):
+            y = _draw_runs(c, x, y, w, render, leading, stack, size, rtl and is_ar)
+            continue
 
         lines = _wrap_text(c, render, w, line_font, size)
 
+        _safe_set_font(c, line_font, size)
         for ln in lines:
-            _safe_set_font(c, line_font, size)
             if rtl and is_ar:
                 c.drawRightString(x + w, y, ln)
             else:
@@ -167,6 +155,30 @@ def _draw_paragraph(
     return y
 
 
+def _draw_runs(
+    c: canvas.Canvas,
+    x: float,
+    y: float,
+    w: float,
+    text: str,
+    leading: float,
+    stack: FontStack,
+    size: int,
+    right: bool,
+) -> float:
+    """Wrap and draw a line whose glyphs need several fonts of ``stack``."""
+    lines = wrap_words(text, w, stack.primary, size, measure=lambda word: stack.width(word, size))
+    for ln in lines:
+        x0 = x + w - stack.width(ln, size) if right else x
+        for run_font, run in stack.runs(ln):
+            _safe_set_font(c, run_font, size)
+            c.drawString(x0, y, run)
+            x0 += word_width(run, run_font, size)
+        y -= leading
+    _safe_set_font(c, stack.primary, size)
+    return y
+
+
 
 def _pct_to_w(pct: Any, full_w: float) -> float:
     s = str(pct or "").strip()
@@ -188,23 +200,17 @@ def _deep_update(target: dict, source: dict) -> dict:
         if isinstance(v, dict) and isinstance(target.get(k), dict):
             _deep_update(target[k], v)
         else:
-            target[k] = v
+            target[k] = thaw(v)  # never alias shared (cached) theme data
     return target
 
 
 # ========== Theme Loader ==========
 
 def _load_theme_from_disk(theme_name: Optional[str]) -> dict:
+    """Theme file contents as written (shared, read-only; cached by mtime)."""
     if not theme_name:
         return {}
-    root = Path(__file__).resolve().parents[2]
-    path = root / "themes" / f"{theme_name}.theme.json"
-    if path.exists():
-        try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
+    return get_theme_repository().get(theme_name).raw
 
 
 # ========== Blocks ==========
@@ -427,9 +433,10 @@ def build_resume_pdf(*, data: Dict[str, Any]) -> bytes:
     profile = data.get("profile") or {}
     layout = data.get("layout_inline") or {}
     rtl = bool(data.get("rtl_mode"))
-    theme_inline = data.get("theme_inline") or _load_theme_from_disk(
-        data.get("theme_name")
-    )
+    with stage("theme"):
+        theme_inline = data.get("theme_inline") or _load_theme_from_disk(
+            data.get("theme_name")
+        )
 
     style: Dict[str, Any] = {
         "colors": {"primary": "#0F172A", "text": "#000", "accent": "#2563EB", "bg": "#FFF"},
@@ -447,9 +454,10 @@ def build_resume_pdf(*, data: Dict[str, Any]) -> bytes:
     _deep_update(style, theme_inline)
     _deep_update(style, layout.get("overrides") or {})
 
-    base = _resolve_font_name(style["fonts"].get("base", "Helvetica"))
-    bold = _resolve_font_name(style["fonts"].get("bold", "Helvetica-Bold"))
-    head = _resolve_font_name(style["fonts"].get("heading", bold or base))
+    with stage("fonts"):
+        base = _resolve_font_name(style["fonts"].get("base", "Helvetica"))
+        bold = _resolve_font_name(style["fonts"].get("bold", "Helvetica-Bold"))
+        head = _resolve_font_name(style["fonts"].get("heading", bold or base))
 
     st: Dict[str, Any] = {
         "primary": HexColor(style["colors"]["primary"]),
@@ -475,71 +483,77 @@ def build_resume_pdf(*, data: Dict[str, Any]) -> bytes:
         margins["bottom"] * mm,
     )
 
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    if st["bg"] != black:
-        c.setFillColor(st["bg"])
-        c.rect(0, 0, pw, ph, stroke=0, fill=1)
-        c.setFillColor(st["text"])
-
-    usable_w = pw - left - right
-    cols_def = layout.get("columns") or [{"id": "main", "width": "100%"}]
-    cols: Dict[str, Tuple[float, float]] = {}
-    x_cursor = left
-    for col in cols_def:
-        cw = _pct_to_w(col.get("width", "100%"), usable_w)
-        cols[col["id"]] = (x_cursor, cw)
-        x_cursor += cw
-
-    flow = layout.get("flow") or [
-        {"column": "main", "blocks": ["header_name", "text_section:summary", "projects", "education"]}
-    ]
-    y_top = ph - top
-    y_pos: Dict[str, float] = {cid: y_top for cid in cols}
-
-    def ensure_space(cid: str, h: float = 60) -> None:
-        if y_pos[cid] - h < bottom:
-            c.showPage()
-            if st["bg"] != black:
-                c.setFillColor(st["bg"])
-                c.rect(0, 0, pw, ph, stroke=0, fill=1)
-                c.setFillColor(st["text"])
-            y_pos.update({k: y_top for k in cols})
-
-    for sec in flow:
-        cid = sec.get("column", "main")
-        x, w = cols.get(cid, (left, usable_w))
-        blocks = sec.get("blocks") or []
-
-        if blocks and "left_panel_bg" in blocks:
-            over = layout.get("overrides", {}).get("left_panel_bg", {}).get("data", {})
-            _block_left_panel_bg(
-                c,
-                x,
-                y_pos[cid],
-                w,
-                ph,
-                st,
-                pad_mm=over.get("pad_mm", 6),
-                bg=over.get("bg", "#F8FAFC"),
-            )
-            blocks = [b for b in blocks if b != "left_panel_bg"]
-
-        y = y_pos[cid]
-        for b in blocks:
-            ensure_space(cid, 80)
-            name, arg = (b.split(":", 1) if ":" in str(b) else (b, None))
-            if name == "text_section":
-                src = arg or ((layout.get("map_rules") or {}).get("text_section") or {}).get("from")
-                val = profile.get(src, "")
-                if isinstance(val, list):
-                    val = " ".join(val)
-                y = _block_text_section(c, x, y, w, val, st, rtl)
-            elif name in BLOCKS:
-                y = BLOCKS[name](c, x, y, w, profile, st, rtl)
-        y_pos[cid] = y
-
-    c.showPage()
-    c.save()
+    with stage("draw"):
+        buf = BytesIO()
+        c = canvas.Canvas(buf, pagesize=A4)
+        if st["bg"] != black:
+            c.setFillColor(st["bg"])
+            c.rect(0, 0, pw, ph, stroke=0, fill=1)
+            c.setFillColor(st["text"])
+
+        usable_w = pw - left - right
+        cols_def = layout.get("columns") or [{"id": "main", "width": "100%"}]
+        cols: Dict[str, Tuple[float, float]] = {}
+        x_cursor = left
+        for col in cols_def:
+            cw = _pct_to_w(col.get("width", "100%"), usable_w)
+            cols[col["id"]] = (x_cursor, cw)
+            x_cursor += cw
+
+        flow = layout.get("flow") or [
+            {"column": "main", "blocks": ["header_name", "text_section:summary", "projects", "education"]}
+        ]
+        y_top = ph - top
+        y_pos: Dict[str, float] = {cid: y_top for cid in cols}
+
+        def ensure_space(cid: str, h: float = 60) -> None:
+            if y_pos[cid] - h < bottom:
+                c.showPage()
+                if st["bg"] != black:
+                    c.setFillColor(st["bg"])
+                    c.rect(0, 0, pw, ph, stroke=0, fill=1)
+                    c.setFillColor(st["text"])
+                y_pos.update({k: y_top for k in cols})
+
+        for sec in flow:
+            cid = sec.get("column", "main")
+            x, w = cols.get(cid, (left, usable_w))
+            blocks = sec.get("blocks") or []
+
+            if blocks and "left_panel_bg" in blocks:
+                over = layout.get("overrides", {}).get("left_panel_bg", {}).get("data", {})
+                _block_left_panel_bg(
+                    c,
+                    x,
+                    y_pos[cid],
+                    w,
+                    ph,
+                    st,
+                    pad_mm=over.get("pad_mm", 6),
+                    bg=over.get("bg", "#F8FAFC"),
+                )
+                blocks = [b for b in blocks if b != "left_panel_bg"]
+
+            y = y_pos[cid]
+            for b in blocks:
+                ensure_space(cid, 80)
+                name, arg = (b.split(":", 1) if ":" in str(b) else (b, None))
+                t0 = time.perf_counter()
+                if name == "text_section":
+                    src = arg or ((layout.get("map_rules") or {}).get("text_section") or {}).get("from")
+                    val = profile.get(src, "")
+                    if isinstance(val, list):
+                        val = " ".join(val)
+                    y = _block_text_section(c, x, y, w, val, st, rtl)
+                elif name in BLOCKS:
+                    y = BLOCKS[name](c, x, y, w, profile, st, rtl)
+                else:
+                    continue
+                BLOCK_SECONDS.observe(time.perf_counter() - t0, engine="builder", block=name)
+            y_pos[cid] = y
+
+    with stage("save"):
+        c.showPage()
+        c.save()
     return buf.getvalue()
 
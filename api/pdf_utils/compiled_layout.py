@@ -0,0 +1,458 @@
+﻿# api/pdf_utils/compiled_layout.py
+"""
+Layouts compiled once and reused across renders.
+
+A layout (``layout_inline``: page / columns / flow / layout / overrides) is
+turned into a ``CompiledLayout``: page size and margins in points, column
+rectangles, and a flat tuple of ``CompiledBlock`` entries with the canonical
+id already split into ``base:suffix``, the registry instance bound and the
+static ``data`` / ``frame`` overrides pre-merged. ``LayoutEngine.render``
+runs straight from it; per request only the profile data is bound.
+
+Compiled layouts are kept in an LRU keyed by the layout's content hash
+(LAYOUT_CACHE_SIZE, default 128). Layout files are parsed once per
+``mtime``/size through ``load_layout_file``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from reportlab.lib.pagesizes import A4, LETTER
+from reportlab.lib.units import mm
+
+from .block_aliases import canonicalize
+from .blocks.registry import get as get_block
+from .frozen import FrozenDict, freeze
+
+# Default page size and margins
+PAGE_W, PAGE_H = A4
+LEFT_MARGIN = 18 * mm
+RIGHT_MARGIN = 18 * mm
+TOP_MARGIN = 22 * mm
+BOTTOM_MARGIN = 18 * mm
+
+_PAGE_SIZES = {
+    "A4": A4,
+    "Letter": LETTER,
+}
+
+# Column used for plain ``layout`` lists (no flow): the full content width.
+PAGE_COLUMN = "__page__"
+
+
+@dataclass
+class Column:
+    id: str
+    x: float
+    w: float
+
+
+@dataclass
+class PageSpec:
+    width: float
+    height: float
+    margins: Dict[str, float]  # {top, right, bottom, left} in points
+
+
+# ============================================================
+#                     Page / column geometry
+# ============================================================
+def _apply_page_defaults(page_conf: Dict[str, Any]) -> None:
+    """
+    Apply default values to the page configuration if not already set.
+
+    Args:
+        page_conf (Dict[str, Any]): Page configuration dictionary to modify.
+    """
+    if page_conf is None:
+        page_conf = {}
+    page_conf.setdefault("size", "A4")
+    page_conf.setdefault("orientation", "portrait")
+    page_conf.setdefault("margin_mm", {"top": 22, "right": 18, "bottom": 18, "left": 18})
+    page_conf.setdefault("gutter_mm", 6)
+
+
+def _resolve_page_size(page_conf: Optional[Dict[str, Any]]):
+    """
+    Resolve the page size tuple based on the given configuration.
+
+    Args:
+        page_conf (Optional[Dict[str, Any]]): Page configuration dictionary.
+
+    Returns:
+        Tuple[float, float]: Width and height of the page.
+    """
+    if not page_conf:
+        return A4
+    size = str(page_conf.get("size") or "A4")
+    orient = str(page_conf.get("orientation") or "portrait")
+    base = _PAGE_SIZES.get(size, A4)
+    if orient == "landscape":
+        return base[1], base[0]
+    return base
+
+
+def _get_margin(page_conf: Optional[Dict[str, Any]], side: str, *, default_px: float) -> float:
+    """
+    Retrieve the margin value (in points) for a given side.
+
+    Args:
+        page_conf (Optional[Dict[str, Any]]): Page configuration dictionary.
+        side (str): Margin side ('top', 'right', 'bottom', or 'left').
+        default_px (float): Default margin value in points.
+
+    Returns:
+        float: Margin value in points.
+    """
+    if not page_conf:
+        return default_px
+    m = page_conf.get("margin_mm") or {}
+    val = m.get(side)
+    try:
+        return float(val) * mm if val is not None else default_px
+    except Exception:
+        return default_px
+
+
+def _content_box(page: Optional[PageSpec]) -> Tuple[float, float]:
+    """(x, width) of the area between the left and right margins."""
+    if page is None:
+        return LEFT_MARGIN, PAGE_W - LEFT_MARGIN - RIGHT_MARGIN
+    left = page.margins.get("left", LEFT_MARGIN)
+    return left, page.width - left - page.margins.get("right", RIGHT_MARGIN)
+
+
+def _columns_from_percentages(
+    cols_def: List[Dict[str, Any]], page: Optional[PageSpec] = None
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Converts definitions like:
+        [{"id": "left", "width": "33%"}, {"id": "right", "width": "67%"}]
+    into a dictionary: {id: (x, w)} with point units based on page margins.
+
+    Args:
+        cols_def (List[Dict[str, Any]]): List of column definitions with width in percent.
+        page (Optional[PageSpec]): Page the columns live on (default: A4 with
+            the default margins).
+
+    Returns:
+        Dict[str, Tuple[float, float]]: Mapping of column IDs to (x, width) in points.
+    """
+    x_cursor, total_w = _content_box(page)
+    out: Dict[str, Tuple[float, float]] = {}
+
+    for c in cols_def:
+        cid = str(c.get("id") or "").strip() or f"col_{len(out)+1}"
+        w_str = str(c.get("width") or "100%").strip()
+        if w_str.endswith("%"):
+            try:
+                pct = float(w_str[:-1]) / 100.0
+            except Exception:
+                pct = 1.0
+        else:
+            pct = 1.0
+
+        w = total_w * pct
+        out[cid] = (x_cursor, w)
+
+        gutter_mm = float(c.get("gutter_mm") or 0) * mm
+        x_cursor += w + gutter_mm
+
+    return out if out else _fallback_columns(page)
+
+
+def _fallback_columns(page: Optional[PageSpec] = None) -> Dict[str, Tuple[float, float]]:
+    """
+    Provides default left/right column widths for blocks relying on columns.
+
+    Returns:
+        Dict[str, Tuple[float, float]]: A dictionary mapping column IDs to (x, width).
+    """
+    left, total_w = _content_box(page)
+    left_w = total_w * 0.4
+    right_w = total_w * 0.55
+    return {
+        "left": (left, left_w),
+        "right": (left + left_w + 5 * mm, right_w),
+    }
+
+
+# ============================================================
+#                        Compiled objects
+# ============================================================
+@dataclass(frozen=True)
+class CompiledBlock:
+    """One block of a layout, resolved up front."""
+
+    raw_id: str                 # as written in the layout
+    base_id: str                # canonical id without suffix ("text_section")
+    suffix: Optional[str]       # "summary" for "text_section:summary"
+    column: str
+    block: Any                  # registry instance
+    data: FrozenDict            # block data | overrides[base].data | overrides[raw].data
+    frame: FrozenDict           # same for "frame"
+
+    def bind(self, ready: Mapping[str, Any]) -> Any:
+        """
+        Build the block's ``data`` for one render.
+
+        Profile data (``ready[base_id]``) wins; the static layout data is only
+        used when the profile has nothing for the block. For ``base:suffix``
+        ids a nested ``data[suffix]`` is used when present. Lists are joined
+        with newlines, as the blocks expect.
+        """
+        data = ready.get(self.base_id)
+        if data is None:
+            data = dict(self.data) or None
+        if self.suffix and isinstance(data, dict) and self.suffix in data:
+            data = data[self.suffix]
+        if isinstance(data, (list, tuple)):
+            data = "\n".join(str(x) for x in data)
+        return data or {}
+
+
+@dataclass(frozen=True)
+class CompiledLayout:
+    """A layout ready to render: geometry plus pre-bound blocks."""
+
+    digest: str
+    page: PageSpec
+    page_conf: FrozenDict
+    columns: FrozenDict         # {column_id: (x, w)} in points
+    blocks: Tuple[CompiledBlock, ...]
+
+    @property
+    def pagesize(self) -> Tuple[float, float]:
+        return self.page.width, self.page.height
+
+
+def _merged(key: str, *sources: Mapping[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for src in sources:
+        out.update(src.get(key) or {})
+    return out
+
+
+def _compile_block(
+    raw: Any, column: str, overrides: Mapping[str, Any]
+) -> Optional[CompiledBlock]:
+    blk = {"block_id": raw} if isinstance(raw, str) else dict(raw or {})
+    raw_id = str(blk.get("block_id") or "").strip()
+    if not raw_id:
+        return None
+
+    block_id = canonicalize(raw_id)
+    base_id, _, suffix = block_id.partition(":")
+    try:
+        block = get_block(base_id)
+    except KeyError:
+        print(f"[WARN] Block '{raw_id}' is not registered; skipping.")
+        return None
+
+    ov_base = overrides.get(base_id) or {}
+    ov_raw = (overrides.get(raw_id) or {}) if raw_id != base_id else {}
+    return CompiledBlock(
+        raw_id=raw_id,
+        base_id=base_id,
+        suffix=suffix or None,
+        column=column,
+        block=block,
+        data=freeze(_merged("data", blk, ov_base, ov_raw)),
+        frame=freeze(_merged("frame", blk, ov_base, ov_raw)),
+    )
+
+
+def compile_blocks(
+    flow: Iterable[Mapping[str, Any]],
+    layout: Iterable[Any],
+    overrides: Optional[Mapping[str, Any]],
+    column_ids: Sequence[str],
+) -> Tuple[CompiledBlock, ...]:
+    """
+    Resolve the blocks of a flow (or, without flow, of a plain layout list).
+
+    Flow groups naming an unknown column go to the first column; plain
+    layout items go to ``PAGE_COLUMN``.
+    """
+    overrides = overrides or {}
+    first = column_ids[0] if column_ids else PAGE_COLUMN
+    out: List[CompiledBlock] = []
+    flow = list(flow or [])
+    if flow:
+        for group in flow:
+            col_id = group.get("column")
+            if col_id not in column_ids:
+                col_id = first
+            for raw in group.get("blocks") or []:
+                cb = _compile_block(raw, col_id, overrides)
+                if cb is not None:
+                    out.append(cb)
+    else:
+        for raw in layout or []:
+            cb = _compile_block(raw, PAGE_COLUMN, overrides)
+            if cb is not None:
+                out.append(cb)
+    return tuple(out)
+
+
+def layout_digest(layout_inline: Mapping[str, Any]) -> str:
+    """SHA-256 of the canonical JSON form of a layout."""
+    blob = json.dumps(
+        layout_inline or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def compile_layout(layout_inline: Optional[Mapping[str, Any]], digest: Optional[str] = None) -> CompiledLayout:
+    """
+    Compile a ``layout_inline`` mapping (not cached; see ``get_compiled_layout``).
+
+    Args:
+        layout_inline (Optional[Mapping[str, Any]]): page / columns / flow /
+            layout / overrides.
+        digest (Optional[str]): Precomputed ``layout_digest``.
+
+    Returns:
+        CompiledLayout: The compiled layout.
+    """
+    li = layout_inline or {}
+    page_conf = dict(li.get("page") or {})
+    _apply_page_defaults(page_conf)
+
+    width, height = _resolve_page_size(page_conf)
+    page = PageSpec(
+        width=width,
+        height=height,
+        margins={
+            "top": _get_margin(page_conf, "top", default_px=TOP_MARGIN),
+            "right": _get_margin(page_conf, "right", default_px=RIGHT_MARGIN),
+            "bottom": _get_margin(page_conf, "bottom", default_px=BOTTOM_MARGIN),
+            "left": _get_margin(page_conf, "left", default_px=LEFT_MARGIN),
+        },
+    )
+
+    cols_def = li.get("columns") or []
+    columns = _columns_from_percentages(cols_def, page) if cols_def else _fallback_columns(page)
+    flow = li.get("flow") or []
+    if not flow:
+        columns[PAGE_COLUMN] = _content_box(page)
+
+    return CompiledLayout(
+        digest=digest or layout_digest(li),
+        page=page,
+        page_conf=freeze(page_conf),
+        columns=freeze(columns),
+        blocks=compile_blocks(flow, li.get("layout") or [], li.get("overrides"), list(columns)),
+    )
+
+
+# ============================================================
+#                            Caches
+# ============================================================
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+_COMPILED: "OrderedDict[str, CompiledLayout]" = OrderedDict()
+_COMPILED_MAX = max(1, _env_int("LAYOUT_CACHE_SIZE", 128))
+_LOCK = threading.Lock()
+
+
+def get_compiled_layout(layout_inline: Optional[Mapping[str, Any]]) -> CompiledLayout:
+    """
+    Return the compiled form of a layout, compiling it once per content hash.
+
+    Args:
+        layout_inline (Optional[Mapping[str, Any]]): Layout mapping.
+
+    Returns:
+        CompiledLayout: Shared compiled layout (do not modify).
+    """
+    digest = layout_digest(layout_inline or {})
+    with _LOCK:
+        hit = _COMPILED.get(digest)
+        if hit is not None:
+            _COMPILED.move_to_end(digest)
+            return hit
+
+    compiled = compile_layout(layout_inline, digest=digest)
+    with _LOCK:
+        _COMPILED[digest] = compiled
+        while len(_COMPILED) > _COMPILED_MAX:
+            _COMPILED.popitem(last=False)
+    return compiled
+
+
+def clear_compiled_layouts() -> None:
+    with _LOCK:
+        _COMPILED.clear()
+
+
+@dataclass
+class LayoutFile:
+    """A parsed layout file; ``data`` is shared and read-only."""
+
+    path: Path
+    version: Tuple[int, int]
+    data: FrozenDict
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def derived(self, key: str, factory: Callable[["LayoutFile"], Any]) -> Any:
+        """Memoize a value computed from this file until the file changes."""
+        try:
+            return self._derived[key]
+        except KeyError:
+            return self._derived.setdefault(key, freeze(factory(self)))
+
+
+_FILES: Dict[Path, LayoutFile] = {}
+
+
+def load_layout_file(path: Path) -> LayoutFile:
+    """
+    Parse a layout JSON file, re-reading it only when its mtime/size changes.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If the file is not valid JSON.
+    """
+    path = Path(path)
+    st = path.stat()
+    version = (st.st_mtime_ns, st.st_size)
+    entry = _FILES.get(path)
+    if entry is not None and entry.version == version:
+        return entry
+    entry = LayoutFile(
+        path=path,
+        version=version,
+        data=freeze(json.loads(path.read_text(encoding="utf-8"))),
+    )
+    _FILES[path] = entry
+    return entry
+
+
+__all__ = [
+    "PAGE_COLUMN",
+    "Column",
+    "PageSpec",
+    "CompiledBlock",
+    "CompiledLayout",
+    "LayoutFile",
+    "compile_blocks",
+    "compile_layout",
+    "get_compiled_layout",
+    "clear_compiled_layouts",
+    "layout_digest",
+    "load_layout_file",
+]
@@ -0,0 +1,160 @@
+﻿# api/pdf_utils/coverage.py
+"""
+Glyph coverage of the registered fonts, for per-run font fallback.
+
+A line is drawn in one font, so a mixed line (an English product name in an
+Arabic sentence, a CJK name in a Latin one) shows missing glyphs for every
+character the font lacks. ``font_stack(primary, *fallbacks)`` returns a
+``FontStack`` that splits text into runs, each in the first font of the
+stack that has glyphs for it:
+
+- coverage of a TrueType font is read once from its cmap (``charToGlyph``),
+  of a standard PDF font from WinAnsi, and of the CID fallback fonts from
+  the Unicode blocks they serve;
+- the stack memoizes the chosen font per character, so splitting is a single
+  O(length) pass; text the primary font covers entirely is one run (a C-level
+  set check) and is drawn exactly as before;
+- spaces and punctuation stay in the current run when its font has them, so
+  runs only break where the script changes.
+
+Stacks are cached per tuple of font names; every asset font and the CID
+fonts are appended as last-resort fallbacks.
+"""
+
+from __future__ import annotations
+
+import threading
+import unicodedata
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from reportlab.pdfbase import pdfmetrics
+
+from .fonts import CID_FONTS, ensure_font, font_index
+from .measure import word_width
+
+RUN_CACHE_SIZE = 4096  # split lines kept per stack
+
+# Unicode blocks drawn by the CID fonts (no cmap to read from ReportLab).
+_CJK_COMMON = ((0x20, 0x7E), (0x3000, 0x303F), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF), (0xFF00, 0xFFEF))
+_CID_BLOCKS = {
+    "STSong-Light": _CJK_COMMON,
+    "HeiseiMin-W3": _CJK_COMMON + ((0x3040, 0x309F), (0x30A0, 0x30FF), (0x31F0, 0x31FF)),
+    "HYSMyeongJo-Medium": _CJK_COMMON + ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)),
+}
+
+_LOCK = threading.Lock()
+_COVERAGE: Dict[str, FrozenSet[str]] = {}
+_STACKS: Dict[Tuple[str, ...], "FontStack"] = {}
+
+
+def _winansi() -> FrozenSet[str]:
+    chars = set()
+    for i in range(0x20, 0x100):
+        try:
+            chars.add(bytes([i]).decode("cp1252"))
+        except UnicodeDecodeError:
+            pass
+    return frozenset(chars)
+
+
+def font_coverage(name: str) -> FrozenSet[str]:
+    """Characters ``name`` has glyphs for (empty if the font is unavailable)."""
+    cov = _COVERAGE.get(name)
+    if cov is not None:
+        return cov
+    if name in _CID_BLOCKS:
+        cov = frozenset(chr(cp) for lo, hi in _CID_BLOCKS[name] for cp in range(lo, hi + 1))
+    elif not ensure_font(name):
+        cov = frozenset()
+    else:
+        face = getattr(pdfmetrics.getFont(name), "face", None)
+        cmap = getattr(face, "charToGlyph", None)
+        if cmap is not None:
+            cov = frozenset(chr(cp) for cp, gid in cmap.items() if gid and cp >= 0x20)
+        else:
+            cov = _winansi()  # standard Type 1 font
+    with _LOCK:
+        _COVERAGE[name] = cov
+    return cov
+
+
+def _neutral(ch: str) -> bool:
+    """Spaces, punctuation and controls: they follow the surrounding run."""
+    return unicodedata.category(ch)[0] in "ZPC"
+
+
+class FontStack:
+    """Ordered fonts; each character is drawn in the first one that covers it."""
+
+    def __init__(self, fonts: Tuple[str, ...]) -> None:
+        self.fonts = fonts
+        self.primary = fonts[0]
+        self._primary_cov = font_coverage(self.primary)
+        self._lock = threading.Lock()
+        self._chars: Dict[str, Tuple[str, bool]] = {}   # char -> (font, neutral)
+        self._runs: Dict[str, List[Tuple[str, str]]] = {}
+
+    def covers(self, text: str) -> bool:
+        """True if the primary font has every glyph of ``text``."""
+        return self._primary_cov.issuperset(text)
+
+    def _char(self, ch: str) -> Tuple[str, bool]:
+        entry = self._chars.get(ch)
+        if entry is None:
+            # Fallback fonts are parsed only when a character needs them.
+            font = next((f for f in self.fonts if ch in font_coverage(f)), self.primary)
+            entry = (font, _neutral(ch))
+            self._chars[ch] = entry
+        return entry
+
+    def runs(self, text: str) -> List[Tuple[str, str]]:
+        """``text`` split into ``(font, run)`` pairs, in order."""
+        if not text or self.covers(text):
+            return [(self.primary, text)]
+        out = self._runs.get(text)
+        if out is not None:
+            return out
+        out = []
+        cur: Optional[str] = None
+        start = 0
+        with self._lock:
+            for i, ch in enumerate(text):
+                font, neutral = self._char(ch)
+                if neutral and cur is not None and ch in font_coverage(cur):
+                    continue
+                if font != cur:
+                    if cur is not None:
+                        out.append((cur, text[start:i]))
+                    cur, start = font, i
+            out.append((cur or self.primary, text[start:]))
+            if len(self._runs) >= RUN_CACHE_SIZE:
+                self._runs.clear()
+            self._runs[text] = out
+        return out
+
+    def width(self, text: str, size: float) -> float:
+        """Width of ``text`` in points, each run measured in its own font."""
+        if self.covers(text):
+            return word_width(text, self.primary, size)
+        return sum(word_width(run, font, size) for font, run in self.runs(text))
+
+
+def font_stack(*fonts: str) -> FontStack:
+    """Cached stack of the available ``fonts``, then every asset font, then the CID fonts."""
+    key = tuple(f for f in fonts if f)
+    stack = _STACKS.get(key)
+    if stack is not None:
+        return stack
+    names: List[str] = []
+    for name in key + tuple(sorted(font_index())) + CID_FONTS:
+        if name not in names:
+            names.append(name)
+    # The primary must be usable; fallbacks are checked lazily by coverage.
+    while names and not ensure_font(names[0]):
+        names.pop(0)
+    stack = FontStack(tuple(names) or ("Helvetica",))
+    with _LOCK:
+        return _STACKS.setdefault(key, stack)
+
+
+__all__ = ["FontStack", "font_coverage", "font_stack"]
@@ -1,24 +1,14 @@
 ﻿from __future__ import annotations
+import time
 from dataclasses import dataclass
-from typing import Dict, Any, List, Optional, Tuple, Callable
+from typing import Dict, Any, List, Optional, Tuple, Callable, Sequence
 from reportlab.lib.units import mm
 from reportlab.pdfgen.canvas import Canvas
 
-from .blocks.base import Frame, RenderContext
-from .blocks.registry import get as get_block
-from .block_aliases import canonicalize
-
-@dataclass
-class Column:
-    id: str
-    x: float
-    w: float
-
-@dataclass
-class PageSpec:
-    width: float
-    height: float
-    margins: Dict[str, float]  # {top, right, bottom, left} in points
+from .blocks.base import Frame, RenderContext, measure_block
+from .compiled_layout import Column, CompiledBlock, CompiledLayout, PageSpec, compile_blocks
+from .hooks import RenderHook, global_hooks
+from .stylesheet import DEFAULT_STYLE, StyleSheet
 
 @dataclass
 class FlowCursor:
@@ -29,8 +19,13 @@ class LayoutEngine:
     """
     Modern rendering engine based on JSON layout (flow/columns/overrides).
     - Renders one block at a time within a specified column.
-    - Automatically creates a new page when space runs out.
+    - Automatically creates a new page when space runs out: blocks are
+      measured first (``Block.measure`` or a scratch render), so each one
+      is drawn exactly once. Blocks with ``render_split`` continue on the
+      next page instead of moving there whole.
     - Applies overrides for each block.
+    - Reports block, page-break and end-of-document events to ``hooks``
+      (plus the process-wide ones, see ``hooks.add_hook``).
     """
 
     def __init__(
@@ -41,6 +36,8 @@ class LayoutEngine:
         theme: Dict[str, Any],
         ui_lang: str,
         rtl_mode: bool,
+        style: Optional[StyleSheet] = None,
+        hooks: Sequence[RenderHook] = (),
     ):
         self.c = canvas
         self.page = page
@@ -50,31 +47,10 @@ class LayoutEngine:
         top_y = self.page.height - self.page.margins.get("top", 22 * mm)
         self.cursor = FlowCursor(y_by_col={cid: top_y for cid in self.columns})
         self.theme = theme or {}
+        self.style = style or DEFAULT_STYLE
         self.ui_lang = ui_lang
         self.rtl_mode = rtl_mode
-
-    def _split_id(self, raw_id: str) -> Tuple[str, Optional[str]]:
-        raw_id = canonicalize(raw_id)
-        if ":" in raw_id:
-            base, suffix = raw_id.split(":", 1)
-            return base, suffix
-        return raw_id, None
-
-    def _block_data_for(
-        self,
-        base_id: str,
-        suffix: Optional[str],
-        ready: Dict[str, Any],
-        conf_data: Optional[Dict[str, Any]],
-    ):
-        data = ready.get(base_id)
-        if data is None:
-            data = conf_data
-        if suffix and isinstance(data, dict) and suffix in data:
-            data = data[suffix]
-        if isinstance(data, (list, tuple)):
-            data = "\n".join(str(x) for x in data)
-        return data or {}
+        self.hooks: Tuple[RenderHook, ...] = (*global_hooks(), *hooks)
 
     def _ctx(self) -> RenderContext:
         return {
@@ -83,6 +59,7 @@ class LayoutEngine:
             "page_top_y": self.page.height - self.page.margins.get("top", 22 * mm),
             "page_h": self.page.height,
             "theme": self.theme,
+            "style": self.style,
             "columns": {cid: (col.x, col.w) for cid, col in self.columns.items()},
             "page_conf": {
                 "margin_mm": {
@@ -97,10 +74,40 @@ class LayoutEngine:
         top_y = self.page.height - self.page.margins.get("top", 22 * mm)
         for cid in self.columns:
             self.cursor.y_by_col[cid] = top_y
+        for hook in self.hooks:
+            hook.page_break(self.c.getPageNumber())
 
     def _bottom_limit(self) -> float:
         return self.page.margins.get("bottom", 18 * mm)
 
+    @classmethod
+    def for_layout(
+        cls,
+        canvas: Canvas,
+        layout: CompiledLayout,
+        *,
+        theme: Dict[str, Any],
+        ui_lang: str,
+        rtl_mode: bool,
+        style: Optional[StyleSheet] = None,
+        hooks: Sequence[RenderHook] = (),
+    ) -> "LayoutEngine":
+        """Engine set up with the page and columns of a compiled layout."""
+        return cls(
+            canvas=canvas,
+            page=layout.page,
+            columns=layout.columns,
+            theme=theme,
+            ui_lang=ui_lang,
+            rtl_mode=rtl_mode,
+            style=style,
+            hooks=hooks,
+        )
+
+    def render(self, layout: CompiledLayout, ready: Dict[str, Any]):
+        """Render a compiled layout; only the profile data is bound here."""
+        self._render_blocks(layout.blocks, ready)
+
     def render_flow(
         self,
         flow: List[Dict[str, Any]],
@@ -114,47 +121,100 @@ class LayoutEngine:
             {"column": "left", "blocks": [ ... ]},
             ...
         ]
+        Prefer ``render`` with a cached ``CompiledLayout``; this compiles the
+        flow on every call.
         """
-        overrides = overrides or {}
-        ctx_base = self._ctx()
+        self._render_blocks(compile_blocks(flow, [], overrides, list(self.columns)), ready)
 
-        for group in (flow or []):
-            col_id = group.get("column")
-            if col_id not in self.columns:
-                col_id = next(iter(self.columns.keys()))
-            col = self.columns[col_id]
-
-            for raw in (group.get("blocks") or []):
-                blk = {"block_id": raw} if isinstance(raw, str) else dict(raw or {})
-
-                raw_id = blk.get("block_id")
-                if not raw_id:
-                    continue
-
-                base_id, suffix = self._split_id(raw_id)
-                block = get_block(base_id)
-
-                ov = (overrides.get(base_id) or {}) | (overrides.get(raw_id) or {})
-                conf_data = ((blk.get("data") or {}) | (ov.get("data") or {})) or None
-                frame_dict = (blk.get("frame") or {}) | (ov.get("frame") or {})
-
-                x = float(frame_dict.get("x", col.x))
-                w = float(frame_dict.get("w", col.w))
-                y = float(frame_dict.get("y", self.cursor.y_by_col[col_id]))
-                frame = Frame(x=x, y=y, w=w)
-
-                block_data = self._block_data_for(base_id, suffix, ready, conf_data)
-
-                ctx = dict(ctx_base)
-                if suffix:
-                    ctx["section"] = suffix
-
-                new_y = block.render(self.c, frame, block_data, ctx)
-
-                if new_y < self._bottom_limit():
-                    self._new_page()
-                    frame = Frame(x=col.x, y=self.cursor.y_by_col[col_id], w=col.w)
-                    new_y = block.render(self.c, frame, block_data, ctx)
-
-                self.cursor.y_by_col[col_id] = new_y
+    def _render_blocks(self, blocks: Sequence[CompiledBlock], ready: Dict[str, Any]):
+        ctx_base = self._ctx()
+        first_col = next(iter(self.columns.values()))
+        hooks = self.hooks
+        page_top = ctx_base["page_top_y"]
+        pagesize = (self.page.width, self.page.height)
+
+        for cb in blocks:
+            col = self.columns.get(cb.column, first_col)
+            frame = Frame(
+                x=float(cb.frame.get("x", col.x)),
+                y=float(cb.frame.get("y", self.cursor.y_by_col[col.id])),
+                w=float(cb.frame.get("w", col.w)),
+            )
+            ctx = dict(ctx_base)
+            if cb.suffix:
+                ctx["section"] = cb.suffix
+
+            if hooks:
+                for hook in hooks:
+                    hook.before_block(cb, frame, self.c.getPageNumber())
+                t0 = time.perf_counter()
+
+            try:
+                block_data = cb.bind(ready)
+                new_y = None
+                # Place before drawing: split what can be split, move the
+                # rest to a new page (unless it already starts at the top).
+                split = getattr(cb.block, "render_split", None)
+                if frame.y < page_top or split is not None:
+                    height = measure_block(cb.block, frame, block_data, ctx, pagesize)
+                    if frame.y - height < self._bottom_limit():
+                        if split is not None:
+                            new_y, dy = self._render_split(split, cb, col, frame, block_data, ctx)
+                        elif frame.y < page_top:
+                            self._new_page()
+                            frame = Frame(x=col.x, y=self.cursor.y_by_col[col.id], w=col.w)
+                if new_y is None:
+                    new_y = cb.block.render(self.c, frame, block_data, ctx)
+                    dy = frame.y - new_y
+            except Exception as e:
+                print(f"[WARN] Block '{cb.raw_id}' failed: {e}")
+                if hooks:
+                    self._after_block(cb, t0, 0.0, e)
+                continue
+
+            if hooks:
+                self._after_block(cb, t0, dy, None)
+            self.cursor.y_by_col[col.id] = new_y
+
+        if hooks:
+            pages = self.c.getPageNumber()
+            for hook in hooks:
+                hook.document_finished(pages)
+
+    def _render_split(
+        self,
+        split: Callable[..., Tuple[float, Any]],
+        cb: CompiledBlock,
+        col: Column,
+        frame: Frame,
+        data: Dict[str, Any],
+        ctx: Dict[str, Any],
+    ) -> Tuple[float, float]:
+        """
+        Render a splittable block part by part, one page each.
 
+        Returns:
+            Tuple[float, float]: y after the last part and the total height
+            used over all pages.
+        """
+        bottom = self._bottom_limit()
+        new_y, token = split(self.c, frame, data, ctx, bottom, None)
+        used = frame.y - new_y
+        while token is not None:
+            self._new_page()
+            frame = Frame(x=col.x, y=self.cursor.y_by_col[col.id], w=col.w)
+            new_y, next_token = split(self.c, frame, data, ctx, bottom, token)
+            used += frame.y - new_y
+            if next_token == token and new_y == frame.y:
+                print(f"[WARN] Block '{cb.raw_id}' made no progress on a new page; truncated.")
+                break
+            token = next_token
+        return new_y, used
+
+    def _after_block(
+        self, cb: CompiledBlock, t0: float, dy: float, error: Optional[Exception]
+    ) -> None:
+        elapsed = time.perf_counter() - t0
+        page = self.c.getPageNumber()
+        for hook in self.hooks:
+            hook.after_block(cb, elapsed, dy, page, error)
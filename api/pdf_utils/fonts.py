@@ -1,20 +1,62 @@
 ﻿# api/pdf_utils/fonts.py
 """
 Dynamic Font Loader for ReportLab
-Automatically scans /assets for .ttf fonts,
-normalizes their names, and registers them dynamically.
+Scans /assets for .ttf fonts and normalizes their names, but parses a font
+only the first time it is used: ``ensure_font(name)`` registers the family.
+Code that hands an asset font name to ReportLab (``setFont``,
+``stringWidth`` ...) calls it first; ReportLab itself is not patched.
+
+Parsed metrics are cached on disk as JSON, keyed by the SHA-256 of the font
+file (FONT_CACHE_DIR, default: <project>/.cache/fonts; set it to "off" to
+disable), so a cold worker skips TrueType parsing altogether. The entries are
+plain data (no pickle), so a writable cache directory cannot run code.
+
+Font files are memory-mapped read-only (FONT_MMAP, default on) instead of
+being read into each process: the pages come from the OS page cache and are
+shared by every worker (uvicorn --workers, the render pool) that maps the
+same file. ``register_all_fonts()`` in a parent before ``fork`` shares the
+parsed tables copy-on-write as well (see api.render_executor).
+tools/font_memory.py reports the per-process shared/unique split.
 """
 
-import os, re
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import tempfile
+import threading
+from fnmatch import fnmatch
+from typing import Dict, Optional
+from weakref import WeakKeyDictionary
+
+import reportlab
+from reportlab import rl_config
+from reportlab.pdfbase import pdfmetrics, ttfonts
+from reportlab.pdfbase.ttfonts import TTEncoding, TTFont, TTFontFace
 from reportlab.pdfbase.cidfonts import UnicodeCIDFont
 from reportlab.lib.fonts import addMapping
 
+from .metrics import FONT_LOADS
+
 BASE_DIR = os.path.dirname(__file__)
 ASSETS_DIR = os.path.join(BASE_DIR, "assets")
+PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, "..", ".."))
+FONT_CACHE_DIR = os.getenv("FONT_CACHE_DIR") or os.path.join(PROJECT_ROOT, ".cache", "fonts")
+FONT_MMAP = os.getenv("FONT_MMAP", "1").lower() not in ("0", "off", "false", "no")
 REGISTERED = set()
 
+# Unicode fallbacks (built into ReportLab, registered on first use)
+CID_FONTS = ("HeiseiMin-W3", "STSong-Light", "HYSMyeongJo-Medium")
+
+log = logging.getLogger("resume.fonts")
+_LOCK = threading.RLock()
+_INDEX: Optional[Dict[str, dict]] = None      # family -> {"regular": path, "bold": path}
+_NAMES: Dict[str, str] = {}                    # registered name -> family
+_DONE_FAMILIES = set()
+_MAPS: Dict[str, mmap.mmap] = {}               # path -> read-only map (kept open)
+
 # Regex to normalize names like NotoNaskhArabic-Regular â†’ NotoNaskhArabic
 STYLE_SUFFIX = re.compile(
     r"[-_](Regular|Bold|Medium|SemiBold|Semi-Bold|ExtraBold|Light|Black|Book|Roman)$",
@@ -42,55 +84,229 @@ def _scan_font_files():
             fam["regular"] = path
     return families
 
-def _register_font_family(name: str, paths: dict):
-    """Register one family (regular & bold)"""
-    try:
-        if paths.get("regular"):
-            pdfmetrics.registerFont(TTFont(name, paths["regular"]))
-            REGISTERED.add(name)
-        if paths.get("bold"):
-            pdfmetrics.registerFont(TTFont(name + "-Bold", paths["bold"]))
-            REGISTERED.add(name + "-Bold")
+def font_index() -> Dict[str, dict]:
+    """Families available in assets/ (file names only; nothing is parsed)."""
+    global _INDEX
+    if _INDEX is None:
+        with _LOCK:
+            if _INDEX is None:
+                index = _scan_font_files() if os.path.isdir(ASSETS_DIR) else {}
+                for family, paths in index.items():
+                    if paths.get("regular"):
+                        _NAMES[family] = family
+                    if paths.get("bold"):
+                        _NAMES[family + "-Bold"] = family
+                _INDEX = index
+    return _INDEX
+
+# ---------- metrics cache ----------
+def _cache_path(digest: str) -> Optional[str]:
+    if FONT_CACHE_DIR.lower() in ("off", "0", "none"):
+        return None
+    return os.path.join(FONT_CACHE_DIR, f"{digest}-rl{reportlab.Version}.json")
+
+# The face state holds bytes, tuples and int-keyed dicts; JSON has none of
+# them, so they are written as tagged objects and restored on load.
+def _encode_state(obj):
+    if isinstance(obj, bytes):
+        tag = "__name__" if isinstance(obj, ttfonts.TTFNameBytes) else "__bytes__"
+        return {tag: obj.decode("latin-1")}
+    if isinstance(obj, tuple):
+        return {"__tuple__": [_encode_state(x) for x in obj]}
+    if isinstance(obj, list):
+        return [_encode_state(x) for x in obj]
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: _encode_state(v) for k, v in obj.items()}
+        return {"__items__": [[_encode_state(k), _encode_state(v)] for k, v in obj.items()]}
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    raise TypeError(f"unsupported font state value: {type(obj).__name__}")
 
-        # Mapping between normal and bold
-        addMapping(name, 0, 0, name)
-        if name + "-Bold" in REGISTERED:
-            addMapping(name, 0, 1, name + "-Bold")
+def _decode_state(obj: dict):
+    if len(obj) == 1:
+        (tag, value), = obj.items()
+        if tag == "__name__":
+            return ttfonts.TTFNameBytes(value.encode("latin-1"))
+        if tag == "__bytes__":
+            return value.encode("latin-1")
+        if tag == "__tuple__":
+            return tuple(value)
+        if tag == "__items__":
+            return {(tuple(k) if isinstance(k, list) else k): v for k, v in value}
+    return obj
 
-        print(f"✅ Registered: {name}")
+def _pdf_scale(units_per_em: int):
+    # Same as TTFontFile.extractInfo (a lambda there, so it is not pickled).
+    if units_per_em == 1000:
+        return lambda x: x
+    mult = 1000 / units_per_em
+    return lambda x: x * mult
+
+def _read_face_state(digest: str) -> Optional[dict]:
+    path = _cache_path(digest)
+    if not path:
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f, object_hook=_decode_state)
+    except FileNotFoundError:
+        return None
     except Exception as e:
-        print(f"Failed to register {name}: {e}")
+        log.debug("Font cache entry %s unreadable: %s", path, e)
+        return None
 
-def register_all_fonts():
-    """Register all fonts dynamically"""
-    if not os.path.exists(ASSETS_DIR):
-        print(f"Font folder not found: {ASSETS_DIR}")
+def _write_face_state(digest: str, face: TTFontFace) -> None:
+    path = _cache_path(digest)
+    if not path:
         return
-    for family, paths in _scan_font_files().items():
-        _register_font_family(family, paths)
+    state = {k: v for k, v in face.__dict__.items() if k not in ("_ttf_data", "_pdfScale")}
+    try:
+        os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+        encoded = json.dumps(_encode_state(state), separators=(",", ":")).encode("utf-8")
+        with tempfile.NamedTemporaryFile(delete=False, dir=FONT_CACHE_DIR, suffix=".tmp") as tmp:
+            tmp.write(encoded)
+        os.replace(tmp.name, path)
+    except Exception as e:
+        log.debug("Font cache write failed for %s: %s", path, e)
+
+def _face_from_state(state: dict, data: bytes) -> TTFontFace:
+    face = TTFontFace.__new__(TTFontFace)
+    face.__dict__.update(state)
+    face._ttf_data = data
+    face._pdfScale = _pdf_scale(face.unitsPerEm)
+    return face
+
+def _font_from_face(name: str, face: TTFontFace) -> TTFont:
+    """Build a TTFont around an already parsed face (mirrors TTFont.__init__)."""
+    font = TTFont.__new__(TTFont)
+    font.fontName = name
+    font.face = face
+    font.encoding = TTEncoding()
+    font.state = WeakKeyDictionary()
+    font._asciiReadable = rl_config.ttfAsciiReadable
+    unshaped = getattr(ttfonts, "unShapedFontGlob", ())
+    font.shapable = not any(fnmatch(name, g) for g in unshaped)
+    return font
+
+class _MappedFile:
+    """File-like wrapper so TTFontFace keeps the map instead of a bytes copy."""
+
+    def __init__(self, data, name: str) -> None:
+        self._data = data
+        self.name = name
 
-    # Unicode fallbacks
-    for cid_font in ["HeiseiMin-W3", "STSong-Light", "HYSMyeongJo-Medium"]:
+    def read(self):
+        return self._data
+
+def _font_data(path: str):
+    """Contents of a font file: a shared read-only mmap, or bytes as fallback."""
+    if not FONT_MMAP:
+        with open(path, "rb") as f:
+            return f.read()
+    with _LOCK:
+        mm = _MAPS.get(path)
+        if mm is None:
+            try:
+                with open(path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                log.debug("mmap failed for %s (%s); reading into memory", path, e)
+                with open(path, "rb") as f:
+                    return f.read()
+            _MAPS[path] = mm
+        return mm
+
+def _load_ttfont(name: str, path: str) -> TTFont:
+    """Load a TTF, using the on-disk metrics cache when possible."""
+    data = _font_data(path)
+    digest = hashlib.sha256(data).hexdigest()
+
+    state = _read_face_state(digest)
+    if state is not None:
+        try:
+            font = _font_from_face(name, _face_from_state(state, data))
+            FONT_LOADS.inc(font=name, source="cache")
+            return font
+        except Exception as e:
+            log.debug("Font cache entry for %s unusable: %s", path, e)
+
+    face = TTFontFace(_MappedFile(data, path))
+    _write_face_state(digest, face)
+    FONT_LOADS.inc(font=name, source="parse")
+    return _font_from_face(name, face)
+
+# ---------- registration ----------
+def _register_font_family(name: str, paths: dict):
+    """Register one family (regular & bold)"""
+    with _LOCK:
+        if name in _DONE_FAMILIES:
+            return
+        _DONE_FAMILIES.add(name)
+        try:
+            if paths.get("regular"):
+                pdfmetrics.registerFont(_load_ttfont(name, paths["regular"]))
+                REGISTERED.add(name)
+            if paths.get("bold"):
+                pdfmetrics.registerFont(_load_ttfont(name + "-Bold", paths["bold"]))
+                REGISTERED.add(name + "-Bold")
+
+            # Mapping between normal and bold
+            addMapping(name, 0, 0, name)
+            if name + "-Bold" in REGISTERED:
+                addMapping(name, 0, 1, name + "-Bold")
+
+            log.debug("Registered font family: %s", name)
+        except Exception as e:
+            log.warning("Failed to register font %s: %s", name, e)
+
+def _register_cid_font(name: str) -> None:
+    with _LOCK:
+        if name in REGISTERED:
+            return
         try:
-            pdfmetrics.registerFont(UnicodeCIDFont(cid_font))
+            pdfmetrics.registerFont(UnicodeCIDFont(name))
+            REGISTERED.add(name)
         except Exception:
             pass
 
-# Run at import
-register_all_fonts()
+def ensure_font(font: str) -> bool:
+    """
+    Make sure ``font`` is registered, parsing its family on first use.
+
+    Returns:
+        bool: True if the font can be used (asset font, CID fallback,
+        standard PDF font or any font registered elsewhere).
+    """
+    if not font:
+        return False
+    if font in REGISTERED or font in pdfmetrics.standardFonts:
+        return True
+    font_index()
+    family = _NAMES.get(font)
+    if family:
+        _register_font_family(family, font_index()[family])
+        return font in REGISTERED
+    if font in CID_FONTS:
+        _register_cid_font(font)
+        return font in REGISTERED
+    return font in pdfmetrics._fonts  # registered elsewhere (dict lookup, no list copy)
 
-def ensure_font(font: str):
-    """Ensure font is registered before use"""
-    if font not in REGISTERED:
-        register_all_fonts()
+def available_fonts() -> set:
+    """Names usable without parsing anything yet (indexed + registered)."""
+    font_index()
+    return set(_NAMES) | set(CID_FONTS) | set(pdfmetrics.getRegisteredFontNames())
+
+def register_all_fonts():
+    """Register all fonts now (e.g. to parse them once in a parent before fork)."""
+    if not os.path.exists(ASSETS_DIR):
+        log.warning("Font folder not found: %s", ASSETS_DIR)
+        return
+    for family, paths in font_index().items():
+        _register_font_family(family, paths)
+    for cid_font in CID_FONTS:
+        _register_cid_font(cid_font)
 
 def rtl(text: str) -> str:
     """Placeholder for future Arabic shaping."""
     return text or ""
-
-from reportlab.pdfbase import pdfmetrics
-
-print("ًRegistered font names:")
-for f in pdfmetrics.getRegisteredFontNames():
-    print("   -", f)
-
@@ -0,0 +1,78 @@
+﻿# api/pdf_utils/frozen.py
+"""
+Read-only views over parsed JSON (themes, layouts).
+
+Parsed files are cached and shared between requests, so they are handed out
+as ``FrozenDict`` / ``FrozenList``: plain ``dict`` / ``list`` subclasses
+(``json.dumps``, ``isinstance`` and ``.get`` work as usual) that raise
+``TypeError`` on any in-place change. Use ``thaw`` (or ``copy.deepcopy``) to
+get a private, mutable copy. Pickling yields plain containers, so frozen
+values can be sent to the render worker processes.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+
+def _readonly(self, *args: Any, **kwargs: Any):
+    raise TypeError(f"{type(self).__name__} is read-only; use thaw() for a mutable copy")
+
+
+class FrozenDict(dict):
+    """``dict`` that refuses mutation."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict) -> dict:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """``list`` that refuses mutation."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo: dict) -> list:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+def freeze(obj: Any) -> Any:
+    """Recursively convert dicts/lists (and tuples) into frozen views."""
+    if isinstance(obj, FrozenDict | FrozenList):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return FrozenList(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Recursively copy frozen views (or any dict/list) into plain containers."""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+__all__ = ["FrozenDict", "FrozenList", "freeze", "thaw"]
@@ -0,0 +1,80 @@
+﻿# api/pdf_utils/hooks.py
+"""
+Observer hooks for ``LayoutEngine`` (profilers, metrics, debug overlays).
+
+Subclass ``RenderHook`` and override the events you need, then either pass
+instances to the engine (``LayoutEngine(..., hooks=[...])``) or register
+them for every render with ``add_hook``. With no hook registered the engine
+skips all of this: no timing calls, no page lookups.
+
+Hooks run inline in the render; keep them cheap and do not draw unless that
+is the point (debug overlays).
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .blocks.base import Frame
+    from .compiled_layout import CompiledBlock
+
+
+class RenderHook:
+    """Base observer; every event is a no-op until overridden."""
+
+    def before_block(self, block: "CompiledBlock", frame: "Frame", page: int) -> None:
+        """A block is about to render into ``frame`` on ``page`` (1-based)."""
+
+    def after_block(
+        self,
+        block: "CompiledBlock",
+        elapsed: float,
+        dy: float,
+        page: int,
+        error: Optional[Exception] = None,
+    ) -> None:
+        """A block finished.
+
+        Args:
+            block: The compiled block (``block.block.BLOCK_ID``, ``block.raw_id``).
+            elapsed: Seconds spent binding and rendering it (page-break retry
+                included).
+            dy: Vertical space it used (points, summed over pages for a
+                split block, 0 if it failed).
+            page: Page it ended on.
+            error: The exception if the block failed (it is skipped).
+        """
+
+    def page_break(self, page: int) -> None:
+        """The engine started page ``page`` because a block did not fit."""
+
+    def document_finished(self, pages: int) -> None:
+        """All blocks are placed; the document has ``pages`` pages."""
+
+
+_LOCK = threading.Lock()
+_HOOKS: Tuple[RenderHook, ...] = ()
+
+
+def add_hook(hook: RenderHook) -> RenderHook:
+    """Observe every render in this process (returns ``hook``)."""
+    global _HOOKS
+    with _LOCK:
+        if hook not in _HOOKS:
+            _HOOKS = (*_HOOKS, hook)
+    return hook
+
+
+def remove_hook(hook: RenderHook) -> None:
+    global _HOOKS
+    with _LOCK:
+        _HOOKS = tuple(h for h in _HOOKS if h is not hook)
+
+
+def global_hooks() -> Tuple[RenderHook, ...]:
+    return _HOOKS
+
+
+__all__ = ["RenderHook", "add_hook", "global_hooks", "remove_hook"]
@@ -1,7 +1,9 @@
 ﻿from __future__ import annotations
 
+import logging
+import threading
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
@@ -14,6 +16,8 @@ from reportlab.pdfbase.pdfmetrics import stringWidth
 
 ICONS_DIR = Path(__file__).parent / "assets" / "icons"
 
+log = logging.getLogger("resume.icons")
+
 def icon_path(name: str) -> Path:
     """
     Return the resolved path for a given icon name.
@@ -67,6 +71,73 @@ ICON_PATHS: dict[str, Path] = {}
 ICON_PATHS.update({k: v for k, v in DEFAULT_INFO_ICONS.items() if v and v.is_file()})
 ICON_PATHS.update({k: v for k, v in SECTION_ICON_PATHS.items() if v and v.is_file()})
 
+class IconAssets:
+    """
+    Decoded icons, loaded once per process and shared by every render.
+
+    Each icon is read and decoded (pixels and alpha mask) a single time;
+    drawing it again only hands the same reader to ``drawImage``, whose
+    document registry then reuses one image XObject per icon per PDF.
+    Missing or broken files are resolved when loading, so drawing never
+    touches the filesystem.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._readers: Dict[Path, Optional[ImageReader]] = {}
+
+    @staticmethod
+    def _decode(path: Path) -> Optional[ImageReader]:
+        if not path.is_file():
+            return None
+        try:
+            reader = ImageReader(str(path))
+            reader.getRGBData()
+            if reader._dataA is not None:
+                reader._dataA.getRGBData()
+            return reader
+        except Exception as exc:
+            log.warning("Icon %s could not be decoded: %s", path.name, exc)
+            return None
+
+    def load(self, directory: Path = ICONS_DIR) -> int:
+        """Decode every PNG in ``directory``; returns how many loaded."""
+        loaded = {p.resolve(): self._decode(p) for p in sorted(directory.glob("*.png"))}
+        with self._lock:
+            self._readers.update(loaded)
+        return sum(r is not None for r in loaded.values())
+
+    def reader(self, icon: Optional[Path]) -> Optional[ImageReader]:
+        """
+        Return the decoded reader for an icon path.
+
+        Args:
+            icon (Optional[Path]): Icon file (usually under ``ICONS_DIR``).
+
+        Returns:
+            Optional[ImageReader]: Shared reader, or None if the icon is missing.
+        """
+        if icon is None:
+            return None
+        try:
+            return self._readers[icon]
+        except KeyError:
+            pass
+        # Icons outside the preloaded set are decoded once, then remembered.
+        reader = self._decode(Path(icon))
+        with self._lock:
+            return self._readers.setdefault(icon, reader)
+
+_ICON_ASSETS = IconAssets()
+
+def get_icon_assets() -> IconAssets:
+    """Return the process-wide icon assets."""
+    return _ICON_ASSETS
+
+def preload_icons() -> int:
+    """Decode all bundled icons now (called at startup by the render workers)."""
+    return _ICON_ASSETS.load()
+
 def _text_width(text: str, font_name: str, font_size: int) -> float:
     """
     Calculate the width of a text string for a given font and size.
@@ -154,9 +225,9 @@ def draw_heading_with_icon(
         float: New y-coordinate after rendering.
     """
     draw_x = x
-    if icon and icon.is_file():
+    img = _ICON_ASSETS.reader(icon)
+    if img is not None:
         try:
-            img = ImageReader(str(icon))
             c.drawImage(img, draw_x, y - icon_h, width=icon_w, height=icon_h, mask="auto")
             draw_x += icon_w + pad_x
         except Exception:
@@ -177,6 +248,19 @@ def draw_heading_with_icon(
 
     return new_y
 
+def heading_height(
+    size: float,
+    *,
+    icon_h: float = 12,
+    underline_w: Optional[float] = None,
+    gap_below: float = 6.0,
+) -> float:
+    """Vertical space ``draw_heading_with_icon`` uses with the same arguments."""
+    h = max(icon_h, size) + gap_below
+    if underline_w and underline_w > 0:
+        h += gap_below
+    return h
+
 def draw_icon_line(
     c: canvas.Canvas,
     x: float,
@@ -219,9 +303,9 @@ def draw_icon_line(
         float: New y-coordinate after rendering.
     """
     draw_x = x
-    if icon and icon.is_file():
+    img = _ICON_ASSETS.reader(icon)
+    if img is not None:
         try:
-            img = ImageReader(str(icon))
             c.drawImage(img, draw_x, y - icon_h + 1, width=icon_w, height=icon_h, mask="auto")
             draw_x += icon_w + pad_x
         except Exception:
@@ -290,10 +374,14 @@ __all__ = [
     "icon_path",
     "get_section_icon",
     "draw_heading_with_icon",
+    "heading_height",
     "draw_icon_line",
     "info_line",
     "SECTION_ICON_PATHS",
     "DEFAULT_INFO_ICONS",
     "ICON_PATHS",
+    "IconAssets",
+    "get_icon_assets",
+    "preload_icons",
 ]
 
@@ -0,0 +1,193 @@
+﻿# api/pdf_utils/image_cache.py
+"""
+Process-wide cache of decoded images for image blocks (avatar photos, ...).
+
+``ImageReader(BytesIO(photo_bytes))`` decodes the photo again on every
+render; a preview loop on one profile decodes the same PNG/JPEG each click.
+``image_reader(data)`` returns a reader whose pixels are decoded once per
+process and shared, keyed by the SHA-256 of the image bytes.
+
+Eviction is a segmented LRU bounded by bytes (IMAGE_CACHE_MB, default 32;
+0 disables). A photo seen once sits in the probation segment; a second hit
+promotes it to the protected segment (at most 80% of the budget). A batch
+of one-off photos therefore only churns probation and cannot flush the
+photos users keep re-rendering. An image bigger than a quarter of the
+budget is decoded but not kept.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+from reportlab.lib.utils import ImageReader
+
+from .metrics import IMAGE_LOOKUPS
+
+PROTECTED_SHARE = 0.8
+MAX_ENTRY_SHARE = 0.25
+
+
+def _decoded(data: bytes) -> ImageReader:
+    """Reader with its pixels (and alpha mask) already decoded."""
+    reader = ImageReader(BytesIO(data))
+    reader.getRGBData()
+    if reader._dataA is not None:
+        reader._dataA.getRGBData()
+    return reader
+
+
+def _cost(data: bytes, reader: ImageReader) -> int:
+    """Bytes held by an entry: the source, the PIL image and the RGB buffer."""
+    pixels = len(reader._data or b"")
+    if reader._dataA is not None:
+        pixels += len(reader._dataA._data or b"")
+    return len(data) + 2 * pixels
+
+
+def _view(reader: ImageReader, data: bytes) -> ImageReader:
+    """Per-render reader sharing the decoded pixels but not the file pointer.
+
+    JPEGs are embedded straight from ``fp``; giving each caller its own
+    stream keeps concurrent renders from seeking under each other.
+    """
+    view = copy.copy(reader)
+    view.fp = BytesIO(data)
+    if "jpeg_fh" in view.__dict__:
+        view.jpeg_fh = view._jpeg_fh
+    return view
+
+
+class ImageCache:
+    """Byte-bounded segmented LRU of decoded ``ImageReader``s."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        # digest -> (source bytes, reader, cost); oldest first
+        self._probation: "OrderedDict[str, tuple]" = OrderedDict()
+        self._protected: "OrderedDict[str, tuple]" = OrderedDict()
+        self._probation_bytes = 0
+        self._protected_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "ImageCache":
+        try:
+            mb = float(os.getenv("IMAGE_CACHE_MB", "") or 32)
+        except ValueError:
+            mb = 32
+        return cls(int(mb * 1024 * 1024))
+
+    # ---------- lookup ----------
+    def reader(self, data: bytes) -> ImageReader:
+        """Decoded reader for ``data`` (raises like ``ImageReader`` on bad input)."""
+        if not self.max_bytes:
+            return ImageReader(BytesIO(data))
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._hit(digest)
+        if entry is not None:
+            IMAGE_LOOKUPS.inc(result="hit")
+            return _view(entry[1], data)
+
+        IMAGE_LOOKUPS.inc(result="miss")
+        reader = _decoded(data)
+        with self._lock:
+            self.misses += 1
+            self._put(digest, data, reader)
+        return _view(reader, data)
+
+    def _hit(self, digest: str) -> Optional[tuple]:
+        entry = self._protected.get(digest)
+        if entry is not None:
+            self._protected.move_to_end(digest)
+            self.hits += 1
+            return entry
+        entry = self._probation.pop(digest, None)
+        if entry is None:
+            return None
+        # Second use: promote, demoting protected overflow back to probation.
+        self.hits += 1
+        self._probation_bytes -= entry[2]
+        self._protected[digest] = entry
+        self._protected_bytes += entry[2]
+        limit = self.max_bytes * PROTECTED_SHARE
+        while self._protected_bytes > limit and len(self._protected) > 1:
+            old, demoted = self._protected.popitem(last=False)
+            self._protected_bytes -= demoted[2]
+            self._probation[old] = demoted
+            self._probation_bytes += demoted[2]
+        self._trim()
+        return entry
+
+    def _put(self, digest: str, data: bytes, reader: ImageReader) -> None:
+        if digest in self._probation or digest in self._protected:
+            return  # decoded concurrently by another thread
+        cost = _cost(data, reader)
+        if cost > self.max_bytes * MAX_ENTRY_SHARE:
+            self.rejected += 1
+            return
+        self._probation[digest] = (data, reader, cost)
+        self._probation_bytes += cost
+        self._trim()
+
+    def _trim(self) -> None:
+        while self._probation_bytes + self._protected_bytes > self.max_bytes:
+            segment = self._probation or self._protected
+            _, entry = segment.popitem(last=False)
+            if segment is self._probation:
+                self._probation_bytes -= entry[2]
+            else:
+                self._protected_bytes -= entry[2]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._probation.clear()
+            self._protected.clear()
+            self._probation_bytes = self._protected_bytes = 0
+
+    # ---------- stats ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "entries": len(self._probation) + len(self._protected),
+                "protected_entries": len(self._protected),
+                "bytes": self._probation_bytes + self._protected_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_CACHE: Optional[ImageCache] = None
+
+
+def get_image_cache() -> ImageCache:
+    """Return the process-wide image cache, configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ImageCache.from_env()
+    return _CACHE
+
+
+def image_reader(data: bytes) -> ImageReader:
+    """Shorthand for ``get_image_cache().reader(data)``; use in image blocks."""
+    return get_image_cache().reader(data)
+
+
+__all__ = ["ImageCache", "get_image_cache", "image_reader"]
@@ -6,7 +6,7 @@ from reportlab.pdfgen.canvas import Canvas
 
 from .blocks.base import Frame, RenderContext
 from .blocks.registry import get as get_block
-from .config import UI_LANG
+from .stylesheet import DEFAULT_STYLE, StyleSheet
 
 def _page_size_points(size: str, orientation: str):
     if size.upper() == "A4":
@@ -81,14 +81,17 @@ def compute_columns(layout: Dict[str, Any]) -> Dict[str, Any]:
         ]
     }
 
-def render_with_layout(c: Canvas, layout: Dict[str, Any], data_map: Dict[str, Any], ui_lang: str | None = None):
+def render_with_layout(c: Canvas, layout: Dict[str, Any], data_map: Dict[str, Any], ui_lang: str | None = None,
+                       style: StyleSheet | None = None):
     geom = compute_columns(layout)
     flow = layout.get("flow", [])
     overrides = layout.get("overrides", {})
 
+    style = style or DEFAULT_STYLE
     ctx: RenderContext = {
-        "ui_lang": ui_lang or UI_LANG,
-        "rtl_mode": (ui_lang or UI_LANG) == "ar",
+        "ui_lang": ui_lang or style.UI_LANG,
+        "rtl_mode": (ui_lang or style.UI_LANG) == "ar",
+        "style": style,
         "page_h": geom["page_h"],
         "page_top_y": geom["page_h"] - geom["margins"][1],
     }
@@ -0,0 +1,153 @@
+﻿# api/pdf_utils/measure.py
+"""
+Text measurement for word wrapping.
+
+``wrap_words`` is the single greedy line breaker used by ``text.wrap_text``
+(block engine) and ``builder._wrap_text``. It measures each word once and
+adds the width of a space between words, instead of re-measuring the whole
+candidate line for every word (quadratic in line length):
+
+- word widths are cached per (font, size) (bounded, cleared when full);
+- paragraphs of ``BATCH_MIN_CHARS`` or more in a TrueType font are measured
+  in one pass with NumPy, summing advances from the font's width table,
+  when NumPy is installed (optional dependency).
+
+Widths match ``pdfmetrics.stringWidth`` up to float rounding.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from .fonts import ensure_font
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # optional
+    np = None
+
+BATCH_MIN_CHARS = 400
+WORD_CACHE_SIZE = 4096  # words per (font, size)
+
+_LOCK = threading.Lock()
+_WORDS: Dict[Tuple[str, float], Dict[str, float]] = {}
+_ADVANCES: Dict[str, tuple] = {}  # font -> (advance table, default width)
+
+
+def _word_cache(font: str, size: float) -> Dict[str, float]:
+    key = (font, size)
+    cache = _WORDS.get(key)
+    if cache is None:
+        ensure_font(font)  # asset fonts are registered on first use
+        with _LOCK:
+            cache = _WORDS.setdefault(key, {})
+    return cache
+
+
+def word_width(word: str, font: str, size: float) -> float:
+    """Width of ``word`` in points (cached per font and size)."""
+    cache = _word_cache(font, size)
+    w = cache.get(word)
+    if w is None:
+        w = pdfmetrics.stringWidth(word, font, size)
+        if len(cache) >= WORD_CACHE_SIZE:
+            cache.clear()
+        cache[word] = w
+    return w
+
+
+def _advance_table(font: str):
+    """Glyph advances of a TrueType font indexed by code point (1/1000 em)."""
+    entry = _ADVANCES.get(font)
+    if entry is None:
+        face = pdfmetrics.getFont(font).face
+        widths = face.charWidths
+        table = np.full(max(widths, default=0) + 1, face.defaultWidth, dtype=np.float64)
+        table[np.fromiter(widths.keys(), dtype=np.int64)] = np.fromiter(widths.values(), dtype=np.float64)
+        entry = (table, face.defaultWidth)
+        with _LOCK:
+            _ADVANCES[font] = entry
+    return entry
+
+
+def _batch_widths(words: List[str], font: str, size: float) -> List[float]:
+    """Widths of many words at once from the font's advance table (NumPy)."""
+    table, default = _advance_table(font)
+    cps = np.frombuffer("".join(words).encode("utf-32-le"), dtype=np.uint32)
+    known = cps < len(table)
+    adv = np.full(len(cps), default, dtype=np.float64)
+    adv[known] = table[cps[known]]
+    ends = np.cumsum(np.fromiter((len(w) for w in words), dtype=np.int64, count=len(words)))
+    sums = np.concatenate(([0.0], np.cumsum(adv)))
+    per_word = sums[ends] - sums[np.concatenate(([0], ends[:-1]))]
+    return (per_word * (0.001 * size)).tolist()
+
+
+def _use_batch(text: str, font: str) -> bool:
+    if np is None or len(text) < BATCH_MIN_CHARS:
+        return False
+    try:
+        return isinstance(pdfmetrics.getFont(font), TTFont)
+    except Exception:
+        return False
+
+
+def wrap_words(
+    text: str,
+    max_w: float,
+    font: str = "Helvetica",
+    size: float = 10,
+    measure: Optional[Callable[[str], float]] = None,
+) -> List[str]:
+    """
+    Greedy word wrap of ``text`` into lines no wider than ``max_w``.
+
+    Whitespace runs collapse to single spaces; a word wider than ``max_w``
+    gets a line of its own.
+
+    Args:
+        measure: Width of a word in points, instead of measuring it in
+            ``font`` (e.g. ``FontStack.width`` for text drawn in several fonts).
+
+    Returns:
+        List[str]: The lines (``[""]`` for empty text).
+    """
+    words = str(text or "").split()
+    if not words:
+        return [""]
+
+    if measure is not None:
+        widths = [measure(w) for w in words]
+        space = measure(" ")
+    else:
+        if _use_batch(text, font):
+            widths = _batch_widths(words, font, size)
+        else:
+            widths = [word_width(w, font, size) for w in words]
+        space = word_width(" ", font, size)
+
+    lines: List[str] = []
+    start, cur_w = 0, widths[0]
+    for i in range(1, len(words)):
+        w = cur_w + space + widths[i]
+        if w <= max_w:
+            cur_w = w
+        else:
+            lines.append(" ".join(words[start:i]))
+            start, cur_w = i, widths[i]
+    lines.append(" ".join(words[start:]))
+    return lines
+
+
+def clear_caches() -> None:
+    """Drop cached widths (e.g. after re-registering a font under the same name)."""
+    with _LOCK:
+        _WORDS.clear()
+        _ADVANCES.clear()
+
+
+__all__ = ["wrap_words", "word_width", "clear_caches", "BATCH_MIN_CHARS"]
@@ -0,0 +1,251 @@
+﻿# api/pdf_utils/metrics.py
+"""
+Process-wide counters and histograms, exposed in the Prometheus text format
+(``GET /metrics``) without a client library.
+
+Render code records with ``BLOCK_SECONDS.observe(...)`` etc. Render workers
+run in other processes, so there ``buffer()`` is switched on: observations
+are queued, returned with each render (``drain()``) and replayed into the
+API process' registry (``apply()``) by the render executor.
+
+Values that already live elsewhere (queue depth, result cache counters) are
+read at scrape time by collectors (``register_collector``).
+
+Per-block timings of the layout engine come from a render hook that the
+processes collecting metrics install with ``install_block_hook()``; importing
+this module registers nothing, so other renders keep the hook-free fast path.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .hooks import RenderHook, add_hook
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# (name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+_METRICS: Dict[str, "_Metric"] = {}
+_COLLECTORS: List[Callable[[], Iterable[Family]]] = []
+_PENDING: Optional[List[Tuple[str, LabelKey, float]]] = None
+_PENDING_LOCK = threading.Lock()
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}" if body else ""
+
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        _METRICS[name] = self
+
+    def _record(self, key: LabelKey, value: float) -> None:
+        raise NotImplementedError
+
+    def _submit(self, labels: Dict[str, object], value: float) -> None:
+        key = _key(labels)
+        if _PENDING is not None:
+            with _PENDING_LOCK:
+                _PENDING.append((self.name, key, value))
+            return
+        self._record(key, value)
+
+    def lines(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str) -> None:
+        super().__init__(name, help)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self._submit(labels, amount)
+
+    def _record(self, key: LabelKey, value: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_fmt_labels(k)} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram (``_bucket``/``_sum``/``_count``) with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        self._submit(labels, value)
+
+    def _record(self, key: LabelKey, value: float) -> None:
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def lines(self) -> List[str]:
+        out: List[str] = []
+        with self._lock:
+            items = sorted((k, (list(c), t[0])) for k, (c, t) in self._values.items())
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                running += n
+                le = (("le", _fmt_value(bound)),)
+                out.append(f"{self.name}_bucket{_fmt_labels(key + le)} {running}")
+            out.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(key)} {running}")
+        return out
+
+
+def register_collector(fn: Callable[[], Iterable[Family]]) -> None:
+    """Add a callable returning metric families to render at scrape time."""
+    _COLLECTORS.append(fn)
+
+
+# ---------- worker side ----------
+def buffer() -> None:
+    """Queue observations in this process until ``drain()`` (render workers)."""
+    global _PENDING
+    _PENDING = []
+
+
+def drain() -> List[Tuple[str, LabelKey, float]]:
+    """Return and forget the queued observations (empty unless buffering)."""
+    if _PENDING is None:
+        return []
+    with _PENDING_LOCK:
+        out = list(_PENDING)
+        _PENDING.clear()
+    return out
+
+
+def apply(observations: Iterable[Tuple[str, LabelKey, float]]) -> None:
+    """Replay observations drained in another process into this registry."""
+    for name, key, value in observations:
+        metric = _METRICS.get(name)
+        if metric is not None:
+            metric._record(tuple(key), value)
+
+
+# ---------- exposition ----------
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    out: List[str] = []
+    for metric in list(_METRICS.values()):
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.lines())
+    for collector in list(_COLLECTORS):
+        for name, kind, help, samples in collector():
+            out.append(f"# HELP {name} {help}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(
+                f"{name}{_fmt_labels(sorted(labels.items()))} {_fmt_value(value)}"
+                for labels, value in samples
+            )
+    return "\n".join(out) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# ---------- render pipeline metrics ----------
+REQUEST_SECONDS = Histogram(
+    "resume_request_duration_seconds", "HTTP request latency by endpoint, theme and layout."
+)
+BLOCK_SECONDS = Histogram(
+    "resume_block_render_seconds", "Time to render one block (BLOCK_ID) into the canvas.", FAST_BUCKETS
+)
+PDF_PAGES = Counter("resume_pdf_pages_total", "Pages of the PDFs rendered (cache misses).")
+PDF_BYTES = Counter("resume_pdf_bytes_total", "Bytes of the PDFs rendered (cache misses).")
+FONT_LOADS = Counter("resume_font_loads_total", "TrueType fonts loaded, by source (cache or parse).")
+THEME_LOADS = Counter("resume_theme_loads_total", "Theme files parsed and compiled.")
+IMAGE_LOOKUPS = Counter("resume_image_cache_lookups_total", "Decoded-image cache lookups, by result (hit or miss).")
+
+
+class _BlockSecondsHook(RenderHook):
+    """Feeds ``BLOCK_SECONDS`` from the layout engine's block events."""
+
+    def after_block(self, block, elapsed, dy, page, error=None) -> None:
+        BLOCK_SECONDS.observe(elapsed, engine="blocks", block=block.block.BLOCK_ID)
+
+
+_BLOCK_HOOK = _BlockSecondsHook()
+
+
+def install_block_hook() -> None:
+    """Time every layout-engine block of this process into ``BLOCK_SECONDS`` (idempotent)."""
+    add_hook(_BLOCK_HOOK)
+
+
+def record_pdf(pdf: bytes, *, engine: str) -> None:
+    """Count the pages and bytes of a freshly rendered PDF."""
+    from .timing import count_pages
+
+    PDF_PAGES.inc(count_pages(pdf) or 0, engine=engine)
+    PDF_BYTES.inc(len(pdf), engine=engine)
+
+
+__all__ = [
+    "BLOCK_SECONDS",
+    "CONTENT_TYPE",
+    "Counter",
+    "FONT_LOADS",
+    "Family",
+    "Histogram",
+    "IMAGE_LOOKUPS",
+    "PDF_BYTES",
+    "PDF_PAGES",
+    "REQUEST_SECONDS",
+    "THEME_LOADS",
+    "apply",
+    "buffer",
+    "drain",
+    "install_block_hook",
+    "record_pdf",
+    "register_collector",
+    "render",
+]
@@ -0,0 +1,75 @@
+﻿# api/pdf_utils/stylesheet.py
+"""
+Immutable, per-theme style values for the block renderer.
+
+A ``StyleSheet`` holds every styling constant from ``config.py`` (same
+upper-case names) with the theme applied: colors are resolved ReportLab
+``Color`` objects, sizes/gaps are floats in points. It is compiled once per
+theme and handed to blocks through ``RenderContext["style"]``, so renders
+with different themes can run side by side in one process without touching
+the ``config`` module.
+"""
+
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from . import config as _cfg
+
+
+def _config_defaults() -> Dict[str, Any]:
+    """Snapshot of the upper-case constants defined in ``config.py``."""
+    return {k: getattr(_cfg, k) for k in dir(_cfg) if k.isupper()}
+
+
+class StyleSheet(Mapping[str, Any]):
+    """
+    Read-only mapping of style keys with attribute access.
+
+    Example:
+        style.HEADING_COLOR      # -> reportlab Color
+        style["TEXT_SIZE"]       # -> float (points)
+    """
+
+    __slots__ = ("_values", "name")
+
+    def __init__(self, values: Mapping[str, Any], name: str = "default") -> None:
+        object.__setattr__(self, "_values", MappingProxyType(dict(values)))
+        object.__setattr__(self, "name", name)
+
+    def __getattr__(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            raise AttributeError(f"StyleSheet has no key {key!r}") from None
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError("StyleSheet is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"<StyleSheet {self.name!r} ({len(self._values)} keys)>"
+
+    def replace(self, name: Optional[str] = None, **values: Any) -> "StyleSheet":
+        """Return a copy with some values replaced."""
+        return StyleSheet({**self._values, **values}, name=name or self.name)
+
+
+DEFAULT_STYLE = StyleSheet(_config_defaults(), name="default")
+
+
+def style_from_ctx(ctx: Mapping[str, Any]) -> StyleSheet:
+    """Style sheet of a render context, falling back to the config defaults."""
+    return ctx.get("style") or DEFAULT_STYLE
+
+
+__all__ = ["StyleSheet", "DEFAULT_STYLE", "style_from_ctx"]
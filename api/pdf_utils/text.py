@@ -9,6 +9,8 @@ from typing import List, Any
 from reportlab.pdfgen import canvas
 from reportlab.lib.colors import HexColor
 from api.pdf_utils.rtl import rtl as _rtl_unified  # unified RTL
+from api.pdf_utils.fonts import ensure_font
+from api.pdf_utils.measure import wrap_words
 
 # ---------- core word-wrap ----------
 def wrap_text(
@@ -18,21 +20,11 @@ def wrap_text(
     font: str = "Helvetica",
     size: int = 10,
 ) -> List[str]:
-    c.setFont(font, size)
-    words = str(text or "").split()
-    lines: List[str] = []
-    cur = ""
-    for w in words:
-        test = (cur + " " + w).strip()
-        if c.stringWidth(test, font, size) <= max_w:
-            cur = test
-        else:
-            if cur:
-                lines.append(cur)
-            cur = w
-    if cur:
-        lines.append(cur)
-    return lines or [""]
+    """Split ``text`` into lines no wider than ``max_w`` (see measure.wrap_words).
+
+    Measures only; the canvas font is left unchanged.
+    """
+    return wrap_words(text, max_w, font, size)
 
 # ---------- paragraph drawing ----------
 def draw_paragraph(
@@ -52,6 +44,8 @@ def draw_paragraph(
     if is_rtl:
         raw = _rtl_unified(raw)
     lines = wrap_text(c, raw, w, font, size)
+    ensure_font(font)
+    c.setFont(font, size)
     for ln in lines:
         if is_rtl:
             c.drawRightString(x + w, y, ln)
@@ -60,6 +54,20 @@ def draw_paragraph(
         y -= leading
     return y
 
+def paragraph_height(
+    text: str,
+    w: float,
+    leading: float,
+    font: str = "Helvetica",
+    size: int = 10,
+    is_rtl: bool = False,
+) -> float:
+    """Vertical space ``draw_paragraph`` uses with the same arguments."""
+    if not text:
+        return 0.0
+    raw = _rtl_unified(str(text)) if is_rtl else str(text)
+    return len(wrap_words(raw, w, font, size)) * leading
+
 # ---------- aliases expected by legacy blocks ----------
 def draw_par(
     c: canvas.Canvas,
@@ -109,6 +117,7 @@ __all__ = [
     "wrap_text",
     "draw_paragraph",
     "draw_par",       # alias
+    "paragraph_height",
     "pct_to_width",
     "pct_to_w",      # alias
     "deep_update",
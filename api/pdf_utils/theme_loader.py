@@ -1,14 +1,19 @@
 ﻿from __future__ import annotations
 
 import json
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 
 from .themes import DEFAULT_THEME
 from . import config as cfg
+from .frozen import FrozenDict, freeze
+from .metrics import THEME_LOADS
+from .stylesheet import DEFAULT_STYLE, StyleSheet
 
 THEMES_DIR = Path(__file__).resolve().parents[2] / "themes"
 
@@ -71,20 +76,30 @@ def _deep_merge(dst: dict, src: dict) -> dict:
             dst[k] = v
     return dst
 
+def _read_theme_file(theme_name: str, path: Path) -> dict:
+    if not path.exists():
+        print(f"[WARN] Theme '{theme_name}' not found at {path}")
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        print(f"[WARN] Failed to parse theme '{theme_name}': {e}")
+        return {}
+
 def load_theme(theme_name: Optional[str]) -> dict:
-    theme = json.loads(json.dumps(DEFAULT_THEME))
-    if not theme_name:
-        return theme
-    p = THEMES_DIR / f"{theme_name}.theme.json"
-    if p.exists():
-        try:
-            user = json.loads(p.read_text(encoding="utf-8"))
-            _deep_merge(theme, user)
-        except Exception as e:
-            print(f"[WARN] Failed to parse theme '{theme_name}': {e}")
-    else:
-        print(f"[WARN] Theme '{theme_name}' not found at {p}")
-    return theme
+    """
+    Return a theme merged over ``DEFAULT_THEME``.
+
+    The result is shared between callers (see ``ThemeRepository``) and is a
+    read-only ``FrozenDict``; use ``frozen.thaw`` for a mutable copy.
+
+    Args:
+        theme_name (Optional[str]): Theme name to load.
+
+    Returns:
+        dict: Merged theme.
+    """
+    return get_theme_repository().get(theme_name).theme
 
 COLOR_KEYS = {
     "LEFT_BG", "LEFT_BORDER", "HEADING_COLOR", "SUBHEAD_COLOR",
@@ -119,70 +134,218 @@ BOOL_KEYS = {"LEFT_TEXT_IS_BOLD", "USE_LINKEDIN_REDIRECT", "USE_MOBILE_LINKEDIN"
 
 FONT_KEYS = {"AR_FONT", "LATIN_FONT", "LATIN_BOLD_FONT"}
 
-def _apply_style_map(style: Dict[str, Any]) -> None:
+def _resolve_style_map(style: Dict[str, Any]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
     for key, val in (style or {}).items():
         try:
             if key in COLOR_KEYS:
-                setattr(cfg, key, _to_hex_color(val))
+                out[key] = _to_hex_color(val)
             elif key in MM_KEYS:
-                setattr(cfg, key, _parse_number_with_mm(val))
+                out[key] = _parse_number_with_mm(val)
             elif key in PT_KEYS:
-                setattr(cfg, key, float(val))
+                out[key] = float(val)
             elif key in STRING_KEYS:
-                setattr(cfg, key, str(val))
+                out[key] = str(val)
             elif key in BOOL_KEYS:
-                setattr(cfg, key, bool(val))
+                out[key] = bool(val)
             elif key in FONT_KEYS:
-                setattr(cfg, key, str(val))
+                out[key] = str(val)
         except Exception as e:
             print(f"[WARN] Failed to apply style key {key}={val!r}: {e}")
+    return out
 
-def _apply_legacy_sections(theme: dict) -> None:
+def _resolve_legacy_sections(theme: dict) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
     for k, v in (theme.get("colors") or {}).items():
         if k.lower() in {"heading", "heading_color"}:
-            cfg.HEADING_COLOR = _to_hex_color(v)
+            out["HEADING_COLOR"] = _to_hex_color(v)
         elif k.lower() in {"subhead", "subhead_color"}:
-            cfg.SUBHEAD_COLOR = _to_hex_color(v)
+            out["SUBHEAD_COLOR"] = _to_hex_color(v)
         elif k.lower() in {"text", "muted", "body"}:
-            cfg.MUTED = _to_hex_color(v)
+            out["MUTED"] = _to_hex_color(v)
         elif k.lower() in {"rule", "rule_color"}:
-            cfg.RULE_COLOR = _to_hex_color(v)
+            out["RULE_COLOR"] = _to_hex_color(v)
         elif k.lower() in {"left_bg", "panel_bg"}:
-            cfg.LEFT_BG = _to_hex_color(v)
+            out["LEFT_BG"] = _to_hex_color(v)
         elif k.lower() in {"left_border", "panel_border"}:
-            cfg.LEFT_BORDER = _to_hex_color(v)
-
-    for k, v in (theme.get("sizes") or {}).items():
-        name = k.upper()
-        try:
-            setattr(cfg, name, float(v))
-        except Exception:
-            pass
+            out["LEFT_BORDER"] = _to_hex_color(v)
 
-    for k, v in (theme.get("spacing") or {}).items():
-        name = k.upper()
-        try:
-            setattr(cfg, name, float(v))
-        except Exception:
-            pass
+    for section in ("sizes", "spacing"):
+        for k, v in (theme.get(section) or {}).items():
+            try:
+                out[k.upper()] = float(v)
+            except Exception:
+                pass
 
     for k, v in (theme.get("fonts") or {}).items():
-        name = k.upper()
+        out[k.upper()] = str(v)
+    return out
+
+def resolve_theme_values(theme: dict) -> Dict[str, Any]:
+    """
+    Resolve a theme into style values keyed like ``config.py``.
+
+    Colors become ReportLab ``Color`` objects and sizes become floats in
+    points. Nothing global is touched.
+
+    Args:
+        theme (dict): Theme dictionary (as returned by ``load_theme``).
+
+    Returns:
+        Dict[str, Any]: Upper-case style keys overridden by the theme.
+    """
+    values = _resolve_legacy_sections(theme)
+    values.update(_resolve_style_map(theme.get("style") or {}))
+    return values
+
+def compile_style_sheet(theme: dict, name: Optional[str] = None) -> StyleSheet:
+    """
+    Build an immutable ``StyleSheet``: config defaults with the theme applied.
+
+    Args:
+        theme (dict): Theme dictionary.
+        name (Optional[str]): Theme name, kept for debugging.
+
+    Returns:
+        StyleSheet: Compiled style values.
+    """
+    return DEFAULT_STYLE.replace(name=name or "default", **resolve_theme_values(theme))
+
+def _file_version(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat() if path else None
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size) if st else None
+
+@dataclass
+class ThemeEntry:
+    """One parsed theme file; every view is shared and read-only."""
+
+    name: str
+    path: Optional[Path]
+    version: Optional[Tuple[int, int]]
+    raw: FrozenDict                 # file contents as written ({} if missing)
+    theme: FrozenDict               # DEFAULT_THEME merged with ``raw``
+    style: StyleSheet               # compiled style values
+    _derived: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    def derived(self, key: str, factory: Callable[["ThemeEntry"], Any]) -> Any:
+        """
+        Memoize a value computed from this entry (e.g. a route's inline layout).
+
+        The value lives as long as the entry, i.e. until the file changes.
+        """
         try:
-            setattr(cfg, name, str(v))
-        except Exception:
-            pass
+            return self._derived[key]
+        except KeyError:
+            return self._derived.setdefault(key, freeze(factory(self)))
+
+class ThemeRepository:
+    """
+    Parses, merges and compiles each theme once.
+
+    Entries are keyed by theme name and checked against the file's
+    ``mtime``/size on every lookup (one ``stat``); an edited theme is reloaded
+    on the next request. Names without a theme file (they come from request
+    payloads) are not cached: they share the defaults-only entry of ``""``.
+    """
+
+    def __init__(self, themes_dir: Path = THEMES_DIR) -> None:
+        self.themes_dir = Path(themes_dir)
+        self._entries: Dict[Tuple[str, bool], ThemeEntry] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def path_for(self, theme_name: str, *, prefer_fixed: bool = False) -> Path:
+        p = self.themes_dir / f"{theme_name}.theme.json"
+        if prefer_fixed:
+            fixed = p.with_suffix(p.suffix + ".fixed")
+            if fixed.exists():
+                return fixed
+        return p
+
+    def get(self, theme_name: Optional[str], *, prefer_fixed: bool = False) -> ThemeEntry:
+        """
+        Return the cached entry of a theme, (re)loading it if the file changed.
+
+        Args:
+            theme_name (Optional[str]): Theme name; empty means defaults only.
+            prefer_fixed (bool): Read ``<name>.theme.json.fixed`` when present.
+
+        Returns:
+            ThemeEntry: Shared, read-only theme views.
+        """
+        name = theme_name or ""
+        path = self.path_for(name, prefer_fixed=prefer_fixed) if name else None
+        version = _file_version(path)
+        if path is not None and version is None:
+            print(f"[WARN] Theme '{name}' not found at {path}")
+            return self.get(None)
+        key = (name, prefer_fixed)
+        entry = self._entries.get(key)
+        if entry is not None and entry.path == path and entry.version == version:
+            return entry
+
+        raw = _read_theme_file(name, path) if path else {}
+        theme = _deep_merge(json.loads(json.dumps(DEFAULT_THEME)), raw)
+        entry = ThemeEntry(
+            name=name,
+            path=path,
+            version=version,
+            raw=freeze(raw),
+            theme=freeze(theme),
+            style=compile_style_sheet(theme, name=theme_name),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self.loads += 1
+        THEME_LOADS.inc(theme=name if version is not None else "unknown")
+        return entry
+
+    def invalidate(self, theme_name: Optional[str] = None) -> None:
+        """Forget one theme (or all of them)."""
+        with self._lock:
+            if theme_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == theme_name]:
+                    del self._entries[key]
+
+_REPOSITORY: Optional[ThemeRepository] = None
+
+def get_theme_repository() -> ThemeRepository:
+    """Return the process-wide theme repository."""
+    global _REPOSITORY
+    if _REPOSITORY is None:
+        _REPOSITORY = ThemeRepository()
+    return _REPOSITORY
+
+def load_style_sheet(theme_name: Optional[str]) -> StyleSheet:
+    """
+    Return the compiled ``StyleSheet`` of a theme (cached by the repository).
+
+    Args:
+        theme_name (Optional[str]): Theme name to load.
+
+    Returns:
+        StyleSheet: Compiled style values (shared, read-only).
+    """
+    return get_theme_repository().get(theme_name).style
 
 def apply_theme_to_config(theme: dict) -> None:
     """
     Apply theme settings to the global configuration module.
 
+    Kept for callers outside the block renderer; the renderer itself passes a
+    ``StyleSheet`` through the render context instead (see
+    ``compile_style_sheet``).
+
     Args:
         theme (dict): Theme dictionary to apply.
     """
-    _apply_legacy_sections(theme)
-    style = theme.get("style") or {}
-    _apply_style_map(style)
+    for key, val in resolve_theme_values(theme).items():
+        setattr(cfg, key, val)
 
 def load_and_apply(theme_name: Optional[str]) -> dict:
     """
@@ -0,0 +1,93 @@
+﻿# api/pdf_utils/timing.py
+"""
+Per-request stage timings (reported in the ``Server-Timing`` header).
+
+Code marks stages with ``with stage("theme"): ...``. Nothing is recorded
+unless a caller opened a ``collect()`` scope in the same context (request
+task, render worker call), so library code can mark stages unconditionally
+at the cost of one ContextVar lookup.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Mapping, Optional
+
+_CURRENT: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+_TOKEN_RE = re.compile(r"[^A-Za-z0-9_\-.]")
+_PAGES_RE = re.compile(rb"/Count (\d+)[^>]*/Type /Pages")
+
+
+class StageTimer:
+    """Ordered stage name -> milliseconds (repeated stages accumulate)."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def merge(self, stages: Mapping[str, float]) -> None:
+        for name, ms in stages.items():
+            self.add(name, ms)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, *, total: bool = True) -> str:
+        """``Server-Timing`` header value, e.g. ``validate;dur=0.4, draw;dur=12.1``."""
+        parts = [f"{_TOKEN_RE.sub('_', k)};dur={v:.1f}" for k, v in self.stages.items()]
+        if total:
+            parts.append(f"total;dur={self.elapsed_ms():.1f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def collect() -> Iterator[StageTimer]:
+    """Record the stages marked in this context into a new ``StageTimer``."""
+    timer = StageTimer()
+    token = _CURRENT.set(timer)
+    try:
+        yield timer
+    finally:
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage into the current collector (no-op without one)."""
+    timer = _CURRENT.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def record(stages: Mapping[str, float]) -> None:
+    """Add stages measured elsewhere (e.g. in a render worker)."""
+    timer = _CURRENT.get()
+    if timer is not None:
+        timer.merge(stages)
+
+
+def count_pages(pdf: bytes) -> Optional[int]:
+    """Page count of a ReportLab-written PDF (from its page tree root)."""
+    counts = [int(m.group(1)) for m in _PAGES_RE.finditer(pdf)]
+    return max(counts) if counts else None
+
+
+__all__ = ["StageTimer", "collect", "count_pages", "record", "stage"]
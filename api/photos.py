@@ -0,0 +1,155 @@
+﻿"""Uploaded photos, referenced by id instead of resent as base64 on every render.
+
+``POST /photos`` stores the raw image bytes once and returns a ``photo_id``
+(the SHA-256 of the bytes, so re-uploading the same photo is a no-op).
+Renders then carry only ``photo_id`` (or send the image as a part of a
+``multipart/form-data`` request), and the id is resolved to bytes just
+before the render, after the result-cache lookup.
+
+Uploads are written through to the blob store (``api.blob_store``, shared
+with the photos of saved profiles), so an id once returned stays valid
+across evictions and restarts; an upload that cannot be written is an
+error, never a dangling id. Process memory only holds a read cache of
+recently used photos, least recently used dropped first.
+
+Configuration (environment variables):
+- PHOTO_STORE_MB : memory budget of the photo read cache (default: 64)
+- PHOTO_MAX_MB   : largest accepted upload (default: 5)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from api.blob_store import get_blob_store
+
+# Leading bytes of the formats reportlab/Pillow decode for avatar_circle.
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _mb(name: str, default: float) -> int:
+    try:
+        return int(float(os.getenv(name, "") or default) * 1024 * 1024)
+    except ValueError:
+        return int(default * 1024 * 1024)
+
+
+def max_upload_bytes() -> int:
+    return _mb("PHOTO_MAX_MB", 5)
+
+
+def sniff_image(data: bytes) -> Optional[str]:
+    """MIME type of ``data`` from its signature, or None if not a supported image."""
+    for magic, mime in _SIGNATURES:
+        if data.startswith(magic):
+            return mime
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def photo_id(data: bytes) -> str:
+    """Content address of a photo (hex SHA-256)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_photo_id(value: Any) -> bool:
+    return isinstance(value, str) and bool(_ID_RE.match(value))
+
+
+class PhotoStore:
+    """Photos by ``photo_id``: the blob store, read through a memory LRU bounded by bytes."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._photos: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "PhotoStore":
+        return cls(_mb("PHOTO_STORE_MB", 64))
+
+    def put(self, data: bytes) -> str:
+        """Write ``data`` to the blob store, cache it, and return its id.
+
+        Raises:
+            OSError: If the blob could not be written; no id is handed out.
+        """
+        pid = get_blob_store().put(data)
+        self._cache(pid, data)
+        return pid
+
+    def _cache(self, pid: str, data: bytes) -> None:
+        with self._lock:
+            if pid in self._photos:
+                self._photos.move_to_end(pid)
+                return
+            if len(data) > self.max_bytes:
+                return  # still served from the blob store
+            self._photos[pid] = data
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._photos:
+                _, old = self._photos.popitem(last=False)
+                self._bytes -= len(old)
+
+    def get(self, pid: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._photos.get(pid)
+            if data is not None:
+                self._photos.move_to_end(pid)
+                self.hits += 1
+                return data
+        data = get_blob_store().get(pid)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._cache(pid, data)
+        return data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._photos),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_STORE: Optional[PhotoStore] = None
+
+
+def get_photo_store() -> PhotoStore:
+    """Return the process-wide photo store, configured from the environment."""
+    global _STORE
+    if _STORE is None:
+        _STORE = PhotoStore.from_env()
+    return _STORE
+
+
+__all__ = [
+    "PhotoStore",
+    "get_photo_store",
+    "is_photo_id",
+    "max_upload_bytes",
+    "photo_id",
+    "sniff_image",
+]
@@ -0,0 +1,284 @@
+﻿"""In-memory index of saved profiles for listing, paging and search.
+
+``/api/profiles/list`` used to glob and sort the whole profiles directory on
+every call. The index is built once (first use / startup), kept current by
+the save and delete routes, and answers:
+
+- pages of names in order, resumed from an opaque cursor
+  (bisect + slice: O(log n + page));
+- name prefix search, case-insensitive (same cost);
+- full-text search over names, titles and skills (inverted index: the
+  cost is the size of the smallest matching token's posting list; only
+  the requested page of hits is ordered).
+
+Files added or removed behind the API's back are noticed through the
+directory's mtime (one ``stat`` per lookup): the directory is listed and
+only the added names are read, the removed ones dropped. A file changed in
+place outside the API does not touch the directory's mtime and is not
+picked up (its search terms stay those of the last save or rebuild).
+"""
+
+from __future__ import annotations
+
+import base64
+import bisect
+import heapq
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+log = logging.getLogger("resume.profiles")
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+
+def _tokens(text: Any) -> Set[str]:
+    return {t.casefold() for t in _TOKEN_RE.findall(str(text or ""))}
+
+
+def query_terms(query: str) -> Set[str]:
+    """Tokens of a search query, normalized like the indexed terms."""
+    return _tokens(query)
+
+
+def _first(item: Any) -> Any:
+    """Title of a project/education entry: first cell of a list, or dict title/name."""
+    if isinstance(item, (list, tuple)):
+        return item[0] if item else ""
+    if isinstance(item, dict):
+        return item.get("title") or item.get("name") or ""
+    return str(item or "").splitlines()[0] if item else ""
+
+
+def search_terms(name: str, profile: Any) -> Set[str]:
+    """Searchable tokens of a profile: its name, skills and project/education titles.
+
+    These are the fields of the saved ``Profile`` model (api/routes/profiles.py).
+    """
+    terms = _tokens(name)
+    if not isinstance(profile, dict):
+        return terms
+    for skill in profile.get("skills") or []:
+        terms |= _tokens(skill)
+    for key in ("projects", "education"):
+        for item in profile.get(key) or []:
+            terms |= _tokens(_first(item))
+    return terms
+
+
+def encode_cursor(name: str) -> str:
+    return base64.urlsafe_b64encode(name.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed cursor."""
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        return base64.b64decode(cursor + pad, altchars=b"-_", validate=True).decode("utf-8")
+    except Exception as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+def _key(name: str) -> Tuple[str, str]:
+    # Case-insensitive order; ties broken by the exact name.
+    return (name.casefold(), name)
+
+
+class ProfileIndex:
+    """Sorted names + inverted token index of the ``*.json`` profiles in ``root``."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._keys: List[Tuple[str, str]] = []
+        self._terms: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._dir_mtime: Optional[int] = None
+        self.built = False
+
+    # ---------- maintenance ----------
+    def _stat(self) -> Optional[int]:
+        try:
+            return self.root.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def rebuild(self) -> int:
+        """Re-read every profile in ``root``; returns the number indexed."""
+        with self._lock:
+            self._keys, self._terms, self._postings = [], {}, {}
+            mtime = self._stat()
+            for path in self.root.glob("*.json") if mtime is not None else ():
+                self._index_terms(path.stem, self._read(path))
+                self._keys.append(_key(path.stem))
+            self._keys.sort()
+            self._dir_mtime = mtime
+            self.built = True
+            log.info("Profile index: %d profiles in %s", len(self._keys), self.root)
+            return len(self._keys)
+
+    def _read(self, path: Path) -> Any:
+        try:
+            return json.loads(path.read_text(encoding="utf-8-sig"))
+        except (OSError, ValueError) as exc:
+            log.warning("Profile index: skipping %s: %s", path.name, exc)
+            return None
+
+    def _fresh(self) -> None:
+        if not self.built:
+            self.rebuild()
+            return
+        mtime = self._stat()
+        if mtime == self._dir_mtime:
+            return
+        # Only names changed: index the new files, drop the vanished ones.
+        names = {p.stem for p in self.root.glob("*.json")} if mtime is not None else set()
+        added = names.difference(self._terms)
+        removed = set(self._terms).difference(names)
+        for name in removed:
+            self._drop(name)
+        for name in added:
+            self._index_terms(name, self._read(self.root / f"{name}.json"))
+            bisect.insort(self._keys, _key(name))
+        self._dir_mtime = mtime
+        if added or removed:
+            log.info("Profile index: +%d -%d profiles in %s", len(added), len(removed), self.root)
+
+    def _index_terms(self, name: str, profile: Any) -> None:
+        terms = search_terms(name, profile)
+        self._terms[name] = terms
+        for t in terms:
+            self._postings.setdefault(t, set()).add(name)
+
+    def _drop(self, name: str) -> bool:
+        terms = self._terms.pop(name, None)
+        if terms is None:
+            return False
+        for t in terms:
+            names = self._postings.get(t)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._postings[t]
+        i = bisect.bisect_left(self._keys, _key(name))
+        if i < len(self._keys) and self._keys[i] == _key(name):
+            del self._keys[i]
+        return True
+
+    def upsert(self, name: str, profile: Any) -> None:
+        """Record a saved profile (call after the file is written)."""
+        with self._lock:
+            if not self.built:
+                self.rebuild()
+            self._drop(name)
+            self._index_terms(name, profile)
+            bisect.insort(self._keys, _key(name))
+            self._dir_mtime = self._stat()
+
+    def remove(self, name: str) -> None:
+        """Forget a deleted profile (call after the file is removed)."""
+        with self._lock:
+            if not self.built:
+                self.rebuild()
+            self._drop(name)
+            self._dir_mtime = self._stat()
+
+    # ---------- lookups ----------
+    def __len__(self) -> int:
+        with self._lock:
+            self._fresh()
+            return len(self._keys)
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self._fresh()
+            return [name for _, name in self._keys]
+
+    def page(
+        self,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        prefix: str = "",
+        query: str = "",
+    ) -> Tuple[List[str], Optional[str]]:
+        """
+        One page of profile names in (case-insensitive) name order.
+
+        Args:
+            limit: Page size.
+            cursor: ``next_cursor`` of the previous page (None for the first).
+            prefix: Only names starting with this (case-insensitive).
+            query: Only profiles containing every word of this in their
+                name, title, skills or project/education titles.
+
+        Returns:
+            Tuple[List[str], Optional[str]]: The names and the cursor of the
+            next page (None when this is the last one).
+
+        Raises:
+            ValueError: On a malformed cursor.
+        """
+        after = _key(decode_cursor(cursor)) if cursor else None
+        pre = prefix.casefold()
+        with self._lock:
+            self._fresh()
+            if query.strip():
+                keys, start = self._search(query, pre, after, limit + 1), 0
+            else:
+                keys = self._keys
+                start = bisect.bisect_left(keys, (pre, ""))
+                if after is not None:
+                    start = max(start, bisect.bisect_right(keys, after))
+            out: List[str] = []
+            for folded, name in keys[start : start + limit + 1]:
+                if not folded.startswith(pre):
+                    break
+                out.append(name)
+        more = len(out) > limit
+        out = out[:limit]
+        return out, (encode_cursor(out[-1]) if more and out else None)
+
+    def _search(
+        self, query: str, prefix: str, after: Optional[Tuple[str, str]], count: int
+    ) -> List[Tuple[str, str]]:
+        """The first ``count`` keys, in order, of the profiles matching every
+        token of ``query`` that sort at or after ``prefix`` and after ``after``.
+
+        Only those ``count`` keys are ordered (a bounded heap), not every hit.
+        """
+        postings = [self._postings.get(t, set()) for t in query_terms(query)]
+        if not postings:
+            return []
+        postings.sort(key=len)
+        hits: Iterable[str] = postings[0].intersection(*postings[1:])
+        lo = (prefix, "")
+        keys = (k for k in map(_key, hits) if k >= lo and (after is None or k > after))
+        return heapq.nsmallest(count, keys)
+
+
+_INDEX: Optional[ProfileIndex] = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_profile_index(root: Path) -> ProfileIndex:
+    """Return the process-wide index of ``root`` (a new one if the directory changed)."""
+    global _INDEX
+    root = Path(root)
+    with _INDEX_LOCK:
+        if _INDEX is None or _INDEX.root != root:
+            _INDEX = ProfileIndex(root)
+        return _INDEX
+
+
+__all__ = [
+    "ProfileIndex",
+    "decode_cursor",
+    "encode_cursor",
+    "get_profile_index",
+    "query_terms",
+    "search_terms",
+]
@@ -0,0 +1,304 @@
+﻿"""Storage backends for saved profiles (``/api/profiles/*``).
+
+The profiles router talks to a ``ProfileStore``; two backends exist:
+
+- ``DirectoryProfileStore``: one ``<name>.json`` per profile in PROFILES_DIR
+  (the original layout). Writes go to a temp file renamed over the target,
+  so readers never see a half-written profile; listing and search use the
+  in-memory ``ProfileIndex``.
+- ``SQLiteProfileStore``: one row per profile in a SQLite database in WAL
+  mode (readers do not block the writer nor each other, several API
+  processes can share it). Names and search terms are indexed tables, so
+  pages and searches are index range scans.
+
+Both order names case-insensitively and share the cursor format of
+``api.profile_index``.
+
+Configuration (environment variables):
+- PROFILE_STORE : ``dir`` (default) or ``sqlite``
+- PROFILE_DB    : SQLite file (default: ``profiles.sqlite3`` in PROFILES_DIR)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from api.profile_index import (
+    ProfileIndex,
+    decode_cursor,
+    encode_cursor,
+    get_profile_index,
+    query_terms,
+    search_terms,
+)
+
+log = logging.getLogger("resume.profiles")
+
+Page = Tuple[List[str], Optional[str]]  # (names, next cursor)
+
+# Read once at import (os.umask can only be read by setting it).
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(path: Path) -> int:
+    """Permission bits for rewriting ``path``: its current ones, else 0o666 & ~umask."""
+    try:
+        return path.stat().st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+class ProfileStore:
+    """Interface of a profile backend; names are validated by the caller."""
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """The profile saved as ``name``, or None."""
+        raise NotImplementedError
+
+    def put(self, name: str, profile: Dict[str, Any]) -> None:
+        """Create or replace ``name`` atomically."""
+        raise NotImplementedError
+
+    def delete(self, name: str) -> bool:
+        """Remove ``name``; False if it did not exist."""
+        raise NotImplementedError
+
+    def names(self) -> List[str]:
+        """All names, case-insensitive order."""
+        raise NotImplementedError
+
+    def page(self, *, limit: int, cursor: Optional[str] = None, prefix: str = "", query: str = "") -> Page:
+        """One page of names (see ``ProfileIndex.page`` for the arguments)."""
+        raise NotImplementedError
+
+    def reindex(self) -> int:
+        """Rebuild derived lookup structures; returns the number of profiles."""
+        return len(self.names())
+
+    def import_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Save many (name, profile) pairs; returns how many were written."""
+        count = 0
+        for name, profile in items:
+            self.put(name, profile)
+            count += 1
+        return count
+
+    def export_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Every (name, profile), in name order."""
+        for name in self.names():
+            profile = self.get(name)
+            if profile is not None:
+                yield name, profile
+
+
+# ─────────────────────────────────────────────────────────────
+# Directory backend
+# ─────────────────────────────────────────────────────────────
+class DirectoryProfileStore(ProfileStore):
+    """``<root>/<name>.json`` files, indexed in memory."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    @property
+    def index(self) -> ProfileIndex:
+        return get_profile_index(self.root)
+
+    def _path(self, name: str) -> Path:
+        return (self.root / f"{name}.json").resolve()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._path(name).read_text(encoding="utf-8-sig"))
+        except FileNotFoundError:
+            return None
+
+    def put(self, name: str, profile: Dict[str, Any]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        target = self._path(name)
+        data = json.dumps(profile, ensure_ascii=False, indent=2)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", delete=False, dir=str(self.root), prefix=".", suffix=".tmp"
+        ) as tmp:
+            tmp.write(data)
+            tmp_path = Path(tmp.name)
+        # NamedTemporaryFile creates 0600 files; keep the mode a plain write would give.
+        os.chmod(tmp_path, _file_mode(target))
+        tmp_path.replace(target)
+        self.index.upsert(name, profile)
+
+    def delete(self, name: str) -> bool:
+        try:
+            self._path(name).unlink()
+        except FileNotFoundError:
+            return False
+        self.index.remove(name)
+        return True
+
+    def names(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return self.index.names()
+
+    def page(self, *, limit: int, cursor: Optional[str] = None, prefix: str = "", query: str = "") -> Page:
+        if not self.root.exists():
+            return [], None
+        return self.index.page(limit=limit, cursor=cursor, prefix=prefix, query=query)
+
+    def reindex(self) -> int:
+        if not self.root.exists():
+            return 0
+        return self.index.rebuild()
+
+
+# ─────────────────────────────────────────────────────────────
+# SQLite backend
+# ─────────────────────────────────────────────────────────────
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    name      TEXT PRIMARY KEY,
+    name_fold TEXT NOT NULL,
+    data      TEXT NOT NULL,
+    updated   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_fold ON profiles (name_fold, name);
+CREATE TABLE IF NOT EXISTS profile_terms (
+    term TEXT NOT NULL,
+    name TEXT NOT NULL REFERENCES profiles (name) ON DELETE CASCADE,
+    PRIMARY KEY (term, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS profile_terms_name ON profile_terms (name);
+"""
+
+# Upper bound for a prefix range scan: prefix <= name_fold < prefix + _MAX_CHAR
+_MAX_CHAR = "\U0010ffff"
+
+
+class SQLiteProfileStore(ProfileStore):
+    """Profiles as rows of a WAL-mode SQLite database (one connection per thread)."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), isolation_level=None, timeout=30)
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            self._local.db = db
+        return db
+
+    def _write(self, db: sqlite3.Connection, name: str, profile: Dict[str, Any], now: float) -> None:
+        db.execute(
+            "INSERT INTO profiles (name, name_fold, data, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (name) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+            (name, name.casefold(), json.dumps(profile, ensure_ascii=False), now),
+        )
+        db.execute("DELETE FROM profile_terms WHERE name = ?", (name,))
+        db.executemany(
+            "INSERT INTO profile_terms (term, name) VALUES (?, ?)",
+            ((t, name) for t in search_terms(name, profile)),
+        )
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self._db().execute("SELECT data FROM profiles WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, name: str, profile: Dict[str, Any]) -> None:
+        self.import_many([(name, profile)])
+
+    def import_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Write all items in one transaction."""
+        db = self._db()
+        now = time.time()
+        count = 0
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for name, profile in items:
+                self._write(db, name, profile, now)
+                count += 1
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return count
+
+    def delete(self, name: str) -> bool:
+        cur = self._db().execute("DELETE FROM profiles WHERE name = ?", (name,))
+        return cur.rowcount > 0
+
+    def names(self) -> List[str]:
+        rows = self._db().execute("SELECT name FROM profiles ORDER BY name_fold, name").fetchall()
+        return [r[0] for r in rows]
+
+    def page(self, *, limit: int, cursor: Optional[str] = None, prefix: str = "", query: str = "") -> Page:
+        pre = prefix.casefold()
+        where = ["p.name_fold >= ?", "p.name_fold < ?"]
+        args: List[Any] = [pre, pre + _MAX_CHAR]
+        if cursor:
+            after = decode_cursor(cursor)
+            where.append("(p.name_fold, p.name) > (?, ?)")
+            args += [after.casefold(), after]
+        for term in sorted(query_terms(query)):
+            where.append("EXISTS (SELECT 1 FROM profile_terms t WHERE t.term = ? AND t.name = p.name)")
+            args.append(term)
+        sql = (
+            f"SELECT p.name FROM profiles p WHERE {' AND '.join(where)} "
+            "ORDER BY p.name_fold, p.name LIMIT ?"
+        )
+        rows = self._db().execute(sql, (*args, limit + 1)).fetchall()
+        names = [r[0] for r in rows[:limit]]
+        return names, (encode_cursor(names[-1]) if len(rows) > limit and names else None)
+
+    def export_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        rows = self._db().execute("SELECT name, data FROM profiles ORDER BY name_fold, name")
+        for name, data in rows:
+            yield name, json.loads(data)
+
+
+# ─────────────────────────────────────────────────────────────
+# Selection
+# ─────────────────────────────────────────────────────────────
+_STORES: Dict[Tuple[str, str], ProfileStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_profile_store(profiles_dir: Path) -> ProfileStore:
+    """Return the configured backend for ``profiles_dir`` (one instance per location)."""
+    kind = (os.getenv("PROFILE_STORE") or "dir").strip().lower()
+    if kind not in ("dir", "sqlite"):
+        log.warning("Unknown PROFILE_STORE=%r; using the directory store.", kind)
+        kind = "dir"
+    if kind == "sqlite":
+        where = str(Path(os.getenv("PROFILE_DB") or Path(profiles_dir) / "profiles.sqlite3").resolve())
+    else:
+        where = str(Path(profiles_dir).resolve())
+    with _STORES_LOCK:
+        store = _STORES.get((kind, where))
+        if store is None:
+            store = SQLiteProfileStore(Path(where)) if kind == "sqlite" else DirectoryProfileStore(Path(where))
+            _STORES[(kind, where)] = store
+        return store
+
+
+__all__ = [
+    "DirectoryProfileStore",
+    "ProfileStore",
+    "SQLiteProfileStore",
+    "get_profile_store",
+]
@@ -0,0 +1,302 @@
+﻿"""Render executor for the PDF generation endpoints.
+
+ReportLab rendering is pure Python and holds the GIL, so running it on the
+event loop (or on Starlette's small thread pool) gives one core of throughput
+and stalls every other request. The routes therefore submit renders here and
+await the result; the heavy work happens in a pool of worker processes that
+preload fonts, themes and the block registry once at start-up.
+
+Configuration (environment variables):
+- RENDER_WORKERS            : number of worker processes (default: CPU count).
+                              ``0`` renders in-process on a thread (dev/tests).
+- RENDER_WORKER_CONCURRENCY : renders dispatched to each worker at once
+                              (default: 1). Values > 1 keep the next job
+                              queued inside the worker so it never idles
+                              waiting for a round trip.
+- RENDER_QUEUE_SIZE         : renders allowed to wait for a free slot
+                              (default: 64). When full, ``RenderQueueFull``
+                              is raised and the routes answer 503.
+- RENDER_START_METHOD       : multiprocessing start method (default: platform
+                              default; "fork" shares preloaded pages with
+                              the parent).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import gc
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from api.pdf_utils import metrics
+
+log = logging.getLogger("resume.render")
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when both the worker slots and the wait queue are full."""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+# ─────────────────────────────────────────────────────────────
+# Worker side
+# ─────────────────────────────────────────────────────────────
+def preload() -> None:
+    """Warm per-process state: font index, block registry, icons and theme files.
+
+    Fonts themselves are parsed lazily on first use (see ``fonts.ensure_font``).
+    """
+    from api.pdf_utils import blocks  # noqa: F401  (registers all blocks)
+    from api.pdf_utils import fonts
+    from api.pdf_utils.icons import preload_icons
+    from api.pdf_utils.theme_loader import THEMES_DIR, load_theme
+
+    fonts.font_index()
+    preload_icons()
+    for p in sorted(THEMES_DIR.glob("*.theme.json")):
+        try:
+            load_theme(p.name[: -len(".theme.json")])
+        except Exception as exc:  # a broken theme must not kill the worker
+            log.warning("Theme preload failed for %s: %s", p.name, exc)
+
+
+def _preload_parent() -> None:
+    """Parse fonts and decode icons in the parent so forked workers share them copy-on-write.
+
+    ``gc.freeze()`` moves everything allocated so far out of the collector's
+    generations, so later collections in the workers do not touch (and
+    un-share) those pages.
+    """
+    from api.pdf_utils import fonts
+    from api.pdf_utils.icons import preload_icons
+
+    fonts.register_all_fonts()
+    preload_icons()
+    gc.freeze()
+
+
+def _init_worker() -> None:
+    # Ctrl+C is handled by the parent; workers exit when the pool shuts down.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    metrics.buffer()
+    metrics.install_block_hook()
+    preload()
+
+
+def _call_collecting(call: Callable[[], Any]) -> Tuple[Any, list]:
+    """Run ``call`` in a worker and return its metric observations with the result."""
+    return call(), metrics.drain()
+
+
+def render_pdf(data: Dict[str, Any], *, engine: str = "builder") -> bytes:
+    """Render one PDF inside a worker.
+
+    Args:
+        data: The ``data`` mapping accepted by ``build_resume_pdf``.
+        engine: ``"builder"`` for ``api.pdf_utils.builder`` (the simple
+            column builder) or ``"blocks"`` for ``api.pdf_utils.resume``
+            (the block registry / layout engine).
+
+    Returns:
+        bytes: The rendered PDF.
+    """
+    if engine == "blocks":
+        from api.pdf_utils.resume import build_resume_pdf
+    elif engine == "builder":
+        from api.pdf_utils.builder import build_resume_pdf
+    else:
+        raise ValueError(f"Unknown render engine: {engine!r}")
+    return build_resume_pdf(data=data)
+
+
+def render_pdf_timed(data: Dict[str, Any], *, engine: str = "builder") -> Tuple[bytes, Dict[str, float]]:
+    """Like ``render_pdf``, also returning the stages timed inside the worker.
+
+    Returns:
+        Tuple[bytes, Dict[str, float]]: The PDF and stage name -> milliseconds
+        (see ``api.pdf_utils.timing``).
+    """
+    from api.pdf_utils import timing
+
+    with timing.collect() as timer:
+        pdf = render_pdf(data, engine=engine)
+    return pdf, timer.stages
+
+
+# ─────────────────────────────────────────────────────────────
+# Parent side
+# ─────────────────────────────────────────────────────────────
+class RenderExecutor:
+    """Bounded, awaitable front-end over a process pool."""
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        per_worker_concurrency: int = 1,
+        queue_size: int = 64,
+        start_method: Optional[str] = None,
+    ) -> None:
+        self.workers = max(0, int(workers))
+        self.per_worker_concurrency = max(1, int(per_worker_concurrency))
+        self.queue_size = max(0, int(queue_size))
+        self.start_method = start_method or None
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._sem_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiting = 0
+        self._running = 0
+
+    @classmethod
+    def from_env(cls) -> "RenderExecutor":
+        return cls(
+            _env_int("RENDER_WORKERS", os.cpu_count() or 1),
+            per_worker_concurrency=_env_int("RENDER_WORKER_CONCURRENCY", 1),
+            queue_size=_env_int("RENDER_QUEUE_SIZE", 64),
+            start_method=os.getenv("RENDER_START_METHOD") or None,
+        )
+
+    # ---------- lifecycle ----------
+    @property
+    def slots(self) -> int:
+        """Renders that may run (or sit in a worker's inbox) at the same time."""
+        return max(1, self.workers) * self.per_worker_concurrency
+
+    def start(self) -> None:
+        """Create the process pool (idempotent)."""
+        if self.workers == 0:
+            preload()
+            return
+        with self._lock:
+            if self._pool is not None:
+                return
+            ctx = multiprocessing.get_context(self.start_method) if self.start_method else None
+            if (ctx or multiprocessing).get_start_method() == "fork":
+                _preload_parent()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=ctx,
+                initializer=_init_worker,
+            )
+            log.info(
+                "Render pool started: workers=%s per_worker=%s queue=%s",
+                self.workers, self.per_worker_concurrency, self.queue_size,
+            )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        """Replace ``broken`` with a fresh pool, unless that already happened.
+
+        A worker crash fails every render in flight on the pool; only the
+        first of them swaps the pool, so the others do not shut down the
+        replacement (and cancel the renders already queued on it).
+        """
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+        log.warning("Render pool broken; restarting.")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    # ---------- submission ----------
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._sem is None or self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.slots)
+            self._sem_loop = loop
+        return self._sem
+
+    async def run(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result.
+
+        ``fn`` and its arguments must be picklable (module-level functions,
+        plain data) unless the executor runs in-process.
+
+        Raises:
+            RenderQueueFull: If every slot is busy and the wait queue is full.
+        """
+        sem = self._semaphore()
+        if sem.locked() and self._waiting >= self.queue_size:
+            raise RenderQueueFull(
+                f"Render queue is full ({self._waiting} waiting, {self.slots} running)"
+            )
+
+        self._waiting += 1
+        try:
+            await sem.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            call = functools.partial(fn, *args, **kwargs)
+            loop = asyncio.get_running_loop()
+            if self.workers == 0:
+                return await loop.run_in_executor(None, call)
+            if self._pool is None:
+                self.start()
+            pool = self._pool
+            try:
+                result, observed = await loop.run_in_executor(
+                    pool, functools.partial(_call_collecting, call)
+                )
+            except BrokenProcessPool:
+                self._restart(pool)
+                raise
+            metrics.apply(observed)
+            return result
+        finally:
+            self._running -= 1
+            sem.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Current occupancy, e.g. for health checks."""
+        return {
+            "workers": self.workers,
+            "slots": self.slots,
+            "running": self._running,
+            "waiting": self._waiting,
+            "queue_size": self.queue_size,
+        }
+
+
+_EXECUTOR: Optional[RenderExecutor] = None
+
+
+def get_render_executor() -> RenderExecutor:
+    """Return the process-wide executor, configured from the environment."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        _EXECUTOR = RenderExecutor.from_env()
+    return _EXECUTOR
+
+
+__all__ = [
+    "RenderExecutor",
+    "RenderQueueFull",
+    "get_render_executor",
+    "preload",
+    "render_pdf",
+    "render_pdf_timed",
+]
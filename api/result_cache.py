@@ -0,0 +1,375 @@
+﻿"""Content-addressed cache for rendered PDFs.
+
+Users hit "Generate" repeatedly on the same profile/theme/layout, so renders
+are cached under a canonical hash of everything that affects the output:
+engine + engine version, theme name + theme file version, the effective
+``layout_inline``, the profile, ``ui_lang`` and ``rtl_mode``.
+
+Two tiers:
+- memory: LRU bounded by total bytes (RESULT_CACHE_MB, default 64; 0 disables)
+- disk  : optional, survives restarts (RESULT_CACHE_DIR; bounded by
+          RESULT_CACHE_DISK_MB, default 512)
+
+The disk tier does blocking file I/O; async handlers use ``aget``/``aput``,
+which run it in a worker thread so a slow disk does not stall the event loop.
+
+Every entry records the theme/layout files it was rendered from with their
+``mtime``/size, and those versions are part of the key. When one of those
+files changes on disk, memory entries depending on it are dropped; disk
+entries are keyed by the old versions, so they are never read again and are
+left to the size trim (RESULT_CACHE_DISK_MB) to remove.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from api.pdf_utils import ENGINE_VERSION
+
+log = logging.getLogger("resume.cache")
+
+MISSING = "missing"
+
+
+def file_version(path: Path) -> str:
+    """Cheap version stamp for a file: ``"<mtime_ns>-<size>"`` or ``"missing"``."""
+    try:
+        st = path.stat()
+    except OSError:
+        return MISSING
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return "sha256:" + hashlib.sha256(bytes(obj)).hexdigest()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    return repr(obj)
+
+
+def canonical_hash(obj: Any) -> str:
+    """SHA-256 of the canonical JSON form of ``obj`` (sorted keys, no spaces)."""
+    blob = json.dumps(
+        obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_json_default
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    """Digest of the render inputs plus the files the render depends on."""
+
+    digest: str
+    deps: Tuple[Tuple[str, str], ...] = field(default=())  # ((path, version), ...)
+
+    def __str__(self) -> str:
+        return self.digest
+
+
+class ResultCache:
+    """Two-tier (memory LRU + optional disk) PDF cache with hit/miss counters."""
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        *,
+        disk_dir: Optional[Path] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+    ) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        self._deps_of: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        self._keys_by_dep: Dict[str, Set[str]] = {}
+        self._dep_versions: Dict[str, str] = {}
+        self._disk_puts = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.invalidations = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        def _mb(name: str, default: int) -> int:
+            try:
+                return int(float(os.getenv(name, "") or default) * 1024 * 1024)
+            except ValueError:
+                return default * 1024 * 1024
+
+        disk = os.getenv("RESULT_CACHE_DIR") or None
+        return cls(
+            _mb("RESULT_CACHE_MB", 64),
+            disk_dir=Path(disk).resolve() if disk else None,
+            disk_max_bytes=_mb("RESULT_CACHE_DISK_MB", 512),
+        )
+
+    # ---------- keys ----------
+    def make_key(
+        self,
+        *,
+        engine: str,
+        theme_name: str,
+        layout_inline: Any,
+        profile: Any,
+        ui_lang: str,
+        rtl_mode: bool,
+        deps: Iterable[Path] = (),
+    ) -> CacheKey:
+        """Build the cache key for one render.
+
+        ``deps`` are the theme/layout files the render reads; their current
+        versions become part of the key and are remembered for invalidation.
+        """
+        dep_versions = tuple((str(p), file_version(Path(p))) for p in deps)
+        self._check_deps(dep_versions)
+        digest = canonical_hash(
+            {
+                "engine": engine,
+                "engine_version": ENGINE_VERSION,
+                "theme": theme_name,
+                "files": dep_versions,
+                "layout": layout_inline,
+                "profile": profile,
+                "ui_lang": ui_lang,
+                "rtl_mode": bool(rtl_mode),
+            }
+        )
+        return CacheKey(digest=digest, deps=dep_versions)
+
+    # ---------- lookup ----------
+    def _mem_get(self, key: CacheKey) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key.digest)
+            if data is not None:
+                self._mem.move_to_end(key.digest)
+                self.hits += 1
+                self.memory_hits += 1
+            return data
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        data = self._mem_get(key)
+        if data is not None:
+            return data
+        return self._tier2_get(key)
+
+    def _tier2_get(self, key: CacheKey) -> Optional[bytes]:
+        data = self._disk_get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._mem_put(key, data)
+        return data
+
+    def put(self, key: CacheKey, data: bytes) -> None:
+        with self._lock:
+            self._mem_put(key, data)
+        self._disk_put(key, data)
+
+    # ---------- async (event loop) ----------
+    async def aget(self, key: CacheKey) -> Optional[bytes]:
+        """``get`` for async handlers: memory hits inline, disk reads in a thread."""
+        data = self._mem_get(key)
+        if data is not None:
+            return data
+        if not self.disk_dir:
+            return self._tier2_get(key)  # no I/O, just counts the miss
+        return await asyncio.to_thread(self._tier2_get, key)
+
+    async def aput(self, key: CacheKey, data: bytes) -> None:
+        """``put`` for async handlers: disk writes (and trims) in a thread."""
+        with self._lock:
+            self._mem_put(key, data)
+        if self.disk_dir:
+            await asyncio.to_thread(self._disk_put, key, data)
+
+    # ---------- invalidation ----------
+    def _check_deps(self, dep_versions: Tuple[Tuple[str, str], ...]) -> None:
+        """Drop every entry built from a file whose version has changed."""
+        stale: List[str] = []
+        with self._lock:
+            for path, version in dep_versions:
+                seen = self._dep_versions.get(path)
+                if seen is not None and seen != version:
+                    stale.append(path)
+                self._dep_versions[path] = version
+        for path in stale:
+            self.invalidate(path)
+
+    def invalidate(self, path: Optional[str | Path] = None) -> int:
+        """Drop entries depending on ``path`` (or everything if ``None``)."""
+        with self._lock:
+            if path is None:
+                keys = list(self._mem.keys())
+            else:
+                keys = list(self._keys_by_dep.pop(str(path), set()))
+            for k in keys:
+                self._mem_drop(k)
+            self.invalidations += len(keys)
+        if self.disk_dir and path is None:
+            for p in self.disk_dir.glob("*/*"):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+        # Disk entries of a single file are unreachable (their key has the
+        # old file version) and go with the size trim.
+        if keys:
+            log.info("Result cache: invalidated %s entries (%s)", len(keys), path or "all")
+        return len(keys)
+
+    def clear(self) -> None:
+        self.invalidate(None)
+
+    # ---------- memory tier ----------
+    def _mem_put(self, key: CacheKey, data: bytes) -> None:
+        if not self.max_bytes or len(data) > self.max_bytes:
+            return
+        if key.digest in self._mem:
+            self._mem.move_to_end(key.digest)
+            return
+        self._mem[key.digest] = data
+        self._mem_bytes += len(data)
+        self._deps_of[key.digest] = key.deps
+        for path, _ in key.deps:
+            self._keys_by_dep.setdefault(path, set()).add(key.digest)
+        while self._mem_bytes > self.max_bytes and self._mem:
+            oldest = next(iter(self._mem))
+            self._mem_drop(oldest)
+
+    def _mem_drop(self, digest: str) -> None:
+        data = self._mem.pop(digest, None)
+        if data is not None:
+            self._mem_bytes -= len(data)
+        for path, _ in self._deps_of.pop(digest, ()):
+            keys = self._keys_by_dep.get(path)
+            if keys:
+                keys.discard(digest)
+
+    # ---------- disk tier ----------
+    def _disk_paths(self, digest: str) -> Tuple[Path, Path]:
+        assert self.disk_dir is not None
+        sub = self.disk_dir / digest[:2]
+        return sub / f"{digest}.pdf", sub / f"{digest}.json"
+
+    def _disk_get(self, key: CacheKey) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        pdf_path, meta_path = self._disk_paths(key.digest)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            deps = [tuple(x) for x in meta.get("deps") or []]
+            if any(file_version(Path(p)) != v for p, v in deps):
+                pdf_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                return None
+            data = pdf_path.read_bytes()
+            os.utime(pdf_path)  # LRU order for trimming
+            return data
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, key: CacheKey, data: bytes) -> None:
+        if not self.disk_dir or len(data) > self.disk_max_bytes:
+            return
+        pdf_path, meta_path = self._disk_paths(key.digest)
+        try:
+            pdf_path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(pdf_path, data)
+            _atomic_write(
+                meta_path,
+                json.dumps({"deps": list(key.deps), "size": len(data)}).encode("utf-8"),
+            )
+        except OSError as exc:
+            log.warning("Result cache: disk write failed: %s", exc)
+            return
+        self._disk_puts += 1
+        if self._disk_puts % 32 == 0:
+            self._disk_trim()
+
+    def _disk_trim(self) -> None:
+        """Delete least-recently-used disk entries until under budget."""
+        if not self.disk_dir:
+            return
+        entries = []
+        total = 0
+        for p in self.disk_dir.glob("*/*.pdf"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+            total += st.st_size
+        entries.sort()
+        for _, size, p in entries:
+            if total <= self.disk_max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            p.with_suffix(".json").unlink(missing_ok=True)
+            total -= size
+
+    # ---------- stats ----------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "entries": len(self._mem),
+                "bytes": self._mem_bytes,
+                "max_bytes": self.max_bytes,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+
+def _atomic_write(target: Path, data: bytes) -> None:
+    with tempfile.NamedTemporaryFile(delete=False, dir=str(target.parent), suffix=".tmp") as tmp:
+        tmp.write(data)
+        tmp_path = Path(tmp.name)
+    tmp_path.replace(target)
+
+
+_CACHE: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache, configured from the environment."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ResultCache.from_env()
+    return _CACHE
+
+
+__all__ = [
+    "CacheKey",
+    "ResultCache",
+    "canonical_hash",
+    "file_version",
+    "get_result_cache",
+]
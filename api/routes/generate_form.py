@@ -1,16 +1,20 @@
 ﻿from __future__ import annotations
 
-import json
 import traceback
 from io import BytesIO
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
 from fastapi.responses import StreamingResponse
 
+from api.http_cache import etag_matches, key_etag, not_modified
 from api.schemas import GenerateFormRequest
-from ..pdf_utils.resume import build_resume_pdf
+from api.render_executor import RenderQueueFull, get_render_executor, render_pdf
+from api.result_cache import get_result_cache
+from api.pdf_utils import metrics
+from api.pdf_utils.compiled_layout import load_layout_file
+from api.pdf_utils.theme_loader import get_theme_repository
 
 # Try importing block registry
 try:
@@ -41,13 +45,6 @@ def _prefer_fixed(path: Path) -> Path:
     fixed = path.with_suffix(path.suffix + ".fixed")
     return fixed if fixed.exists() else path
 
-def _safe_json_read(path: Path) -> Dict[str, Any]:
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception as e:
-        print(f"[Warn] Failed to read JSON: {path} -> {e}")
-        return {}
-
 def _normalize_layout_list(items: List[Any]) -> List[Dict[str, Any]]:
     """Normalize layout items to a list of block_id dictionaries."""
     out: List[Dict[str, Any]] = []
@@ -72,10 +69,11 @@ def _normalize_layout_value(layout_value: Any) -> Dict[str, Any]:
     }
 
 def _build_layout_inline_from_theme(theme_name: Optional[str]) -> Dict[str, Any]:
-    """Build inline layout by reading from a theme file."""
-    theme_name = theme_name or "default"
-    p = _prefer_fixed(THEMES_DIR / f"{theme_name}.theme.json")
-    theme = _safe_json_read(p)
+    """Inline layout declared by a theme file (built once per theme version, read-only)."""
+    entry = get_theme_repository().get(theme_name or "default", prefer_fixed=True)
+    return entry.derived("layout_inline", lambda e: _layout_inline_from_theme_dict(e.raw))
+
+def _layout_inline_from_theme_dict(theme: Dict[str, Any]) -> Dict[str, Any]:
     try:
         assert_valid_theme(theme)
     except Exception as e:
@@ -94,13 +92,29 @@ def _load_layout_inline(layout_name: Optional[str]) -> Dict[str, Any]:
     if not layout_name:
         return {}
     p = _prefer_fixed(LAYOUTS_DIR / f"{layout_name}.layout.json")
-    obj = _safe_json_read(p)
+    try:
+        entry = load_layout_file(p)
+    except Exception as e:
+        print(f"[Warn] Failed to read JSON: {p} -> {e}")
+        return {}
+    return entry.derived("layout_inline", lambda f: _validated_layout_value(f.data))
+
+def _validated_layout_value(obj: Dict[str, Any]) -> Dict[str, Any]:
     try:
         assert_valid_layout(obj)
     except Exception as e:
         print("[Warn] layout validation:", e)
     return _normalize_layout_value(obj)
 
+def _source_files(theme_name: Optional[str], layout_name: Optional[str]) -> List[Path]:
+    """Theme/layout files a render reads (including .fixed variants), for cache keys."""
+    theme_p = THEMES_DIR / f"{theme_name or 'default'}.theme.json"
+    files = [theme_p, theme_p.with_suffix(theme_p.suffix + ".fixed")]
+    if layout_name:
+        layout_p = LAYOUTS_DIR / f"{layout_name}.layout.json"
+        files += [layout_p, layout_p.with_suffix(layout_p.suffix + ".fixed")]
+    return files
+
 def _merge_layouts(theme_inline: Dict[str, Any], layout_inline: Dict[str, Any]) -> Dict[str, Any]:
     """Merge theme and layout structures, giving priority to the layout."""
     merged = dict(theme_inline or {})
@@ -131,12 +145,18 @@ def _extract_wanted_block_ids(merged_inline: Dict[str, Any]) -> List[str]:
                 wanted.append(it["block_id"])
     return wanted
 
+def _is_registered(block_id: str) -> bool:
+    try:
+        return get_block(block_id) is not None
+    except KeyError:
+        return False
+
 def _preflight(merged_inline: dict, profile: dict) -> None:
     """Run pre-checks for required blocks and missing profile data."""
     wanted_raw = _extract_wanted_block_ids(merged_inline)
     wanted_base = [(bid.split(":")[0] if isinstance(bid, str) else "") for bid in wanted_raw]
 
-    not_registered: List[str] = [b for b in wanted_base if b and get_block(b) is None]
+    not_registered: List[str] = [b for b in wanted_base if b and not _is_registered(b)]
 
     key_map = {
         "header_name": "header",
@@ -197,12 +217,17 @@ def _apply_overrides_to_layout(merged_inline: Dict[str, Any]) -> Dict[str, Any]:
 # ------------------------------- route -------------------------------
 
 @router.post("/generate-form-simple")
-async def generate_form_simple(req: GenerateFormRequest):
+async def generate_form_simple(
+    req: GenerateFormRequest,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Generate a PDF resume from provided profile, theme, and layout configuration.
 
     Args:
         req (GenerateFormRequest): The request containing profile, layout, and theme info.
+        if_none_match (Optional[str]): ``ETag`` of a previous response; a match
+            gets ``304 Not Modified`` before any cache lookup or render.
 
     Returns:
         StreamingResponse: The generated PDF resume.
@@ -232,16 +257,43 @@ async def generate_form_simple(req: GenerateFormRequest):
             "layout_inline": merged_inline,
         }
 
-        pdf_bytes = build_resume_pdf(data=data)
+        cache = get_result_cache()
+        cache_key = cache.make_key(
+            engine="blocks",
+            theme_name=data["theme_name"],
+            layout_inline=merged_inline,
+            profile=prof,
+            ui_lang=data["ui_lang"],
+            rtl_mode=data["rtl_mode"],
+            deps=_source_files(req.theme_name, req.layout_name),
+        )
+        etag = key_etag(cache_key)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, {"Cache-Control": "no-cache"})
+
+        pdf_bytes = await cache.aget(cache_key)
+        cache_status = "HIT"
+        if pdf_bytes is None:
+            cache_status = "MISS"
+            pdf_bytes = await get_render_executor().run(render_pdf, data, engine="blocks")
+            metrics.record_pdf(pdf_bytes, engine="blocks")
+            await cache.aput(cache_key, pdf_bytes)
 
         return StreamingResponse(
             BytesIO(pdf_bytes),
             media_type="application/pdf",
-            headers={"Content-Disposition": f'inline; filename="resume-{req.theme_name or "default"}.pdf"'},
+            headers={
+                "Content-Disposition": f'inline; filename="resume-{req.theme_name or "default"}.pdf"',
+                "Cache-Control": "no-cache",
+                "ETag": etag,
+                "X-Cache": cache_status,
+            },
         )
 
     except HTTPException:
         raise
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         print("[Error] /generate-form-simple:")
         print(traceback.format_exc())
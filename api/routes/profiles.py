@@ -1,8 +1,14 @@
 ﻿from pathlib import Path
-import os, json, re
-from fastapi import APIRouter, HTTPException, Query
+import base64, binascii, os, json, re
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, EmailStr
 
+from api.blob_store import get_blob_store
+from api.http_cache import etag_matches, not_modified, strong_etag
+from api.profile_store import ProfileStore, get_profile_store
+from api.photos import get_photo_store, is_photo_id, sniff_image
+
 # المجلد الافتراضي: profiles/ في جذر المشروع
 DEFAULT_PROFILES_DIR = Path(os.getenv("PROFILES_DIR", "profiles")).resolve()
 PROFILES_DIR: Path = DEFAULT_PROFILES_DIR
@@ -29,8 +35,9 @@ def _validate_name(name: str) -> str:
         raise HTTPException(status_code=400, detail="Invalid profile name.")
     return name
 
-def _path_for(name: str) -> Path:
-    return (PROFILES_DIR / f"{name}.json").resolve()
+def _store() -> ProfileStore:
+    """Backend selected by PROFILE_STORE (directory of JSON files by default)."""
+    return get_profile_store(PROFILES_DIR)
 
 # ===================================================================
 # واجهات FastAPI
@@ -52,42 +59,99 @@ class Profile(BaseModel):
     projects: list[list[str]] | None = None
     education: list[list[str]] | None = None
     summary: str | None = None
+    # The photo is kept in the blob store; the saved JSON holds only photo_id.
+    photo_b64: str | None = None
+    photo_id: str | None = None
 
 class SaveProfileRequest(BaseModel):
     name: str
     profile: Profile
 
+def _store_profile_photo(profile: dict) -> None:
+    """Move an inline ``photo_b64`` (or an uploaded ``photo_id``) into the blob store."""
+    b64 = profile.pop("photo_b64", None)
+    if b64:
+        try:
+            data = base64.b64decode(b64, validate=True)
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="photo_b64 is not valid base64.")
+    elif profile.get("photo_id"):
+        pid = profile["photo_id"]
+        data = get_photo_store().get(pid) if is_photo_id(pid) else None
+        if data is None:
+            raise HTTPException(status_code=400, detail=f"Unknown photo_id: {pid}")
+    else:
+        return
+    if sniff_image(data) is None:
+        raise HTTPException(status_code=415, detail="Photo must be a PNG, JPEG, GIF or WebP image.")
+    profile["photo_id"] = get_blob_store().put(data)
+
 @router.post("/save")
 def save_profile(payload: SaveProfileRequest):
     name = _validate_name(payload.name)
     _ensure_dir(PROFILES_DIR)
-    path = _path_for(name)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(payload.profile.model_dump(), f, ensure_ascii=False, indent=2)
+    profile = payload.profile.model_dump()
+    _store_profile_photo(profile)
+    _store().put(name, profile)
     return {"ok": True, "name": name}
 
 @router.get("/get")
-def get_profile(name: str = Query(...)):
+def get_profile(request: Request, name: str = Query(...), embed_photo: bool = Query(False)) -> Response:
+    """
+    Profile JSON; ``embed_photo=true`` adds ``photo_b64`` for older clients.
+
+    The response has a strong ``ETag`` (hash of the body); sending it back in
+    ``If-None-Match`` yields ``304 Not Modified`` while the profile is unchanged.
+    """
     name = _validate_name(name)
-    path = _path_for(name)
-    if not path.exists():
+    profile = _store().get(name)
+    if profile is None:
         raise HTTPException(status_code=404, detail="Profile not found.")
-    with path.open("r", encoding="utf-8") as f:
-        return {"name": name, "profile": json.load(f)}
+    pid = profile.get("photo_id") if isinstance(profile, dict) else None
+    if embed_photo and pid and not profile.get("photo_b64"):
+        data = get_blob_store().get(pid)
+        if data is not None:
+            profile["photo_b64"] = base64.b64encode(data).decode("ascii")
+    response = JSONResponse({"name": name, "profile": profile})
+    etag = strong_etag(response.body)
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag, headers)
+    response.headers.update(headers)
+    return response
+
+def rebuild_index() -> int:
+    """Index the profile store now (at startup) instead of on the first listing."""
+    return _store().reindex()
 
 @router.get("/list")
-def list_profiles():
-    if not PROFILES_DIR.exists():
-        return {"profiles": []}
-    return {"profiles": sorted(p.stem for p in PROFILES_DIR.glob("*.json"))}
+def list_profiles(
+    limit: int | None = Query(None, ge=1, le=1000),
+    cursor: str | None = Query(None),
+    prefix: str = Query(""),
+    q: str = Query("", max_length=200),
+):
+    """
+    Profile names, case-insensitive order, served from the store's index.
+
+    Without parameters the full list is returned. ``limit`` pages it (pass
+    the returned ``next_cursor`` as ``cursor`` for the next page), ``prefix``
+    filters names, and ``q`` searches names, titles and skills.
+    """
+    store = _store()
+    if limit is None and not (cursor or prefix or q):
+        return {"profiles": store.names()}
+    try:
+        names, next_cursor = store.page(limit=limit or 100, cursor=cursor, prefix=prefix, query=q)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"profiles": names, "next_cursor": next_cursor}
 
 @router.delete("/delete")
 def delete_profile(name: str = Query(...)):
     name = _validate_name(name)
-    path = _path_for(name)
-    if not path.exists():
+    if not _store().delete(name):
         raise HTTPException(status_code=404, detail="Profile not found.")
-    path.unlink()
     return {"ok": True, "name": name}
 
-__all__ = ["router", "PROFILES_DIR"]
+__all__ = ["router", "PROFILES_DIR", "rebuild_index"]
@@ -16,7 +16,6 @@ try:
         build_payload,
         normalize_theme_name,
         choose_layout_inline,
-        inject_headshot_into_layout,  
     )
     from core.schema import ensure_profile_schema
     from ui.sidebar import render_sidebar
@@ -83,13 +82,6 @@ with col_gen:
         try:
             layout_inline = choose_layout_inline(settings.get("layout_file"))
 
-            try:
-                layout_inline = inject_headshot_into_layout(
-                    layout_inline, st.session_state.get("photo_bytes")
-                )
-            except Exception:
-                pass
-
             payload = build_payload(
                 theme_name=normalize_theme_name(
                     settings.get("theme_name") or "default.theme.json"
@@ -107,8 +99,11 @@ with col_gen:
                 settings.get("layout_file"),
             )
 
+            # The headshot is uploaded once and then referenced by photo_id
             pdf_bytes = api_generate_pdf(
-                settings.get("base_url") or "http://127.0.0.1:8000", payload
+                settings.get("base_url") or "http://127.0.0.1:8000",
+                payload,
+                photo_bytes=st.session_state.get("photo_bytes"),
             )
 
             b64 = base64.b64encode(pdf_bytes).decode("ascii")
@@ -1,9 +1,11 @@
 ﻿from __future__ import annotations
 
 import base64
+import hashlib
 import json
 import os
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Tuple
@@ -74,6 +76,42 @@ def _join_url(base: str, path: str) -> str:
     return f"{base.rstrip('/')}/{path.lstrip('/')}"
 
 
+# Last ETag + body per request (method, URL, params/payload). Repeating a
+# request sends If-None-Match; on 304 the stored body is reused, so an
+# unchanged profile or PDF is not transferred again.
+_VALIDATED: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+_VALIDATED_MAX = 16
+
+
+def _request_key(method: str, url: str, body: Any) -> str:
+    blob = json.dumps([method, url, body], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _if_none_match(key: str) -> Dict[str, str]:
+    hit = _VALIDATED.get(key)
+    return {"If-None-Match": hit[0]} if hit else {}
+
+
+def _not_modified(key: str, resp: requests.Response) -> Optional[bytes]:
+    """The stored body if ``resp`` is a 304 for ``key``, else None."""
+    hit = _VALIDATED.get(key)
+    if resp.status_code != 304 or hit is None:
+        return None
+    _VALIDATED.move_to_end(key)
+    return hit[1]
+
+
+def _remember(key: str, resp: requests.Response, body: bytes) -> None:
+    etag = resp.headers.get("ETag")
+    if not etag:
+        return
+    _VALIDATED[key] = (etag, body)
+    _VALIDATED.move_to_end(key)
+    while len(_VALIDATED) > _VALIDATED_MAX:
+        _VALIDATED.popitem(last=False)
+
+
 def normalize_theme_name(name: str) -> str:
     """Drop trailing '.theme.json' if present; API expects bare theme name."""
     return name[:-11] if name.endswith(".theme.json") else name
@@ -93,8 +131,14 @@ def list_profiles(base: str = DEFAULT_BASE) -> List[str]:
 
 def load_profile(name: str, base: str = DEFAULT_BASE) -> Dict[str, Any]:
     url = _join_url(base, "profiles/load")
-    r = _SESSION.get(url, params={"name": name}, timeout=_HTTP_CFG.timeout)
-    data = _json_or_raise(r)
+    key = _request_key("GET", url, {"name": name})
+    r = _SESSION.get(url, params={"name": name}, headers=_if_none_match(key), timeout=_HTTP_CFG.timeout)
+    cached = _not_modified(key, r)
+    if cached is not None:
+        data = json.loads(cached)
+    else:
+        data = _json_or_raise(r)
+        _remember(key, r, r.content)
     if isinstance(data, dict):
         return data
     raise TypeError("Unexpected response for profiles/load; expected Dict.")
@@ -177,25 +221,84 @@ def _filename_from_headers(resp: requests.Response, default: str = "resume.pdf")
     return default
 
 
-def api_generate_pdf(base_url: str, payload: Dict[str, Any], *, stream: bool = False) -> bytes:
+# sha256(photo) -> photo_id on the server; each photo is uploaded once per session
+_PHOTO_IDS: Dict[str, str] = {}
+
+
+def upload_photo(base_url: str, photo_bytes: bytes) -> str:
+    """
+    Upload a headshot once (POST /photos) and return its photo_id.
+    Repeated calls with the same bytes reuse the id without re-sending them.
+    """
+    digest = hashlib.sha256(photo_bytes).hexdigest()
+    pid = _PHOTO_IDS.get(digest)
+    if pid:
+        return pid
+    url = _join_url(base_url, "photos")
+    r = _SESSION.post(
+        url,
+        files={"photo": ("photo", photo_bytes, "application/octet-stream")},
+        timeout=max(_HTTP_CFG.timeout, 30),
+    )
+    pid = _json_or_raise(r)["photo_id"]
+    _PHOTO_IDS[digest] = pid
+    return pid
+
+
+def fetch_photo(base_url: str, photo_id: str) -> bytes:
+    """Download a photo by id (GET /photos/{id}), e.g. the one a loaded profile references."""
+    url = _join_url(base_url, f"photos/{photo_id}")
+    r = _SESSION.get(url, timeout=_HTTP_CFG.timeout)
+    r.raise_for_status()
+    _PHOTO_IDS[hashlib.sha256(r.content).hexdigest()] = photo_id
+    return r.content
+
+
+def api_generate_pdf(
+    base_url: str,
+    payload: Dict[str, Any],
+    *,
+    stream: bool = False,
+    photo_bytes: Optional[bytes] = None,
+) -> bytes:
     """
     Call POST /generate-form-simple and return PDF bytes.
     If stream=True, downloads in chunks to reduce memory spikes (still returns bytes).
+    If photo_bytes is given, the photo is uploaded once and referenced by photo_id;
+    when the server no longer knows the id (evicted/restarted) it is uploaded again.
     """
-    url = _join_url(base_url, "generate-form-simple")
-    if not stream:
-        r = _SESSION.post(url, json=payload, timeout=max(_HTTP_CFG.timeout, 60))
-        r.raise_for_status()
-        # no JSON here; server returns application/pdf
-        return r.content
+    if photo_bytes:
+        payload = {**payload, "photo_id": upload_photo(base_url, photo_bytes)}
+        try:
+            return _post_generate(base_url, payload, stream=stream)
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            _PHOTO_IDS.pop(hashlib.sha256(photo_bytes).hexdigest(), None)
+            payload["photo_id"] = upload_photo(base_url, photo_bytes)
+    return _post_generate(base_url, payload, stream=stream)
+
 
-    with _SESSION.post(url, json=payload, timeout=max(_HTTP_CFG.timeout, 60), stream=True) as r:
+def _post_generate(base_url: str, payload: Dict[str, Any], *, stream: bool) -> bytes:
+    url = _join_url(base_url, "generate-form-simple")
+    key = _request_key("POST", url, payload)
+    headers = _if_none_match(key)
+    with _SESSION.post(url, json=payload, headers=headers, timeout=max(_HTTP_CFG.timeout, 60), stream=stream) as r:
+        cached = _not_modified(key, r)
+        if cached is not None:
+            return cached
         r.raise_for_status()
-        chunks: List[bytes] = []
-        for chunk in r.iter_content(chunk_size=64 * 1024):
-            if chunk:
-                chunks.append(chunk)
-        return b"".join(chunks)
+        if not stream:
+            # no JSON here; server returns application/pdf
+            body = r.content
+        else:
+            chunks: List[bytes] = []
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                if chunk:
+                    chunks.append(chunk)
+            body = b"".join(chunks)
+    _remember(key, r, body)
+    return body
 
 
 # ─────────────────────────────────────────────────────────────
@@ -208,24 +311,22 @@ def inject_headshot_into_layout(
     """
     If a headshot is present, inject base64 into every 'avatar_circle' block.
     We leave 'photo_bytes' as None so the server can accept either b64 or bytes.
+    Prefer api_generate_pdf(..., photo_bytes=...), which sends the photo once per session.
     """
     if not layout_inline or not photo_bytes:
         return layout_inline
 
     photo_b64 = base64.b64encode(photo_bytes).decode("ascii")
-    cloned = json.loads(json.dumps(layout_inline))  # deep clone
 
-    def _walk(node: Any) -> None:
+    def _copy(node: Any) -> Any:
+        # Copies containers only; strings and numbers are shared, not re-encoded.
         if isinstance(node, dict):
-            if node.get("block_id") == "avatar_circle":
-                node.setdefault("data", {})
-                node["data"]["photo_b64"] = photo_b64
-                node["data"]["photo_bytes"] = None
-            for v in node.values():
-                _walk(v)
-        elif isinstance(node, list):
-            for it in node:
-                _walk(it)
-
-    _walk(cloned)
-    return cloned
+            out = {k: _copy(v) for k, v in node.items()}
+            if out.get("block_id") == "avatar_circle":
+                out["data"] = {**(out.get("data") or {}), "photo_b64": photo_b64, "photo_bytes": None}
+            return out
+        if isinstance(node, list):
+            return [_copy(it) for it in node]
+        return node
+
+    return _copy(layout_inline)
@@ -98,5 +98,7 @@ def ensure_profile_schema(p: dict | None) -> dict:
     # ✅ احتفظ بـ photo_b64 إن وُجد
     if isinstance(p.get("photo_b64"), str):
         base["photo_b64"] = p["photo_b64"]
+    if isinstance(p.get("photo_id"), str):
+        base["photo_id"] = p["photo_id"]
 
     return base
@@ -19,16 +19,21 @@ def _clean_name(name: str) -> str:
     return n or "my_profile"
 
 
-def _apply_photo_b64_to_session(profile: dict) -> None:
+def _apply_photo_b64_to_session(profile: dict, base_url: str | None = None) -> None:
     """
     إن وُجد photo_b64 داخل البروفايل المحمَّل/المستورَد،
     حوّله إلى photo_bytes في حالة الجلسة لعرضه فورًا واستخدامه في PDF.
+    Profiles saved through the API reference the photo by photo_id (blob store) instead.
     """
     b64 = profile.get("photo_b64")
-    if not b64:
+    pid = profile.get("photo_id")
+    if not b64 and not (pid and base_url):
         return
     try:
-        st.session_state.photo_bytes = base64.b64decode(b64)
+        if b64:
+            st.session_state.photo_bytes = base64.b64decode(b64)
+        else:
+            st.session_state.photo_bytes = api.fetch_photo(base_url, pid)
         st.session_state.photo_mime = "image/png"
     except Exception:
         st.session_state.photo_bytes = None
@@ -90,7 +95,7 @@ def render_sidebar() -> dict:
                         st.session_state.profile = ensure_profile_schema(loaded)
 
                         # لو الصورة محفوظة داخل JSON كـ base64، ضَعها في الجلسة لعرضها مباشرة
-                        _apply_photo_b64_to_session(st.session_state.profile)
+                        _apply_photo_b64_to_session(st.session_state.profile, base_no_api)
 
                         # إجبار إعادة تحميل الودجتس (keys مربوطة بـ profile_rev)
                         st.session_state.profile_rev = st.session_state.get("profile_rev", 0) + 1
@@ -106,9 +111,10 @@ def render_sidebar() -> dict:
                     name = _clean_name(profile_name_in)
                     payload = ensure_profile_schema(st.session_state.get("profile", {}))
 
-                    # لو في صورة في الجلسة، خزّنها داخل البروفايل كـ photo_b64
+                    # A session photo is uploaded once; the profile keeps only its photo_id
                     if st.session_state.get("photo_bytes"):
-                        payload["photo_b64"] = base64.b64encode(st.session_state["photo_bytes"]).decode("ascii")
+                        payload.pop("photo_b64", None)
+                        payload["photo_id"] = api.upload_photo(base_no_api, st.session_state["photo_bytes"])
 
                     api.save_profile(name, payload)
                     st.success(f"Saved (API): {name}.json")
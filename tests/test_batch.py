@@ -0,0 +1,95 @@
+﻿# tests/test_batch.py
+"""``POST /generate-batch`` NDJSON input: chunked parsing and size limits."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from api import render_executor, result_cache
+
+NDJSON = {"content-type": "application/x-ndjson"}
+
+
+class _Body:
+    """Stands in for a Request whose body arrives in the given chunks."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _read(chunks, limit=500):
+    from api.main import _read_ndjson
+
+    return asyncio.run(_read_ndjson(_Body(chunks), limit))
+
+
+def _split(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("RENDER_WORKERS", "0")
+    monkeypatch.setenv("RESULT_CACHE_MB", "0")
+    monkeypatch.setattr(render_executor, "_EXECUTOR", None)
+    monkeypatch.setattr(result_cache, "_CACHE", None)
+    from api.main import app
+
+    yield TestClient(app)
+    render_executor._EXECUTOR = None
+    result_cache._CACHE = None
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 10_000])
+def test_lines_split_across_chunks(size):
+    body = b'{"a": 1}\n\n{"b": [1, 2]}\r\nnot json\n{"c": "x"}'
+    items = _read(_split(body, size))
+    assert [raw for raw, _ in items] == [{"a": 1}, {"b": [1, 2]}, None, {"c": "x"}]
+    assert items[2][1].startswith("invalid JSON line")
+
+
+def test_stops_after_limit():
+    items = _read([b"{}\n"] * 50, limit=10)
+    assert len(items) == 11  # one past the limit marks the batch truncated
+
+
+def test_line_over_cap_is_413(monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_LINE_MB", "0.01")  # ~10 KB
+    body = b'{"a": "' + b"x" * 20_000 + b'"}\n'
+    for chunks in (_split(body, 1000), [body]):
+        with pytest.raises(HTTPException) as exc:
+            _read(chunks)
+        assert exc.value.status_code == 413
+
+
+def test_body_over_cap_is_413(monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_BODY_MB", "0.05")  # ~50 KB
+    line = json.dumps({"summary": "x" * 1000}).encode() + b"\n"
+    with pytest.raises(HTTPException) as exc:
+        _read(_split(line * 100, 4096))
+    assert exc.value.status_code == 413
+
+
+def test_endpoint(client, monkeypatch):
+    profile = {"header": {"name": "Jane Doe"}, "skills": ["Python"]}
+    body = "\n".join(json.dumps({**profile, "n": i}) for i in range(3)) + "\nnot json\n"
+    r = client.post("/generate-batch?theme_name=pro-clean", content=body.encode(), headers=NDJSON)
+    assert r.status_code == 200
+    archive = zipfile.ZipFile(io.BytesIO(r.content))
+    assert len([n for n in archive.namelist() if n.endswith(".pdf")]) == 3
+    assert "invalid JSON line" in archive.read("manifest.json").decode()
+
+    monkeypatch.setenv("BATCH_MAX_LINE_MB", "0.001")
+    r = client.post("/generate-batch", content=body.encode() + b"x" * 2000, headers=NDJSON)
+    assert r.status_code == 413
@@ -0,0 +1,56 @@
+﻿# tests/test_compiled_layout.py
+"""Data a compiled block receives: profile data wins over the layout's."""
+
+from __future__ import annotations
+
+from api.pdf_utils.compiled_layout import CompiledBlock
+from api.pdf_utils.frozen import freeze
+
+
+def _block(raw_id, data=None):
+    base, _, suffix = raw_id.partition(":")
+    return CompiledBlock(
+        raw_id=raw_id,
+        base_id=base,
+        suffix=suffix or None,
+        column="main",
+        block=None,
+        data=freeze(data or {}),
+        frame=freeze({}),
+    )
+
+
+def test_profile_data_wins_over_layout_data():
+    blk = _block("header_name", {"name": "Layout", "title": "From layout"})
+    assert blk.bind({"header_name": {"name": "Profile"}}) == {"name": "Profile"}
+
+
+def test_layout_data_is_the_fallback():
+    blk = _block("header_name", {"name": "Layout"})
+    assert blk.bind({}) == {"name": "Layout"}
+
+
+def test_suffix_selects_nested_data():
+    blk = _block("text_section:summary")
+    assert blk.bind({"text_section": {"summary": "Hello", "about": "Other"}}) == "Hello"
+    assert blk.bind({"text_section": {"about": "Other"}}) == {"about": "Other"}
+
+
+def test_lists_are_joined_with_newlines():
+    blk = _block("key_skills", {"skills": ["Layout"]})
+    assert blk.bind({"key_skills": ["Python", "SQL"]}) == "Python\nSQL"
+
+
+def test_nothing_bound_gives_empty_mapping():
+    assert _block("projects").bind({}) == {}
+    assert _block("projects").bind({"projects": []}) == {}
+
+
+def test_compiled_layout_is_cached_per_content():
+    from api.pdf_utils.compiled_layout import get_compiled_layout
+
+    layout = {"flow": [{"column": "main", "blocks": ["header_name", "text_section:summary"]}]}
+    first = get_compiled_layout(layout)
+    assert get_compiled_layout(dict(layout)) is first
+    assert [b.raw_id for b in first.blocks] == ["header_name", "text_section:summary"]
+    assert first.blocks[1].suffix == "summary"
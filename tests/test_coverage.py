@@ -0,0 +1,76 @@
+﻿# tests/test_coverage.py
+"""Per-run font fallback on mixed Arabic, Latin and CJK text."""
+
+from __future__ import annotations
+
+import pytest
+
+from api.pdf_utils.coverage import _neutral, font_coverage, font_stack
+from api.pdf_utils.measure import word_width
+
+MIXED = [
+    "Hello مرحبا بك 中文 ok.",
+    "مهندس برمجيات (Python, FastAPI) في 東京",
+    "김민수 — Software Engineer, خبرة ٥ سنوات",
+    "ひらがな and カタカナ, 漢字。",
+    "  leading, trailing  ",
+]
+
+
+def _check(stack, text):
+    runs = stack.runs(text)
+    assert "".join(run for _, run in runs) == text
+    for (font, run), (nxt, _) in zip(runs, runs[1:]):
+        assert font != nxt  # adjacent runs always change font
+    for font, run in runs:
+        cov = font_coverage(font)
+        assert all(ch in cov or (_neutral(ch) and font == stack.primary) for ch in run), (font, run)
+    return runs
+
+
+@pytest.mark.parametrize("primary", ["Helvetica", "DejaVuSans", "NotoNaskhArabic"])
+@pytest.mark.parametrize("text", MIXED)
+def test_runs_cover_text_in_order_with_fonts_that_have_the_glyphs(primary, text):
+    _check(font_stack(primary), text)
+
+
+def test_runs_break_only_where_the_script_changes():
+    runs = _check(font_stack("Helvetica"), MIXED[0])
+    assert runs == [
+        ("Helvetica", "Hello "),
+        ("Amiri", "مرحبا بك "),
+        ("HeiseiMin-W3", "中文 "),
+        ("Helvetica", "ok."),
+    ]
+
+
+def test_scripts_go_to_the_fonts_that_serve_them():
+    stack = font_stack("Helvetica")
+    fonts = {run.strip(): font for font, run in stack.runs("Latin 김민수 ひらがな العربية")}
+    assert fonts["Latin"] == "Helvetica"
+    assert fonts["김민수"] == "HYSMyeongJo-Medium"
+    assert fonts["ひらがな"] == "HeiseiMin-W3"
+    assert font_coverage(fonts["العربية"]).issuperset("العربية")
+
+
+def test_arabic_only_primary_falls_back_for_latin():
+    stack = font_stack("NotoNaskhArabic")
+    runs = stack.runs("خبرة Python")
+    assert runs[0] == ("NotoNaskhArabic", "خبرة ")
+    assert runs[1][1] == "Python" and runs[1][0] != "NotoNaskhArabic"
+
+
+def test_covered_text_is_one_run_in_the_primary_font():
+    stack = font_stack("DejaVuSans")
+    assert stack.covers("Plain text, 100%")
+    assert stack.runs("Plain text, 100%") == [("DejaVuSans", "Plain text, 100%")]
+    assert stack.runs("") == [("DejaVuSans", "")]
+
+
+def test_width_sums_the_runs_and_runs_are_memoized():
+    stack = font_stack("Helvetica")
+    text = MIXED[1]
+    runs = stack.runs(text)
+    assert stack.runs(text) is runs
+    assert stack.width(text, 10) == pytest.approx(sum(word_width(r, f, 10) for f, r in runs))
+    assert stack.width("abc", 10) == pytest.approx(word_width("abc", "Helvetica", 10))
@@ -0,0 +1,157 @@
+﻿# tests/test_engine.py
+"""Block placement in LayoutEngine: measuring, moving and splitting across pages."""
+
+from __future__ import annotations
+
+import json
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from reportlab.pdfgen.canvas import Canvas
+
+from api.pdf_utils import engine as engine_mod
+from api.pdf_utils.blocks.base import Frame, ScratchCanvas, measure_block
+from api.pdf_utils.compiled_layout import CompiledBlock, PageSpec, load_layout_file
+from api.pdf_utils.frozen import FrozenDict, thaw
+from api.pdf_utils.hooks import RenderHook
+from api.pdf_utils.resume import build_resume_pdf
+
+ROOT = Path(__file__).resolve().parents[1]
+PAGE = PageSpec(width=600.0, height=800.0, margins={"top": 50.0, "bottom": 50.0})
+TOP, BOTTOM = 750.0, 50.0
+
+
+class Fixed:
+    """Block of a fixed height that records where it was drawn."""
+
+    BLOCK_ID = "fixed"
+
+    def __init__(self, height: float) -> None:
+        self.height = height
+        self.drawn = []
+
+    def render(self, c, frame, data, ctx):
+        if not isinstance(c, ScratchCanvas):
+            self.drawn.append((c.getPageNumber(), frame.y))
+        return frame.y - self.height
+
+
+class Rows:
+    """Splittable block of ``n`` rows of ``row`` points; the token is the next row."""
+
+    BLOCK_ID = "rows"
+
+    def __init__(self, n: int, row: float) -> None:
+        self.n, self.row = n, row
+        self.parts = []
+
+    def measure(self, frame, data, ctx):
+        return self.n * self.row
+
+    def render(self, c, frame, data, ctx):
+        new_y, _ = self.render_split(c, frame, data, ctx, float("-inf"))
+        return new_y
+
+    def render_split(self, c, frame, data, ctx, bottom, token=None):
+        start = token or 0
+        fit = max(0, int((frame.y - bottom) // self.row))
+        end = min(self.n, start + fit)
+        self.parts.append((c.getPageNumber(), start, end))
+        return frame.y - (end - start) * self.row, (end if end < self.n else None)
+
+
+class Stuck(Rows):
+    """Splittable block whose rows never fit: no progress even on a fresh page."""
+
+    def render_split(self, c, frame, data, ctx, bottom, token=None):
+        self.parts.append((c.getPageNumber(), token))
+        return frame.y, 0
+
+
+class Pages(RenderHook):
+    def __init__(self) -> None:
+        self.breaks = []
+        self.heights = []
+
+    def page_break(self, page):
+        self.breaks.append(page)
+
+    def after_block(self, block, elapsed, dy, page, error=None):
+        self.heights.append(dy)
+
+
+def _cb(block) -> CompiledBlock:
+    return CompiledBlock(block.BLOCK_ID, block.BLOCK_ID, None, "main", block, FrozenDict(), FrozenDict())
+
+
+def _render(*blocks):
+    pages = Pages()
+    c = Canvas(BytesIO(), pagesize=(PAGE.width, PAGE.height))
+    eng = engine_mod.LayoutEngine(c, PAGE, {"main": (50.0, 500.0)}, {}, "en", False, hooks=[pages])
+    eng._render_blocks([_cb(b) for b in blocks], {})
+    return eng, pages
+
+
+def test_measure_block_prefers_measure_over_scratch_render():
+    rows = Rows(4, 10.0)
+    fixed = Fixed(33.0)
+    frame = Frame(0.0, 500.0, 100.0)
+    assert measure_block(rows, frame, {}, {}, (600, 800)) == 40.0
+    assert rows.parts == []
+    assert measure_block(fixed, frame, {}, {}, (600, 800)) == 33.0
+    assert fixed.drawn == []  # scratch canvas only
+
+
+def test_block_that_does_not_fit_moves_to_next_page_and_is_drawn_once():
+    first, second = Fixed(650.0), Fixed(100.0)
+    eng, pages = _render(first, second)
+    assert first.drawn == [(1, TOP)]
+    assert second.drawn == [(2, TOP)]
+    assert pages.breaks == [2]
+    assert eng.cursor.y_by_col["main"] == TOP - 100.0
+
+
+def test_block_at_page_top_is_drawn_even_if_too_tall():
+    tall = Fixed(900.0)
+    _, pages = _render(tall)
+    assert tall.drawn == [(1, TOP)]
+    assert pages.breaks == []
+
+
+def test_splittable_block_continues_on_following_pages():
+    head, rows = Fixed(600.0), Rows(100, 10.0)
+    eng, pages = _render(head, rows)
+    # 100 points left on page 1, 70 rows per full page.
+    assert rows.parts == [(1, 0, 10), (2, 10, 80), (3, 80, 100)]
+    assert pages.breaks == [2, 3]
+    assert pages.heights[-1] == pytest.approx(1000.0)
+    assert eng.cursor.y_by_col["main"] == TOP - 200.0
+
+
+def test_split_without_progress_is_truncated():
+    head, stuck, after = Fixed(600.0), Stuck(50, 10.0), Fixed(10.0)
+    eng, pages = _render(head, stuck, after)
+    assert stuck.parts == [(1, None), (2, 0)]
+    assert pages.breaks == [2]
+    assert after.drawn == [(2, TOP)]
+
+
+def test_builtin_measure_matches_scratch_render(monkeypatch):
+    checked = []
+
+    def both(block, frame, data, ctx, pagesize):
+        height = measure_block(block, frame, data, ctx, pagesize)
+        rendered = frame.y - block.render(ScratchCanvas(pagesize), frame, data, ctx)
+        checked.append(block.BLOCK_ID)
+        assert height == pytest.approx(rendered), block.BLOCK_ID
+        return height
+
+    monkeypatch.setattr(engine_mod, "measure_block", both)
+    profile = json.loads((ROOT / "profiles" / "my_profile.json").read_text(encoding="utf-8-sig"))
+    layout = thaw(load_layout_file(ROOT / "layouts" / "two-column.layout.json").data)
+    for rtl in (False, True):
+        pdf = build_resume_pdf(data={"profile": profile, "theme_name": "pro-clean",
+                                     "layout_inline": layout, "rtl_mode": rtl})
+        assert pdf.startswith(b"%PDF")
+    assert checked
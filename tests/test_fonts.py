@@ -0,0 +1,54 @@
+﻿# tests/test_fonts.py
+"""Lazy font registration and the on-disk metrics cache."""
+
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from reportlab.pdfbase import pdfmetrics
+
+from api.pdf_utils import fonts
+
+FONT = os.path.join(fonts.ASSETS_DIR, "DejaVuSans.ttf")
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(fonts, "FONT_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_metrics_cache_is_json_and_round_trips(cache_dir):
+    parsed = fonts._load_ttfont("T-Parsed", FONT)
+    (entry,) = cache_dir.iterdir()
+    assert entry.suffix == ".json"
+    json.loads(entry.read_text(encoding="utf-8"))
+
+    cached = fonts._load_ttfont("T-Cached", FONT)
+    for attr in ("name", "ascent", "descent", "bbox", "charWidths", "charToGlyph", "defaultWidth", "hmetrics"):
+        assert getattr(cached.face, attr) == getattr(parsed.face, attr), attr
+        assert type(getattr(cached.face, attr)) is type(getattr(parsed.face, attr)), attr
+    text = "Hello, world — ÀÉÎ"
+    assert cached.stringWidth(text, 11) == parsed.stringWidth(text, 11)
+
+
+def test_unreadable_cache_entry_falls_back_to_parsing(cache_dir):
+    fonts._load_ttfont("T-Parsed", FONT)
+    (entry,) = cache_dir.iterdir()
+    entry.write_bytes(b"\x80\x04not json")
+    font = fonts._load_ttfont("T-Reparsed", FONT)
+    assert font.stringWidth("abc", 10) > 0
+
+
+def test_reportlab_lookup_is_not_patched():
+    assert pdfmetrics.findFontAndRegister.__module__ == pdfmetrics.__name__
+
+
+def test_ensure_font():
+    assert fonts.ensure_font("Helvetica")
+    assert fonts.ensure_font("DejaVuSans")
+    assert "DejaVuSans" in pdfmetrics.getRegisteredFontNames()
+    assert not fonts.ensure_font("No-Such-Font")
+    assert not fonts.ensure_font("")
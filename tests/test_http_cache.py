@@ -0,0 +1,45 @@
+﻿# tests/test_http_cache.py
+"""``If-None-Match`` comparison."""
+
+from __future__ import annotations
+
+import pytest
+
+from api.http_cache import etag_matches, not_modified, strong_etag
+
+ETAG = '"abc"'
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ("", False),
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"other"', False),
+        ('"x", "abc"', True),
+        ('"x",W/"abc"', True),
+        ('"x", "y"', False),
+        ("*", True),
+        ("abc", False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
+
+
+def test_weak_etag_matches_strong_header():
+    assert etag_matches('"abc"', 'W/"abc"')
+
+
+def test_strong_etag_is_quoted_content_hash():
+    assert strong_etag(b"x") == strong_etag(b"x") != strong_etag(b"y")
+    assert strong_etag(b"x").startswith('"') and strong_etag(b"x").endswith('"')
+
+
+def test_not_modified_keeps_headers():
+    resp = not_modified(ETAG, {"Cache-Control": "no-cache"})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == ETAG
+    assert resp.headers["cache-control"] == "no-cache"
@@ -0,0 +1,88 @@
+﻿# tests/test_image_cache.py
+"""Segmented LRU of decoded images: promotion, eviction and rejection."""
+
+from __future__ import annotations
+
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from api.pdf_utils.image_cache import ImageCache, _cost, _decoded
+
+
+def _png(i: int, size: int = 8) -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (size, size), (i, 255 - i, (i * 7) % 256)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def images():
+    pngs = [_png(i) for i in range(12)]
+    cost = max(_cost(p, _decoded(p)) for p in pngs)
+    return pngs, cost
+
+
+def test_hit_shares_decoded_pixels(images):
+    (png, *_), cost = images
+    cache = ImageCache(8 * cost)
+    first, second = cache.reader(png), cache.reader(png)
+    assert first is not second and first.fp is not second.fp
+    assert first._data is second._data
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_one_offs_evict_oldest_first(images):
+    pngs, cost = images
+    cache = ImageCache(4 * cost)
+    for png in pngs[:6]:
+        cache.reader(png)
+    stats = cache.stats()
+    assert stats["entries"] == 4 and stats["evictions"] == 2
+    assert stats["bytes"] <= cache.max_bytes
+    cache.reader(pngs[5])
+    cache.reader(pngs[0])
+    assert cache.stats()["misses"] == 7  # pngs[0] was evicted, pngs[5] was not
+
+
+def test_promoted_images_survive_a_burst_of_one_offs(images):
+    pngs, cost = images
+    cache = ImageCache(5 * cost)
+    kept = pngs[:2]
+    for png in kept * 2:
+        cache.reader(png)
+    assert cache.stats()["protected_entries"] == 2
+    for png in pngs[2:]:
+        cache.reader(png)
+    before = cache.stats()["hits"]
+    for png in kept:
+        cache.reader(png)
+    assert cache.stats()["hits"] == before + 2
+
+
+def test_protected_segment_is_capped(images):
+    pngs, cost = images
+    cache = ImageCache(5 * cost)
+    for png in pngs[:6]:
+        cache.reader(png)
+        cache.reader(png)
+    assert cache.stats()["protected_entries"] * cost <= 5 * cost * 0.8
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_large_image_is_decoded_but_not_kept(images):
+    (png, *_), cost = images
+    cache = ImageCache(4 * cost)
+    big = _png(1, size=64)
+    assert cache.reader(big).getSize() == (64, 64)
+    assert cache.stats()["rejected"] == 1 and cache.stats()["entries"] == 0
+    cache.reader(png)
+    assert cache.stats()["entries"] == 1
+
+
+def test_zero_budget_disables_cache(images):
+    (png, *_), _ = images
+    cache = ImageCache(0)
+    assert cache.reader(png).getSize() == (8, 8)
+    assert cache.stats()["misses"] == 0 and cache.stats()["entries"] == 0
@@ -0,0 +1,139 @@
+﻿# tests/test_jobs.py
+"""Job claiming, leases and recovery of jobs whose process died."""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from api.jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, JobQueue, JobStore
+
+
+def _expire(store: JobStore, job_id: str) -> None:
+    with store._lock:
+        store._db.execute("UPDATE jobs SET lease_until = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+@pytest.fixture
+def stores(tmp_path):
+    # Two processes sharing one database.
+    a = JobStore(tmp_path, lease_seconds=30, max_attempts=2)
+    b = JobStore(tmp_path, lease_seconds=30, max_attempts=2)
+    yield a, b
+    a.close()
+    b.close()
+
+
+def test_claim_takes_oldest_queued_job_once(stores):
+    a, b = stores
+    first = a.submit("single", {"n": 1})
+    second = a.submit("single", {"n": 2})
+    claimed = a.claim()
+    assert claimed.id == first.id and claimed.status == RUNNING and claimed.attempts == 1
+    assert b.claim().id == second.id
+    assert a.claim() is None
+    assert a.payload(first.id) == {"n": 1}
+
+
+def test_live_lease_is_not_requeued(stores):
+    a, b = stores
+    job = a.submit("single", {})
+    a.claim()
+    assert b.requeue_expired() == 0
+    assert b.get(job.id).status == RUNNING
+
+
+def test_renew_extends_only_own_leases(stores):
+    a, b = stores
+    mine, theirs = a.submit("single", {}), a.submit("single", {})
+    a.claim()
+    b.claim()
+    _expire(a, mine.id)
+    _expire(a, theirs.id)
+    assert a.renew() == 1
+    assert b.requeue_expired() == 1
+    assert a.get(mine.id).status == RUNNING
+    assert a.get(theirs.id).status == QUEUED
+
+
+def test_expired_lease_is_requeued_and_old_owner_cannot_complete(stores):
+    a, b = stores
+    job = a.submit("single", {})
+    lost = a.claim()
+    _expire(a, job.id)
+    assert b.requeue_expired() == 1
+    retry = b.claim()
+    assert retry.id == job.id and retry.attempts == 2
+
+    assert not a.complete(lost, b"stale", "application/pdf", ".pdf")
+    a.fail(lost, "stale")
+    assert b.get(job.id).status == RUNNING
+    assert b.complete(retry, b"%PDF", "application/pdf", ".pdf")
+    done = b.get(job.id)
+    assert done.status == DONE
+    assert b.result_path(done).read_bytes() == b"%PDF"
+
+
+def test_job_fails_after_max_attempts(stores):
+    a, b = stores
+    job = a.submit("single", {})
+    a.claim()
+    _expire(a, job.id)
+    assert b.requeue_expired() == 1
+    b.claim()
+    _expire(b, job.id)
+    assert a.requeue_expired() == 0
+    failed = a.get(job.id)
+    assert failed.status == FAILED and failed.attempts == 2
+    assert "not retried" in failed.error
+    assert a.claim() is None
+
+
+def test_cancel_queued_job(stores):
+    a, _ = stores
+    job = a.submit("single", {})
+    assert a.cancel(job.id).status == CANCELLED
+    assert a.claim() is None
+
+
+def test_old_database_gets_lease_columns(tmp_path):
+    db = sqlite3.connect(tmp_path / "jobs.sqlite3")
+    db.executescript(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+        "payload TEXT NOT NULL, created REAL NOT NULL, started REAL, finished REAL, error TEXT, "
+        "result_file TEXT, media_type TEXT, attempts INTEGER NOT NULL DEFAULT 0);"
+        "INSERT INTO jobs VALUES ('old', 'single', 'running', '{}', 0, 1, NULL, NULL, NULL, NULL, 1);"
+    )
+    db.commit()
+    db.close()
+    store = JobStore(tmp_path)
+    assert store.requeue_expired() == 1  # no lease recorded: expired
+    assert store.claim().id == "old"
+    store.close()
+
+
+def test_queue_runs_jobs_and_reports_health(tmp_path):
+    async def runner(payload):
+        if payload.get("boom"):
+            raise RuntimeError("boom")
+        return b"ok", "text/plain", ".txt"
+
+    async def main():
+        queue = JobQueue(JobStore(tmp_path))
+        queue.start(runner)
+        ok, bad = queue.submit("single", {}), queue.submit("single", {"boom": True})
+        for _ in range(100):
+            if {queue.store.get(j.id).status for j in (ok, bad)} <= {DONE, FAILED}:
+                break
+            await asyncio.sleep(0.02)
+        assert queue.store.get(ok.id).status == DONE
+        assert queue.store.get(bad.id).status == FAILED
+        assert queue.health()["ok"]
+        await queue.stop()
+        assert not queue.health()["ok"]
+        queue.store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+﻿# tests/test_measure.py
+"""Word widths and wrapping match ReportLab's own measurement."""
+
+from __future__ import annotations
+
+import pytest
+from reportlab.pdfbase import pdfmetrics
+
+from api.pdf_utils import measure
+from api.pdf_utils.fonts import ensure_font
+
+TEXT = (
+    "Software engineer with eight years of experience building backend systems, "
+    "APIs and data pipelines; café naïve résumé — “quoted” words and 12345 digits. "
+    "مهندس برمجيات بخبرة طويلة"
+)
+
+
+def _naive_wrap(text, max_w, font, size):
+    """Reference: re-measure the whole candidate line with stringWidth."""
+    lines, cur = [], ""
+    for word in text.split():
+        cand = f"{cur} {word}" if cur else word
+        if cur and pdfmetrics.stringWidth(cand, font, size) > max_w:
+            lines.append(cur)
+            cur = word
+        else:
+            cur = cand
+    return lines + [cur]
+
+
+@pytest.mark.parametrize("font", ["Helvetica", "DejaVuSans"])
+def test_word_width_matches_string_width(font):
+    assert ensure_font(font)
+    for word in TEXT.split():
+        assert measure.word_width(word, font, 11) == pytest.approx(pdfmetrics.stringWidth(word, font, 11))
+
+
+def test_batched_widths_match_string_width():
+    pytest.importorskip("numpy")
+    assert ensure_font("DejaVuSans")
+    words = (TEXT * 3).split()
+    batched = measure._batch_widths(words, "DejaVuSans", 9.5)
+    expected = [pdfmetrics.stringWidth(w, "DejaVuSans", 9.5) for w in words]
+    assert batched == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+@pytest.mark.parametrize("font", ["Helvetica", "DejaVuSans"])
+@pytest.mark.parametrize("max_w", [40, 120, 300])
+def test_wrap_matches_naive_wrap(font, max_w):
+    assert ensure_font(font)
+    text = TEXT * 4  # long enough for the batched path
+    assert len(text) >= measure.BATCH_MIN_CHARS
+    assert measure.wrap_words(text, max_w, font, 10) == _naive_wrap(text, max_w, font, 10)
+
+
+def test_wrap_edge_cases():
+    assert measure.wrap_words("", 100) == [""]
+    assert measure.wrap_words("   ", 100) == [""]
+    assert measure.wrap_words("a  b\n c", 1000) == ["a b c"]
+    assert measure.wrap_words("supercalifragilistic word", 10) == ["supercalifragilistic", "word"]
@@ -0,0 +1,47 @@
+﻿# tests/test_metrics.py
+"""Metric registration and the block-timing render hook."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+
+from api.pdf_utils import hooks, metrics
+
+
+def test_import_registers_no_render_hook():
+    code = (
+        "from api.pdf_utils import hooks, metrics, engine\n"
+        "assert hooks.global_hooks() == (), hooks.global_hooks()\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_install_block_hook_is_idempotent(monkeypatch):
+    monkeypatch.setattr(hooks, "_HOOKS", ())
+    metrics.install_block_hook()
+    metrics.install_block_hook()
+    assert hooks.global_hooks() == (metrics._BLOCK_HOOK,)
+
+
+def test_block_hook_feeds_block_seconds():
+    class Block:
+        BLOCK_ID = "test_block"
+
+    class Placed:
+        block = Block()
+
+    metrics._BLOCK_HOOK.after_block(Placed(), 0.002, 10.0, 1)
+    assert 'resume_block_render_seconds_count{block="test_block",engine="blocks"}' in metrics.render()
+
+
+def test_buffered_observations_replay_into_registry(monkeypatch):
+    before = metrics.THEME_LOADS._values.get((), 0.0)
+    monkeypatch.setattr(metrics, "_PENDING", None)
+    metrics.buffer()
+    metrics.THEME_LOADS.inc()
+    assert metrics.THEME_LOADS._values.get((), 0.0) == before
+    observed = metrics.drain()
+    monkeypatch.setattr(metrics, "_PENDING", None)
+    metrics.apply(observed)
+    assert metrics.THEME_LOADS._values.get(()) == before + 1
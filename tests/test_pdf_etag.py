@@ -0,0 +1,59 @@
+﻿# tests/test_pdf_etag.py
+"""PDF ETags come from the render's cache key, so they survive re-rendering."""
+
+from __future__ import annotations
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import render_executor, result_cache
+
+PROFILE = {"header": {"name": "Jane Doe", "title": "Engineer"}, "skills": ["Python", "SQL"]}
+
+
+@pytest.fixture
+def no_result_cache(monkeypatch):
+    # No result cache and in-process renders: every request renders afresh.
+    monkeypatch.setenv("RESULT_CACHE_MB", "0")
+    monkeypatch.delenv("RESULT_CACHE_DIR", raising=False)
+    monkeypatch.setenv("RENDER_WORKERS", "0")
+    monkeypatch.setattr(result_cache, "_CACHE", None)
+    monkeypatch.setattr(render_executor, "_EXECUTOR", None)
+    yield
+    result_cache._CACHE = None
+    render_executor._EXECUTOR = None
+
+
+def _assert_revalidates(client, url, body):
+    first = client.post(url, json=body)
+    second = client.post(url, json=body)
+    assert first.status_code == second.status_code == 200
+    assert first.headers["x-cache"] == second.headers["x-cache"] == "MISS"
+    assert first.headers["etag"] == second.headers["etag"]
+
+    etag = first.headers["etag"]
+    again = client.post(url, json=body, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    other = client.post(url, json={**body, "profile": {**PROFILE, "skills": ["Go"]}}, headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
+
+
+def test_builder_route_etag_is_stable(no_result_cache):
+    from api.main import app
+
+    body = {"profile": PROFILE, "theme_name": "pro-clean"}
+    _assert_revalidates(TestClient(app), "/generate-form-simple", body)
+
+
+def test_blocks_route_etag_is_stable(no_result_cache):
+    from api.routes import generate_form
+
+    app = FastAPI()
+    app.include_router(generate_form.router)
+    body = {"profile": PROFILE, "theme_name": "pro-clean"}
+    _assert_revalidates(TestClient(app), "/generate-form-simple", body)
@@ -0,0 +1,123 @@
+﻿# tests/test_profile_store.py
+"""Both profile backends answer pages, prefixes and searches identically."""
+
+from __future__ import annotations
+
+import os
+import stat
+
+import pytest
+
+from api import profile_store
+from api.profile_index import search_terms
+from api.profile_store import DirectoryProfileStore, SQLiteProfileStore
+from api.routes.profiles import Profile
+
+PROFILES = {
+    "alice": {"skills": ["Python", "SQL"], "projects": [["Data pipeline", "", ""]]},
+    "Alan": {"skills": ["Go", "SQL"], "projects": [["Backend API", "", ""]]},
+    "bob": {"skills": ["Figma"], "education": [["Design school", "", "", "", "", ""]]},
+    "Bea": {"skills": ["Python"], "projects": [["Data platform", "", ""]]},
+    "carol": {"skills": ["Python", "R"], "education": [["Data Science MSc", "", "", "", "", ""]]},
+    "al-2": {"skills": ["sql"]},
+}
+
+
+@pytest.fixture(params=["dir", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "dir":
+        s = DirectoryProfileStore(tmp_path / "profiles")
+    else:
+        s = SQLiteProfileStore(tmp_path / "profiles.sqlite3")
+    for name, profile in PROFILES.items():
+        s.put(name, profile)
+    return s
+
+
+def _all_pages(store, limit, **kwargs):
+    names, cursor, pages = [], None, 0
+    while True:
+        page, cursor = store.page(limit=limit, cursor=cursor, **kwargs)
+        names += page
+        pages += 1
+        if cursor is None:
+            return names, pages
+
+
+def test_names_in_case_insensitive_order(store):
+    assert store.names() == ["al-2", "Alan", "alice", "Bea", "bob", "carol"]
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 10])
+def test_cursor_pages_cover_every_name_once(store, limit):
+    names, pages = _all_pages(store, limit)
+    assert names == store.names()
+    assert pages == max(1, -(-len(names) // limit))
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({"prefix": "al"}, ["al-2", "Alan", "alice"]),
+        ({"prefix": "B"}, ["Bea", "bob"]),
+        ({"prefix": "zz"}, []),
+        ({"query": "python"}, ["alice", "Bea", "carol"]),
+        ({"query": "data python"}, ["alice", "Bea", "carol"]),
+        ({"query": "SQL"}, ["al-2", "Alan", "alice"]),
+        ({"query": "sql", "prefix": "ali"}, ["alice"]),
+        ({"query": "nothing"}, []),
+    ],
+)
+def test_prefix_and_search(store, kwargs, expected):
+    assert _all_pages(store, 2, **kwargs)[0] == expected
+
+
+def test_search_follows_updates_and_deletes(store):
+    store.put("bob", {"skills": ["Python"]})
+    assert store.delete("carol")
+    assert not store.delete("carol")
+    assert store.page(limit=10, query="python")[0] == ["alice", "Bea", "bob"]
+
+
+def test_search_terms_cover_the_saved_model_fields():
+    saved = Profile(
+        skills=["FastAPI"],
+        projects=[["Resume builder", "details", "https://example.com"]],
+        education=[["Computer Science", "University", "", "", "", ""]],
+        summary="Ignored prose",
+    ).model_dump()
+    assert search_terms("tamer", saved) == {"tamer", "fastapi", "resume", "builder", "computer", "science"}
+
+
+def test_malformed_cursor_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.page(limit=2, cursor="***")
+
+
+def test_sqlite_import_many_rolls_back_on_error(tmp_path):
+    s = SQLiteProfileStore(tmp_path / "profiles.sqlite3")
+    s.put("alice", PROFILES["alice"])
+
+    def items():
+        yield "alice", {"skills": ["Replaced"]}
+        yield "bob", PROFILES["bob"]
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        s.import_many(items())
+    assert s.names() == ["alice"]
+    assert s.get("alice") == PROFILES["alice"]
+    assert s.page(limit=10, query="replaced")[0] == []
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX permission bits")
+def test_directory_store_writes_files_with_regular_permissions(tmp_path):
+    s = DirectoryProfileStore(tmp_path / "profiles")
+    s.put("alice", PROFILES["alice"])
+    path = tmp_path / "profiles" / "alice.json"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~profile_store._UMASK
+
+    path.chmod(0o640)
+    s.put("alice", PROFILES["bob"])
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert s.get("alice") == PROFILES["bob"]
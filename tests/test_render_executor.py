@@ -0,0 +1,79 @@
+﻿# tests/test_render_executor.py
+"""Queue bounds and crash recovery of the render executor."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from api import render_executor
+from api.render_executor import RenderExecutor, RenderQueueFull
+
+
+def _sleep(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+@pytest.fixture
+def no_preload(monkeypatch):
+    # Workers are forked from the test process; skip fonts/themes warm-up.
+    monkeypatch.setattr(render_executor, "preload", lambda: None)
+    monkeypatch.setattr(render_executor, "_preload_parent", lambda: None)
+
+
+def test_queue_full_raises(no_preload):
+    executor = RenderExecutor(0, queue_size=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(executor.run(release.wait, 5))
+        waiting = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["running"] == 1
+        assert executor.stats()["waiting"] == 1
+        with pytest.raises(RenderQueueFull):
+            await executor.run(release.wait, 5)
+        release.set()
+        assert await running and await waiting
+        assert executor.stats()["running"] == executor.stats()["waiting"] == 0
+
+    asyncio.run(main())
+
+
+def test_worker_crash_restarts_the_pool_once(no_preload):
+    executor = RenderExecutor(2, per_worker_concurrency=2, start_method="fork")
+    started = []
+    real_start = executor.start
+
+    def counting_start():
+        before = executor._pool
+        real_start()
+        if executor._pool is not before:
+            started.append(executor._pool)
+
+    executor.start = counting_start
+
+    async def main():
+        executor.start()
+        in_flight = [asyncio.ensure_future(executor.run(_sleep, 2)) for _ in range(4)]
+        await asyncio.sleep(0.5)
+        victim = next(iter(executor._pool._processes))
+        os.kill(victim, 9)
+        results = await asyncio.gather(*in_flight, return_exceptions=True)
+        assert all(isinstance(r, BrokenProcessPool) for r in results)
+        # One replacement pool, and it still serves renders.
+        assert len(started) == 2
+        assert executor._pool is started[1]
+        pids = await asyncio.gather(*(executor.run(_sleep, 0) for _ in range(4)))
+        assert victim not in pids
+
+    try:
+        asyncio.run(main())
+    finally:
+        executor.shutdown()
@@ -0,0 +1,61 @@
+﻿# tests/test_result_cache.py
+"""Result-cache keys follow the files a render depends on."""
+
+from __future__ import annotations
+
+import os
+
+from api.result_cache import ResultCache
+
+
+def _key(cache, deps):
+    return cache.make_key(
+        engine="blocks",
+        theme_name="t",
+        layout_inline={"flow": []},
+        profile={"header": {"name": "A"}},
+        ui_lang="en",
+        rtl_mode=False,
+        deps=deps,
+    )
+
+
+def test_key_is_stable_for_unchanged_inputs(tmp_path):
+    theme = tmp_path / "t.theme.json"
+    theme.write_text("{}", encoding="utf-8")
+    cache = ResultCache(1024 * 1024)
+    assert _key(cache, [theme]).digest == _key(cache, [theme]).digest
+
+
+def test_key_changes_with_theme_mtime(tmp_path):
+    theme = tmp_path / "t.theme.json"
+    theme.write_text("{}", encoding="utf-8")
+    cache = ResultCache(1024 * 1024)
+    before = _key(cache, [theme])
+    st = theme.stat()
+    os.utime(theme, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert _key(cache, [theme]).digest != before.digest
+
+
+def test_theme_change_invalidates_cached_result(tmp_path):
+    theme = tmp_path / "t.theme.json"
+    theme.write_text("{}", encoding="utf-8")
+    cache = ResultCache(1024 * 1024)
+    key = _key(cache, [theme])
+    cache.put(key, b"%PDF-old")
+    assert cache.get(key) == b"%PDF-old"
+    theme.write_text('{"accent": "#000"}', encoding="utf-8")
+    assert cache.get(_key(cache, [theme])) is None
+
+
+def test_disk_tier_survives_restart_until_theme_changes(tmp_path):
+    theme = tmp_path / "t.theme.json"
+    theme.write_text("{}", encoding="utf-8")
+    disk = tmp_path / "cache"
+    first = ResultCache(0, disk_dir=disk)
+    first.put(_key(first, [theme]), b"%PDF-1")
+
+    restarted = ResultCache(0, disk_dir=disk)
+    assert restarted.get(_key(restarted, [theme])) == b"%PDF-1"
+    theme.write_text('{"accent": "#000"}', encoding="utf-8")
+    assert restarted.get(_key(restarted, [theme])) is None
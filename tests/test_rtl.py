@@ -0,0 +1,79 @@
+﻿# tests/test_rtl.py
+"""Cached, single-pass Arabic shaping gives the same text as per-word shaping."""
+
+from __future__ import annotations
+
+import re
+
+import pytest
+
+arabic_reshaper = pytest.importorskip("arabic_reshaper")
+get_display = pytest.importorskip("bidi.algorithm").get_display
+
+from api.pdf_utils import rtl as rtl_mod  # noqa: E402
+
+SAMPLES = [
+    "",
+    "Plain Latin text, nothing to shape.",
+    "مهندس برمجيات",
+    "السلام عليكم ورحمة الله",
+    "لا إله إلا الله",  # lam-alef ligatures
+    "مُهَنْدِسٌ",  # diacritics
+    "خبرة ١٢ سنة في Python و FastAPI",
+    "  مسافات  في\tالبداية\nوالنهاية  ",
+    "API-واجهة (برمجية) [٢٠٢٤]: REST/واجهات",
+    "email: user@example.com — البريد",
+    "ﻻ ﷲ presentation forms",
+    "mixed نص non-breaking",
+]
+
+
+def _per_word(text: str) -> str:
+    """The previous ``rtl``: shape every whitespace-split part that has Arabic."""
+    if not text:
+        return ""
+    return "".join(
+        get_display(arabic_reshaper.reshape(part)) if rtl_mod.ARABIC_RE.search(part) else part
+        for part in re.split(r"(\s+)", str(text))
+    )
+
+
+@pytest.fixture(params=[4 * 1024 * 1024, 0], ids=["cached", "uncached"])
+def cache(request, monkeypatch):
+    c = rtl_mod.ShapingCache(request.param)
+    monkeypatch.setattr(rtl_mod, "_CACHE", c)
+    return c
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_rtl_matches_per_word_shaping(cache, text):
+    assert rtl_mod.rtl(text) == _per_word(text)
+    assert rtl_mod.rtl(text) == _per_word(text)  # again, from the cache
+
+
+@pytest.mark.parametrize("text", [s for s in SAMPLES if s])
+def test_shape_matches_reshape_and_display(cache, text):
+    assert rtl_mod.shape(text) == get_display(arabic_reshaper.reshape(text))
+
+
+def test_latin_text_is_returned_unchanged(cache):
+    text = "No Arabic here at all"
+    assert rtl_mod.rtl(text) is text
+    assert cache.stats()["misses"] == 0
+
+
+def test_repeated_words_hit_the_cache(cache):
+    if not cache.max_bytes:
+        pytest.skip("cache disabled")
+    rtl_mod.rtl("مرحبا مرحبا مرحبا")
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 2
+
+
+def test_cache_stays_within_budget():
+    c = rtl_mod.ShapingCache(4096)
+    for i in range(200):
+        c.put(f"كلمة{i}", f"shaped{i}")
+    stats = c.stats()
+    assert stats["bytes"] <= 4096 and stats["evictions"] > 0
+    assert c.get("كلمة199") == "shaped199"
+    assert c.get("كلمة0") is None
@@ -0,0 +1,322 @@
+﻿# tools/bench_pipeline.py
+"""
+Stage-level micro-benchmarks for the render pipeline.
+
+Times each stage on its own, over every layout in layouts/, every theme in
+themes/ and every distinct profile in profiles/ (including the large ones
+with an embedded photo):
+
+    validate        GeneratePayload.model_validate(payload)
+    overrides       mapper.profile_to_overrides(profile)
+    map_ready       data_mapper.map_profile_to_ready(profile, ...)
+    theme_cold      theme file read + parse + style compile (cache dropped)
+    theme           cached theme + style sheet lookup
+    layout_cold     layout compile (compiled-layout cache dropped)
+    layout          cached layout file + compiled layout lookup
+    block:<id>      one block's bind + render() (block engine hooks)
+    blocks_draw     all blocks of a layout (block engine, no save)
+    canvas_save     showPage() + save() of that canvas
+    builder_total   builder.build_resume_pdf (what /generate-form-simple runs)
+
+Usage:
+    python tools/bench_pipeline.py                       # table
+    python tools/bench_pipeline.py --out bench.json      # + JSON results
+    python tools/bench_pipeline.py --compare bench.json  # vs a baseline
+    python tools/bench_pipeline.py --repeat 10 --layouts two-column --themes aqua-card
+
+``--compare`` exits with status 1 when a stage's median is slower than the
+baseline by more than ``--threshold`` percent (default 10; stages under
+0.05 ms are ignored as noise). A stage that raises is recorded with its
+error instead of timings and does not stop the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from reportlab.pdfgen import canvas  # noqa: E402
+
+from api.main import GeneratePayload  # noqa: E402
+from api.pdf_utils import builder  # noqa: E402
+from api.pdf_utils.compiled_layout import (  # noqa: E402
+    clear_compiled_layouts,
+    compile_layout,
+    get_compiled_layout,
+    load_layout_file,
+)
+from api.pdf_utils.data_mapper import map_profile_to_ready  # noqa: E402
+from api.pdf_utils.engine import LayoutEngine  # noqa: E402
+from api.pdf_utils.frozen import thaw  # noqa: E402
+from api.pdf_utils.hooks import RenderHook  # noqa: E402
+from api.pdf_utils.mapper import profile_to_overrides  # noqa: E402
+from api.pdf_utils.theme_loader import get_theme_repository, load_style_sheet, load_theme  # noqa: E402
+
+NOISE_MS = 0.05
+
+Results = Dict[str, Dict[str, float]]
+
+
+# ---------- inputs ----------
+def _load_json(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8-sig"))
+
+
+def discover(layout_filter: List[str], theme_filter: List[str], profile_filter: List[str]):
+    """(layouts {name: path}, themes [names], profiles {name: dict}) to benchmark."""
+    layouts = {
+        p.name[: -len(".json")].replace(".layout", ""): p
+        for p in sorted((ROOT / "layouts").glob("*.json"))
+    }
+    themes = [p.name[: -len(".theme.json")] for p in sorted((ROOT / "themes").glob("*.theme.json"))]
+
+    profiles: Dict[str, Dict[str, Any]] = {}
+    seen = set()
+    for p in sorted((ROOT / "profiles").glob("*.json")):
+        digest = hashlib.sha256(p.read_bytes()).hexdigest()
+        if digest in seen:  # identical copies add nothing
+            continue
+        seen.add(digest)
+        profiles[p.stem] = _load_json(p)
+
+    return (
+        {k: v for k, v in layouts.items() if not layout_filter or k in layout_filter},
+        [t for t in themes if not theme_filter or t in theme_filter],
+        {k: v for k, v in profiles.items() if not profile_filter or k in profile_filter},
+    )
+
+
+def _layout_inline(layout: Dict[str, Any], profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Layout with the profile's overrides merged in, as the API routes do."""
+    li = thaw(layout)
+    ov = li.setdefault("overrides", {})
+    for k, v in profile_to_overrides(profile).items():
+        ov.setdefault(k, v)
+    return li
+
+
+# ---------- timing ----------
+def timeit(fn: Callable[[], Any], repeat: int) -> List[float]:
+    fn()  # warm-up (imports, first-use font parsing)
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def measure(results: Results, key: str, fn: Callable[[], Any], repeat: int) -> None:
+    """Time ``fn`` into ``results[key]``; record the error if it raises."""
+    try:
+        samples = timeit(fn, repeat)
+    except Exception as exc:
+        results[key] = {"error": f"{type(exc).__name__}: {exc}"}
+        return
+    _add(results, key, samples)
+
+
+def _add(results: Results, key: str, samples: List[float]) -> None:
+    prev = results.get(key)
+    if prev:  # same stage measured under several contexts: pool the samples
+        samples = samples + prev.pop("_samples")
+    results[key] = {
+        "median_ms": round(statistics.median(samples), 4),
+        "min_ms": round(min(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "n": len(samples),
+        "_samples": samples,
+    }
+
+
+class _BlockTimer(RenderHook):
+    """Collects per-block times (ms) from the engine's block events."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {}
+
+    def after_block(self, block, elapsed, dy, page, error=None) -> None:
+        self.samples.setdefault(block.base_id, []).append(elapsed * 1000)
+
+
+def _render_blocks(layout, ready, theme_name: str, ui_lang: str) -> Tuple[float, float, Dict[str, List[float]]]:
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=layout.pagesize)
+    timer = _BlockTimer()
+    engine = LayoutEngine.for_layout(
+        c, layout, theme=load_theme(theme_name), style=load_style_sheet(theme_name),
+        ui_lang=ui_lang, rtl_mode=False, hooks=[timer],
+    )
+    t0 = time.perf_counter()
+    engine.render(layout, ready)
+    t1 = time.perf_counter()
+    c.showPage()
+    c.save()
+    t2 = time.perf_counter()
+    return (t1 - t0) * 1000, (t2 - t1) * 1000, timer.samples
+
+
+# ---------- suite ----------
+def run_suite(layouts, themes, profiles, repeat: int, ui_lang: str = "en") -> Results:
+    results: Results = {}
+    repo = get_theme_repository()
+
+    for pname, profile in profiles.items():
+        payload = {"profile": profile, "theme_name": "default", "ui_lang": ui_lang}
+        measure(results, f"validate|{pname}", lambda: GeneratePayload.model_validate(payload), repeat)
+        measure(results, f"overrides|{pname}", lambda: profile_to_overrides(profile), repeat)
+        measure(results, f"map_ready|{pname}",
+                lambda: map_profile_to_ready(profile, ui_lang=ui_lang, rtl_mode=False), repeat)
+
+    for tname in themes:
+        def cold(t=tname):
+            repo.invalidate(t)
+            load_theme(t)
+            load_style_sheet(t)
+        measure(results, f"theme_cold|{tname}", cold, repeat)
+        measure(results, f"theme|{tname}", lambda t=tname: (load_theme(t), load_style_sheet(t)), repeat)
+
+    layout_docs = {}
+    for lname, path in layouts.items():
+        def cold_layout(p=path):
+            clear_compiled_layouts()
+            compile_layout(thaw(load_layout_file(p).data))
+        measure(results, f"layout_cold|{lname}", cold_layout, repeat)
+        layout_docs[lname] = thaw(load_layout_file(path).data)
+        measure(results, f"layout|{lname}",
+                lambda p=path: get_compiled_layout(load_layout_file(p).data), repeat)
+
+    for lname, doc in layout_docs.items():
+        for tname in themes:
+            for pname, profile in profiles.items():
+                li = _layout_inline(doc, profile)
+                layout = get_compiled_layout(li)
+                ready, _ = map_profile_to_ready(
+                    profile, ui_lang=ui_lang, rtl_mode=False, map_rules_override=li.get("map_rules") or {}
+                )
+                ctx = f"{lname}/{tname}/{pname}"
+                draws, saves, per_block = [], [], {}
+                _render_blocks(layout, ready, tname, ui_lang)  # warm-up
+                for _ in range(repeat):
+                    d, s, blocks = _render_blocks(layout, ready, tname, ui_lang)
+                    draws.append(d)
+                    saves.append(s)
+                    for bid, ms in blocks.items():
+                        per_block.setdefault(bid, []).extend(ms)
+                _add(results, f"blocks_draw|{ctx}", draws)
+                _add(results, f"canvas_save|{ctx}", saves)
+                for bid, ms in per_block.items():
+                    _add(results, f"block:{bid}|{lname}", ms)
+
+                data = {"profile": profile, "theme_name": tname, "ui_lang": ui_lang,
+                        "rtl_mode": False, "layout_inline": li}
+                measure(results, f"builder_total|{ctx}",
+                        lambda d=data: builder.build_resume_pdf(data=d), repeat)
+
+    for v in results.values():
+        v.pop("_samples", None)
+    return results
+
+
+# ---------- output ----------
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _meta(repeat: int) -> Dict[str, Any]:
+    import reportlab
+
+    return {
+        "commit": _git_rev(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "reportlab": reportlab.Version,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+    }
+
+
+def print_table(results: Results) -> None:
+    print(f"{'stage':<60} {'median ms':>10} {'min ms':>10} {'n':>5}")
+    for key in sorted(results):
+        r = results[key]
+        if "error" in r:
+            print(f"{key:<60} {'error':>10}  {r['error'][:60]}")
+            continue
+        print(f"{key:<60} {r['median_ms']:>10.3f} {r['min_ms']:>10.3f} {r['n']:>5}")
+
+
+def compare(results: Results, baseline: Results, threshold: float) -> int:
+    """Print per-stage deltas vs ``baseline``; return the number of regressions."""
+    regressions = 0
+    print(f"{'stage':<60} {'base ms':>10} {'now ms':>10} {'delta':>8}")
+    for key in sorted(set(results) | set(baseline)):
+        now, base = results.get(key), baseline.get(key)
+        if now and "error" in now:
+            print(f"{key:<60} {'':>10} {'error':>10}  {now['error'][:60]}")
+            if base and "error" not in base:
+                regressions += 1
+            continue
+        if not now or not base or "error" in base:
+            b = "-" if not base else base.get("median_ms", "error")
+            n = "-" if not now else now["median_ms"]
+            print(f"{key:<60} {b:>10} {n:>10} {'gone' if not now else 'new':>8}")
+            continue
+        b, n = base["median_ms"], now["median_ms"]
+        delta = (n - b) / b * 100 if b else 0.0
+        flag = ""
+        if delta > threshold and max(b, n) >= NOISE_MS:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{key:<60} {b:>10.3f} {n:>10.3f} {delta:>+7.1f}%{flag}")
+    print(f"\n{regressions} regression(s) over {threshold:.0f}%")
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5, help="timed runs per stage (after one warm-up)")
+    ap.add_argument("--layouts", nargs="*", default=[], help="layout names (default: all)")
+    ap.add_argument("--themes", nargs="*", default=[], help="theme names (default: all)")
+    ap.add_argument("--profiles", nargs="*", default=[], help="profile names (default: all)")
+    ap.add_argument("--out", type=Path, help="write JSON results here")
+    ap.add_argument("--compare", type=Path, help="baseline JSON from an earlier --out")
+    ap.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = ap.parse_args()
+
+    layouts, themes, profiles = discover(args.layouts, args.themes, args.profiles)
+    results = run_suite(layouts, themes, profiles, max(1, args.repeat))
+    doc = {"meta": _meta(args.repeat), "results": results}
+
+    if args.out:
+        args.out.write_text(json.dumps(doc, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"wrote {args.out}")
+
+    if args.compare:
+        baseline = _load_json(args.compare)
+        print(f"baseline: {baseline.get('meta', {}).get('commit')}  now: {doc['meta']['commit']}\n")
+        sys.exit(1 if compare(results, baseline.get("results", {}), args.threshold) else 0)
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+﻿# tools/bench_rtl.py
+"""
+Cost of Arabic shaping: an Arabic-heavy document vs a Latin-only one.
+
+Both documents have the same structure (header, summary, skills, projects,
+education, languages); only the script differs. For each one the tool times:
+
+    shape_text   rtl.rtl() over every string of the profile (blocks engine path)
+    builder      builder.build_resume_pdf with rtl_mode on (/generate-form-simple)
+
+each in three cache states:
+
+    uncached     shaping cache disabled (every word/line shaped each time)
+    cold         cache cleared before every run (repeats within one document only)
+    warm         cache kept across runs (steady state of a render worker)
+
+Examples:
+    python tools/bench_rtl.py
+    python tools/bench_rtl.py --repeat 20 --theme arabic-elegant
+    python tools/bench_rtl.py --out rtl.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.pdf_utils import builder, rtl  # noqa: E402
+
+FLOW = [{
+    "column": "main",
+    "blocks": ["header_name", "text_section:summary", "key_skills", "projects", "education", "languages"],
+}]
+
+ARABIC: Dict[str, Any] = {
+    "header": {"name": "سارة أحمد", "title": "مهندسة برمجيات أولى"},
+    "summary": (
+        "مهندسة برمجيات بخبرة ثماني سنوات في تطوير الأنظمة الخلفية وتصميم واجهات البرمجة.\n"
+        "قادت فرقاً صغيرة لبناء خدمات سحابية عالية التوفر، وتهتم بجودة الكود والاختبارات الآلية.\n"
+        "تعمل حالياً على تحسين أداء منصات معالجة البيانات وتقليل زمن الاستجابة."
+    ),
+    "skills": ["بايثون", "تصميم قواعد البيانات", "الحوسبة السحابية", "الاختبارات الآلية", "قيادة الفرق"],
+    "projects": [
+        [f"منصة التوظيف {i}", "نظام لإدارة طلبات التوظيف ومتابعة المرشحين مع لوحة تقارير تفاعلية.", ""]
+        for i in range(1, 7)
+    ],
+    "education": ["بكالوريوس علوم الحاسب — جامعة الملك سعود", "دبلوم هندسة البرمجيات — جامعة القاهرة"],
+    "languages": ["العربية — اللغة الأم", "الإنجليزية — طلاقة"],
+}
+
+LATIN: Dict[str, Any] = {
+    "header": {"name": "Sarah Ahmed", "title": "Senior Software Engineer"},
+    "summary": (
+        "Software engineer with eight years of experience building backend systems and API design.\n"
+        "Led small teams delivering highly available cloud services, with a focus on code quality and tests.\n"
+        "Currently improving the performance of data processing platforms and reducing latency."
+    ),
+    "skills": ["Python", "Database design", "Cloud computing", "Automated testing", "Team leadership"],
+    "projects": [
+        [f"Hiring platform {i}", "System for managing job applications and tracking candidates with reports.", ""]
+        for i in range(1, 7)
+    ],
+    "education": ["BSc Computer Science - King Saud University", "Diploma in Software Engineering - Cairo University"],
+    "languages": ["Arabic - native", "English - fluent"],
+}
+
+
+def _strings(obj: Any) -> List[str]:
+    if isinstance(obj, str):
+        return [obj]
+    if isinstance(obj, dict):
+        return [s for v in obj.values() for s in _strings(v)]
+    if isinstance(obj, (list, tuple)):
+        return [s for v in obj for s in _strings(v)]
+    return []
+
+
+def _time(fn: Callable[[], Any], repeat: int, before: Callable[[], None]) -> Dict[str, float]:
+    before()
+    fn()  # warm-up (fonts, theme)
+    samples = []
+    for _ in range(repeat):
+        before()
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "n": len(samples)}
+
+
+def run(repeat: int, theme: str) -> Dict[str, Dict[str, float]]:
+    cache = rtl.get_shaping_cache()
+    budget = cache.max_bytes or 4 * 1024 * 1024
+    results: Dict[str, Dict[str, float]] = {}
+    for doc_name, profile in (("arabic", ARABIC), ("latin", LATIN)):
+        texts = _strings(profile)
+        data = {"profile": profile, "theme_name": theme, "ui_lang": "ar", "rtl_mode": True,
+                "layout_inline": {"flow": FLOW}}
+        cases = {
+            "shape_text": lambda: [rtl.rtl(t) for t in texts],
+            "builder": lambda d=data: builder.build_resume_pdf(data=d),
+        }
+        for case, fn in cases.items():
+            for mode in ("uncached", "cold", "warm"):
+                cache.clear()
+                cache.max_bytes = 0 if mode == "uncached" else budget
+                before = cache.clear if mode == "cold" else (lambda: None)
+                results[f"{doc_name}|{case}|{mode}"] = _time(fn, repeat, before)
+    cache.max_bytes = budget
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=10, help="timed runs per case (after one warm-up)")
+    ap.add_argument("--theme", default="arabic-elegant", help="theme for the builder runs")
+    ap.add_argument("--out", type=Path, help="write JSON results here")
+    args = ap.parse_args()
+
+    results = run(max(1, args.repeat), args.theme)
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"wrote {args.out}")
+    print(f"{'document|case|cache':<32} {'median ms':>10} {'min ms':>10} {'n':>5}")
+    for key, r in results.items():
+        print(f"{key:<32} {r['median_ms']:>10.3f} {r['min_ms']:>10.3f} {r['n']:>5}")
+
+
+if __name__ == "__main__":
+    main()
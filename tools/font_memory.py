@@ -0,0 +1,167 @@
+﻿# tools/font_memory.py
+"""
+Per-process memory of the font subsystem (Linux, reads /proc/<pid>/smaps).
+
+Starts N worker processes that load every font in api/pdf_utils/assets the
+way a render worker does, keeps them alive, and reports for each one:
+
+- font files : memory mapped from the .ttf files, split into shared
+               (page cache, counted once for all workers) and private;
+- parsed     : anonymous memory the process gained while parsing/registering
+               the fonts (private unless preloaded in a parent before fork).
+
+Examples:
+    python tools/font_memory.py --workers 4
+    python tools/font_memory.py --workers 4 --start-method spawn
+    FONT_MMAP=0 python tools/font_memory.py --workers 4       # bytes copies
+    python tools/font_memory.py --pid 1234 1235               # running servers
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+FONT_EXTS = (".ttf", ".otf", ".ttc")
+SAMPLE = "The quick brown fox jumps over the lazy dog 0123456789 " \
+         "السيرة الذاتية"
+
+
+def _smaps(pid: int) -> List[Dict]:
+    """Parse /proc/<pid>/smaps into [{path, Rss, Pss, Shared, Private}] (kB)."""
+    out, cur = [], None
+    with open(f"/proc/{pid}/smaps", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            head = line.split()
+            if not head:
+                continue
+            if "-" in head[0] and not head[0].endswith(":"):
+                cur = {"path": head[5] if len(head) > 5 else "",
+                       "Rss": 0, "Pss": 0, "Shared": 0, "Private": 0}
+                out.append(cur)
+                continue
+            key, val = head[0].rstrip(":"), head[1] if len(head) > 1 else "0"
+            if cur is None or not val.isdigit():
+                continue
+            kb = int(val)
+            if key in ("Rss", "Pss"):
+                cur[key] = kb
+            elif key in ("Shared_Clean", "Shared_Dirty"):
+                cur["Shared"] += kb
+            elif key in ("Private_Clean", "Private_Dirty"):
+                cur["Private"] += kb
+    return out
+
+
+def _anon_private_kb(pid: int) -> int:
+    """Private anonymous memory of a process (heap, Python objects)."""
+    return sum(m["Private"] for m in _smaps(pid) if not m["path"].startswith("/"))
+
+
+def measure(pid: int) -> Dict[str, int]:
+    """Font-file mapping totals of one process (kB)."""
+    fonts = [m for m in _smaps(pid) if m["path"].lower().endswith(FONT_EXTS)]
+    return {
+        "pid": pid,
+        "font_files": len(fonts),
+        "font_rss_kb": sum(m["Rss"] for m in fonts),
+        "font_shared_kb": sum(m["Shared"] for m in fonts),
+        "font_private_kb": sum(m["Private"] for m in fonts),
+        "font_pss_kb": sum(m["Pss"] for m in fonts),
+        "anon_private_kb": _anon_private_kb(pid),
+    }
+
+
+def _load_fonts() -> None:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from api.pdf_utils import fonts
+
+    fonts.register_all_fonts()
+    for name in sorted(fonts.REGISTERED):
+        try:
+            stringWidth(SAMPLE, name, 10)
+        except Exception:
+            pass
+
+
+def _worker(results, release) -> None:
+    from api.pdf_utils import fonts  # noqa: F401  (imports are not font memory)
+
+    pid = os.getpid()
+    before = _anon_private_kb(pid)
+    _load_fonts()
+    results.put((pid, _anon_private_kb(pid) - before))
+    release.wait()
+
+
+def run_workers(n: int, start_method: str, preload: bool) -> List[Dict[str, int]]:
+    ctx = multiprocessing.get_context(start_method)
+    if preload:
+        if start_method != "fork":
+            raise SystemExit("--preload only makes sense with --start-method fork")
+        import gc
+        _load_fonts()
+        gc.freeze()
+    results, release = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(results, release)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    try:
+        grown = dict(results.get(timeout=120) for _ in procs)
+        rows = []
+        for pid, delta in grown.items():
+            row = measure(pid)
+            row["parsed_private_kb"] = delta
+            rows.append(row)
+        return rows
+    finally:
+        release.set()
+        for p in procs:
+            p.join(timeout=10)
+
+
+def _print_table(rows: List[Dict[str, int]]) -> None:
+    cols = ["pid", "font_files", "font_rss_kb", "font_shared_kb", "font_private_kb",
+            "font_pss_kb", "parsed_private_kb"]
+    cols = [c for c in cols if any(c in r for r in rows)]
+    print("  ".join(f"{c:>17}" for c in cols))
+    for r in rows:
+        print("  ".join(f"{r.get(c, ''):>17}" for c in cols))
+    unique = sum(r["font_private_kb"] + r.get("parsed_private_kb", 0) for r in rows)
+    shared = max((r["font_shared_kb"] for r in rows), default=0)
+    print(f"\nunique (sum over processes): {unique} kB   shared font pages: {shared} kB")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--start-method", default="spawn", choices=multiprocessing.get_all_start_methods())
+    ap.add_argument("--preload", action="store_true", help="parse fonts in the parent before fork")
+    ap.add_argument("--pid", type=int, nargs="*", help="inspect running processes instead")
+    ap.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = ap.parse_args()
+
+    if not os.path.exists("/proc/self/smaps"):
+        raise SystemExit("This tool needs Linux /proc/<pid>/smaps.")
+
+    if args.pid:
+        rows = [measure(pid) for pid in args.pid]
+    else:
+        rows = run_workers(args.workers, args.start_method, args.preload)
+
+    if args.json:
+        print(json.dumps({"font_mmap": os.getenv("FONT_MMAP", "1"), "processes": rows}, indent=2))
+    else:
+        _print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+﻿# tools/migrate_profile_photos.py
+"""
+Move inline profile photos (``photo_b64``) into the blob store.
+
+Every ``*.json`` profile in PROFILES_DIR that still embeds its photo as
+base64 is rewritten (atomically) to reference it by ``photo_id``; the bytes
+go to the content-addressed blob store (``api.blob_store``), once per
+distinct photo. Profiles without an inline photo are left untouched, so the
+tool can be re-run safely.
+
+Examples:
+    python tools/migrate_profile_photos.py --dry-run
+    python tools/migrate_profile_photos.py
+    PROFILES_DIR=/srv/profiles python tools/migrate_profile_photos.py
+    python tools/migrate_profile_photos.py --profiles-dir other/ --blobs-dir other/.blobs
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import binascii
+import hashlib
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.blob_store import BlobStore, blobs_dir  # noqa: E402
+from api.photos import sniff_image  # noqa: E402
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        obj = json.loads(path.read_text(encoding="utf-8-sig"))
+    except (OSError, ValueError) as exc:
+        print(f"skip  {path.name}: {exc}")
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def _write(path: Path, profile: Dict[str, Any]) -> None:
+    data = json.dumps(profile, ensure_ascii=False, indent=2)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", delete=False, dir=str(path.parent), suffix=".tmp") as tmp:
+        tmp.write(data)
+        tmp_path = Path(tmp.name)
+    tmp_path.replace(path)
+
+
+def migrate(profiles_dir: Path, store: BlobStore, *, dry_run: bool = False) -> Dict[str, int]:
+    """Migrate every profile in ``profiles_dir``; returns counters for the report."""
+    stats = {"profiles": 0, "migrated": 0, "photos": 0, "bytes_before": 0, "bytes_after": 0}
+    photos = set()
+    for path in sorted(profiles_dir.glob("*.json")):
+        stats["profiles"] += 1
+        profile = _read(path)
+        b64 = profile.get("photo_b64") if profile else None
+        if not b64:
+            continue
+        try:
+            data = base64.b64decode(b64, validate=True)
+        except (binascii.Error, ValueError):
+            print(f"skip  {path.name}: photo_b64 is not valid base64")
+            continue
+        if sniff_image(data) is None:
+            print(f"skip  {path.name}: photo_b64 is not a PNG/JPEG/GIF/WebP image")
+            continue
+
+        before = path.stat().st_size
+        pid = hashlib.sha256(data).hexdigest() if dry_run else store.put(data)
+        del profile["photo_b64"]
+        profile["photo_id"] = pid
+        after = len(json.dumps(profile, ensure_ascii=False, indent=2).encode("utf-8"))
+        if not dry_run:
+            _write(path, profile)
+
+        photos.add(pid)
+        stats["migrated"] += 1
+        stats["bytes_before"] += before
+        stats["bytes_after"] += after
+        print(f"{'would ' if dry_run else ''}migrate {path.name}: {before} -> {after} bytes (photo {pid[:12]})")
+    stats["photos"] = len(photos)
+    return stats
+
+
+def main() -> None:
+    from api.routes.profiles import PROFILES_DIR
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--profiles-dir", type=Path, default=PROFILES_DIR, help="profiles to migrate (default: PROFILES_DIR)")
+    ap.add_argument("--blobs-dir", type=Path, default=None, help="blob store root (default: BLOBS_DIR or <profiles>/.blobs)")
+    ap.add_argument("--dry-run", action="store_true", help="report only, write nothing")
+    args = ap.parse_args()
+
+    profiles_dir = args.profiles_dir.resolve()
+    if args.blobs_dir is not None:
+        root = args.blobs_dir.resolve()
+    elif profiles_dir == PROFILES_DIR:
+        root = blobs_dir()
+    else:
+        root = profiles_dir / ".blobs"
+    stats = migrate(profiles_dir, BlobStore(root), dry_run=args.dry_run)
+    print(
+        f"{stats['migrated']}/{stats['profiles']} profiles, {stats['photos']} distinct photos; "
+        f"{stats['bytes_before']} -> {stats['bytes_after']} bytes of profile JSON"
+        + ("" if args.dry_run else f" (blobs in {root})")
+    )
+
+
+if __name__ == "__main__":
+    main()
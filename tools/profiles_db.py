@@ -0,0 +1,66 @@
+﻿# tools/profiles_db.py
+"""
+Bulk copy of saved profiles between a profiles directory and a SQLite store.
+
+``import`` loads every ``<name>.json`` of a directory into the SQLite
+database in a single transaction (existing rows with the same name are
+replaced); ``export`` writes every row back out as ``<name>.json``, so a
+deployment can switch ``PROFILE_STORE`` either way and keep its profiles.
+
+Examples:
+    python tools/profiles_db.py import                       # PROFILES_DIR -> PROFILE_DB
+    python tools/profiles_db.py import --profiles-dir old/ --db /srv/profiles.sqlite3
+    python tools/profiles_db.py export --profiles-dir backup/
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from api.profile_store import DirectoryProfileStore, SQLiteProfileStore  # noqa: E402
+
+
+def _read_dir(profiles_dir: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    for path in sorted(profiles_dir.glob("*.json")):
+        try:
+            profile = json.loads(path.read_text(encoding="utf-8-sig"))
+        except (OSError, ValueError) as exc:
+            print(f"skip  {path.name}: {exc}")
+            continue
+        yield path.stem, profile
+
+
+def main() -> None:
+    from api.routes.profiles import PROFILES_DIR
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("command", choices=("import", "export"), help="import: directory -> db, export: db -> directory")
+    ap.add_argument("--profiles-dir", type=Path, default=PROFILES_DIR, help="profiles directory (default: PROFILES_DIR)")
+    ap.add_argument("--db", type=Path, default=None, help="SQLite file (default: PROFILE_DB or PROFILES_DIR/profiles.sqlite3)")
+    args = ap.parse_args()
+
+    profiles_dir = args.profiles_dir.resolve()
+    db_path = args.db or Path(os.getenv("PROFILE_DB") or PROFILES_DIR / "profiles.sqlite3")
+    db = SQLiteProfileStore(db_path.resolve())
+
+    t0 = time.perf_counter()
+    if args.command == "import":
+        count = db.import_many(_read_dir(profiles_dir))
+        where = f"{profiles_dir} -> {db.path}"
+    else:
+        count = DirectoryProfileStore(profiles_dir).import_many(db.export_all())
+        where = f"{db.path} -> {profiles_dir}"
+    print(f"{args.command}: {count} profiles, {where} ({time.perf_counter() - t0:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()